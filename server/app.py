@@ -4,43 +4,87 @@ Flight Delay Prediction API
 FastAPI application for serving flight delay predictions and airport data.
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 import logging
 import sys
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 # Add current directory to path for imports
 sys.path.append('.')
 
-from routers import airports, predictions
-from models.schemas import APIInfo, HealthResponse, ServiceStatus
-from models.prediction import prediction_service
+from utils.startup import timed, log_startup_report
+from utils.executor import get_executor, shutdown_executor
+from utils.file_watcher import DEFAULT_POLL_INTERVAL, FileWatcher, get_watch_interval
+from utils.logging_config import configure_logging, flush_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+with timed("import fastapi"):
+    from fastapi import FastAPI, HTTPException, Response
+    from fastapi.middleware.cors import CORSMiddleware
+
+with timed("import application modules"):
+    from routers import admin, airports, predictions
+    from models.schemas import APIInfo, HealthResponse, ServiceStatus
+    from models.prediction import prediction_service
+    from services.shared_state import get_shared_state_path
+    from utils.metrics import EXPOSITION_MEDIA_TYPE, REGISTRY, CallbackGauge, MetricsMiddleware
+    from utils.json_encoding import JSON_MEDIA_TYPE, dumps, fast_serialization_enabled
+    from utils.probes import ProbeMiddleware
+
+# Configure logging: records are formatted and written in batches on a background thread
+configure_logging(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FAST_SERIALIZATION = fast_serialization_enabled()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
     # Startup
     logger.info("Starting Flight Delay Prediction API...")
+    log_startup_report(logger)
     
-    # Initialize prediction service
-    success = prediction_service.initialize()
+    # Initialize prediction service in the worker pool
+    get_executor()
+    with timed("initialize prediction service"):
+        success = await prediction_service.ensure_initialized()
     if success:
         logger.info("Prediction service initialized successfully")
     else:
         logger.error("Failed to initialize prediction service")
+    log_startup_report(logger)
+    
+    # Optionally reload the model when its artifact changes on disk
+    watcher = None
+    watch_interval = get_watch_interval()
+    if watch_interval is not None:
+        model_service = prediction_service.model_service
+        watcher = FileWatcher(
+            [path for path in (model_service.model_path, model_service.compiled_path) if path is not None],
+            on_change=prediction_service.reload_model,
+            interval=watch_interval
+        )
+        watcher.start()
+    
+    # With a shared state, follow the model that other workers publish
+    state_watcher = None
+    shared_path = get_shared_state_path()
+    if shared_path is not None:
+        state_watcher = FileWatcher(
+            [shared_path],
+            on_change=prediction_service.refresh_shared_state,
+            interval=watch_interval or DEFAULT_POLL_INTERVAL
+        )
+        state_watcher.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Flight Delay Prediction API...")
+    for running_watcher in (watcher, state_watcher):
+        if running_watcher is not None:
+            running_watcher.stop()
+    shutdown_executor()
+    flush_logging()
 
 # Initialize FastAPI app with lifespan management
 app = FastAPI(
@@ -61,9 +105,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count requests and latency per route; added last so it wraps every other middleware
+app.add_middleware(MetricsMiddleware)
+
+def _model_info_samples():
+    """Model being served, as a constant 1 labelled with its version and type."""
+    info = prediction_service.model_service.get_model_info_summary()
+    if info.get("version") is None:
+        return []
+    return [((info["version"], info.get("modelType")), 1)]
+
+CallbackGauge(
+    "flight_delay_model_info",
+    "Model currently being served (always 1).",
+    ("version", "model_type"),
+    _model_info_samples
+)
+
+# Answer /livez and /readyz before any other middleware or routing
+app.add_middleware(ProbeMiddleware, is_ready=lambda: prediction_service._initialized)
+
 # Include routers
 app.include_router(airports.router)
 app.include_router(predictions.router)
+app.include_router(admin.router)
 
 @app.get("/", response_model=APIInfo)
 async def root():
@@ -77,21 +142,59 @@ async def root():
             "/airports - Get all airports",
             "/airports/{id} - Get airport by ID", 
             "/predict - Predict flight delay",
+            "/predict/batch - Predict flight delays in batch",
+            "/predict/stream - Stream bulk flight delay predictions (NDJSON/CSV)",
             "/predict/status - Get prediction service status",
-            "/health - Health check"
+            "/admin/model/reload - Reload the model without downtime",
+            "/health - Health check (?verbose=1 for service details)",
+            "/livez - Liveness probe",
+            "/readyz - Readiness probe",
+            "/metrics - Prometheus metrics"
         ]
     )
 
+def _health_body(status: str, services: bytes) -> bytes:
+    """Serialize a HealthResponse around already serialized service status."""
+    return (
+        b'{"status":' + dumps(status) + b',"timestamp":' + dumps(datetime.now().isoformat())
+        + b',"services":' + services + b"}"
+    )
+
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint with service status."""
+async def health_check(verbose: bool = False):
+    """
+    Health check endpoint with service status.
+    
+    Args:
+        verbose: Include model, probability table, airport and shared state
+            details (built once per model and airport data version)
+    """
     try:
         # Get service status
         if prediction_service._initialized:
-            service_status = prediction_service.get_service_status()
+            if FAST_SERIALIZATION:
+                # Write the response directly; the verbose details are serialized
+                # once per model and data version, not on every probe
+                if verbose:
+                    services = prediction_service.get_service_status_json()
+                else:
+                    services = dumps({"initialized": True, "readiness": prediction_service.get_readiness()})
+                return Response(content=_health_body("healthy", services), media_type=JSON_MEDIA_TYPE)
+            
+            if verbose:
+                service_status = prediction_service.get_service_status()
+            else:
+                service_status = {
+                    "initialized": True,
+                    "readiness": prediction_service.get_readiness()
+                }
             status = "healthy"
         else:
-            service_status = {"error": "Prediction service not initialized"}
+            # Report the cached readiness state; never re-run initialization here
+            service_status = {
+                "error": "Prediction service not initialized",
+                "readiness": prediction_service.get_readiness()
+            }
             status = "unhealthy"
         
         return HealthResponse(
@@ -106,6 +209,11 @@ async def health_check():
             services={"error": str(e)}
         )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics for this worker process in the text exposition format."""
+    return Response(content=REGISTRY.render(), media_type=EXPOSITION_MEDIA_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Flight Delay Prediction API.
+
+Run from the /server directory, e.g. ``python -m benchmarks.concurrency``.
+"""
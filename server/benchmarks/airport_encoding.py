@@ -0,0 +1,136 @@
+"""
+Airport encoding benchmark: training time and serving latency per encoding.
+
+Trains the raw (notebook), one-hot and target encoded models on the same
+count cube, exports each to the compiled serving artifact, swaps it into the
+prediction service and times single predictions in-process. Serving reads the
+day x airport probability table for every encoding, so p50/p99 should not
+depend on the number of model parameters.
+
+Usage (from the /server directory):
+    python -m benchmarks.airport_encoding                      # synthetic flights
+    python -m benchmarks.airport_encoding --data ../data/flights.csv
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.common import SERVER_DIR
+
+
+def _synthetic_cube(airport_ids: List[int], n_flights: int, seed: int = 0):
+    """Count cube with a per-airport delay rate that does not follow the ID order."""
+    from training.aggregated import DAYS_PER_WEEK, CountCube
+
+    rng = np.random.default_rng(seed)
+    airport_rate = rng.uniform(0.1, 0.35, len(airport_ids))
+    day_rate = np.linspace(-0.03, 0.05, DAYS_PER_WEEK)
+    rate = np.clip(day_rate[:, None] + airport_rate[None, :], 0.01, 0.99)
+    total = rng.multinomial(n_flights, np.full(rate.size, 1 / rate.size)).reshape(rate.shape)
+    return CountCube(np.array(sorted(airport_ids)), rng.binomial(total, rate), total)
+
+
+def _percentiles(samples_ns: List[int]) -> Dict[str, float]:
+    """p50 and p99 in microseconds."""
+    samples = np.array(samples_ns) / 1000
+    return {"p50Us": round(float(np.percentile(samples, 50)), 2), "p99Us": round(float(np.percentile(samples, 99)), 2)}
+
+
+def _log_loss(model, cube) -> float:
+    """Mean log loss of a model over the flights in a cube."""
+    X, y, weights = cube.training_rows()
+    delay_probability = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+    losses = -np.where(y == 1, np.log(delay_probability), np.log(1 - delay_probability))
+    return float(np.average(losses, weights=weights))
+
+
+def benchmark_encoding(cube, encoding: str, repeats: int, requests: int, workdir: Path) -> Dict[str, object]:
+    """Train, export and serve one encoding."""
+    from models.prediction import RELOAD_SWAPPED, prediction_service
+    from training.aggregated import RANDOM_STATE, TEST_SIZE, fit_cube, save_model, train_from_cube
+
+    fit_seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fit_cube(cube, encoding=encoding)
+        fit_seconds.append(time.perf_counter() - start)
+
+    model_data = train_from_cube(cube, model_version=f"benchmark-{encoding}", encoding=encoding)
+    model_path = save_model(model_data, workdir / f"{encoding}.pkl", workdir / f"{encoding}.npz")
+    result = prediction_service.reload_model(str(model_path.with_suffix(".npz")))
+    if result["status"] != RELOAD_SWAPPED:
+        raise RuntimeError(f"Could not serve the {encoding} model: {result}")
+
+    airport_ids = [airport["id"] for airport in prediction_service.airport_service.get_all_airports()]
+    for i in range(min(requests, 1000)):
+        prediction_service.predict_flight_delay((i % 7) + 1, airport_ids[i % len(airport_ids)])
+    samples = []
+    for i in range(requests):
+        start = time.perf_counter_ns()
+        prediction_service.predict_flight_delay((i % 7) + 1, airport_ids[i % len(airport_ids)])
+        samples.append(time.perf_counter_ns() - start)
+
+    # Same split as train_from_cube; precision and recall stay 0 while no cell reaches 50% delays
+    _, test = cube.split(TEST_SIZE, RANDOM_STATE)
+    classifier = model_data["model_object"]
+    log_loss = _log_loss(classifier, test)
+    if hasattr(classifier, "steps"):
+        classifier = classifier.named_steps["classifier"]
+    return {
+        "parameters": int(classifier.coef_.size + classifier.intercept_.size),
+        "fitMs": round(float(np.median(fit_seconds)) * 1000, 1),
+        "accuracy": round(model_data["accuracy"], 4),
+        "precision": round(model_data["precision"], 4),
+        "recall": round(model_data["recall"], 4),
+        "testLogLoss": round(log_loss, 5),
+        "predict": _percentiles(samples),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import logging
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Compare airport encodings: training time and serving latency")
+    parser.add_argument("--data", nargs="*", help="Flights CSV files (default: synthetic counts)")
+    parser.add_argument("--flights", type=int, default=2_700_000, help="Synthetic flights to generate")
+    parser.add_argument("--repeats", type=int, default=5, help="Training runs per encoding")
+    parser.add_argument("--requests", type=int, default=20000, help="Timed predictions per encoding")
+    args = parser.parse_args(argv)
+
+    # Application modules resolve data files relative to the server directory
+    os.chdir(SERVER_DIR)
+    sys.path.insert(0, SERVER_DIR)
+    logging.disable(logging.INFO)
+
+    from models.prediction import prediction_service
+    from training.aggregated import CountCube, count_flights
+    from training.features import ENCODINGS
+
+    if not prediction_service.initialize():
+        raise SystemExit("Prediction service failed to initialize")
+    if args.data:
+        cube = CountCube()
+        for csv_path in args.data:
+            count_flights(csv_path, cube=cube)
+    else:
+        airport_ids = [airport["id"] for airport in prediction_service.airport_service.get_all_airports()]
+        cube = _synthetic_cube(airport_ids, args.flights)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = {
+            encoding: benchmark_encoding(cube, encoding, args.repeats, args.requests, Path(workdir))
+            for encoding in ENCODINGS
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Shared helpers for API benchmarks.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(base_url: str, timeout: float = 30.0) -> float:
+    """
+    Poll /health until the service reports healthy.
+
+    Args:
+        base_url: Server base URL
+        timeout: Maximum seconds to wait
+
+    Returns:
+        Seconds waited
+
+    Raises:
+        TimeoutError: If the server is not healthy in time
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1.0) as response:
+                if json.loads(response.read()).get("status") == "healthy":
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{base_url} did not become healthy within {timeout}s")
+
+
+@contextmanager
+def running_server(
+    extra_args: Sequence[str] = (),
+    env: Optional[Dict[str, str]] = None,
+    module: str = "uvicorn",
+    app: str = "app:app"
+) -> Iterator[str]:
+    """
+    Start an API server process for the duration of the block.
+
+    Args:
+        extra_args: Additional command line arguments for the server
+        env: Extra environment variables
+        module: Python module used to launch the server
+        app: Application import string
+
+    Yields:
+        Base URL of the running server
+    """
+    with running_server_process(extra_args, env, module, app) as (base_url, _):
+        yield base_url
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """
+    CPU time (user + system) a process has used so far, read from /proc.
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        CPU seconds
+    """
+    with open(f"/proc/{pid}/stat") as stat:
+        # The command name may contain spaces; fields after it are space separated
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+@contextmanager
+def running_server_process(
+    extra_args: Sequence[str] = (),
+    env: Optional[Dict[str, str]] = None,
+    module: str = "uvicorn",
+    app: str = "app:app"
+) -> Iterator[Tuple[str, subprocess.Popen]]:
+    """
+    Start an API server process for the duration of the block.
+
+    Args:
+        extra_args: Additional command line arguments for the server
+        env: Extra environment variables
+        module: Python module used to launch the server
+        app: Application import string
+
+    Yields:
+        Tuple of (base URL, server process)
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", module, app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+         *extra_args],
+        cwd=SERVER_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_healthy(base_url)
+        yield base_url, process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Compute a percentile using nearest-rank.
+
+    Args:
+        values: Samples
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value (0.0 for no samples)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """Summarize latencies as count, p50, p95, p99 and max in milliseconds."""
+    return {
+        "count": len(latencies_ms),
+        "p50": round(percentile(latencies_ms, 50), 2),
+        "p95": round(percentile(latencies_ms, 95), 2),
+        "p99": round(percentile(latencies_ms, 99), 2),
+        "max": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+class KeepAliveConnection:
+    """One raw HTTP/1.1 keep-alive connection sending requests one at a time."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, payload: bytes) -> int:
+        """Send a raw request and read the whole response, returning its status code."""
+        self.writer.write(payload)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        await self.reader.readexactly(length)
+        return int(head.split(b" ", 2)[1])
+
+
+async def open_connections(base_url: str, count: int) -> List[KeepAliveConnection]:
+    """
+    Open keep-alive connections to a server.
+
+    Args:
+        base_url: Server base URL
+        count: Number of connections
+
+    Returns:
+        Open connections
+    """
+    host, port = base_url.rsplit("/", 1)[1].split(":")
+    connections = []
+    for _ in range(count):
+        reader, writer = await asyncio.open_connection(host, int(port))
+        connections.append(KeepAliveConnection(reader, writer))
+    return connections
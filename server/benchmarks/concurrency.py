@@ -0,0 +1,115 @@
+"""
+Concurrency benchmark: per-route latency percentiles under many concurrent clients.
+
+Starts the API with uvicorn and runs N concurrent clients issuing a mix of
+single predictions, batch predictions and airport list requests, then prints
+p50/p95/p99 latency per route. Single-prediction tail latency shows whether
+heavier requests (batches) block the event loop.
+
+Usage (from the /server directory):
+    python -m benchmarks.concurrency --clients 200 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import latency_summary, running_server
+
+AIRPORT_IDS = [10397, 12892, 11298, 13930, 11292, 14107, 12478, 10140]
+
+
+async def _client_loop(
+    client: httpx.AsyncClient,
+    deadline: float,
+    batch_ratio: float,
+    batch_size: int,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+    rng: random.Random
+) -> None:
+    """Issue requests until the deadline, recording per-route latency."""
+    batch_body = {
+        "requests": [
+            {"dayOfWeek": (i % 7) + 1, "airportId": AIRPORT_IDS[i % len(AIRPORT_IDS)]}
+            for i in range(batch_size)
+        ]
+    }
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < batch_ratio:
+            route, call = "POST /predict/batch", client.post("/predict/batch", json=batch_body)
+        elif roll < batch_ratio + 0.05:
+            route, call = "GET /airports", client.get("/airports")
+        else:
+            body = {"dayOfWeek": rng.randint(1, 7), "airportId": rng.choice(AIRPORT_IDS)}
+            route, call = "POST /predict", client.post("/predict", json=body)
+
+        start = time.perf_counter()
+        try:
+            response = await call
+            if response.status_code != 200:
+                errors[route] += 1
+        except httpx.HTTPError:
+            errors[route] += 1
+            continue
+        latencies[route].append((time.perf_counter() - start) * 1000)
+
+
+async def run_benchmark(base_url: str, clients: int, duration: float, batch_ratio: float, batch_size: int) -> Dict:
+    """
+    Run the concurrent client workload against a running server.
+
+    Returns:
+        Report with per-route latency summaries, error counts and throughput
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            _client_loop(client, deadline, batch_ratio, batch_size, latencies, errors, random.Random(seed))
+            for seed in range(clients)
+        ))
+
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "clients": clients,
+        "durationSeconds": duration,
+        "requestsPerSecond": round(total / duration, 1),
+        "routes": {route: latency_summary(values) for route, values in sorted(latencies.items())},
+        "errors": dict(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure per-route latency under concurrent load")
+    parser.add_argument("--clients", type=int, default=200, help="Number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Benchmark duration in seconds")
+    parser.add_argument("--batch-ratio", type=float, default=0.1, help="Fraction of requests that are batches")
+    parser.add_argument("--batch-size", type=int, default=500, help="Items per batch request")
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting one")
+    args = parser.parse_args()
+
+    async def run(base_url: str) -> Dict:
+        return await run_benchmark(base_url, args.clients, args.duration, args.batch_ratio, args.batch_size)
+
+    if args.url:
+        report = asyncio.run(run(args.url))
+    else:
+        with running_server() as base_url:
+            report = asyncio.run(run(base_url))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
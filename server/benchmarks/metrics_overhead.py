@@ -0,0 +1,181 @@
+"""
+Metrics overhead benchmark: CPU time per request with metrics on and off.
+
+Two measurements, both interleaving the two modes round by round so drift on
+a shared machine affects them equally:
+
+- server: uvicorn processes with METRICS_ENABLED=0 and 1 serve the same
+  sequential keep-alive requests; the CPU time each server process used is
+  read from /proc, so client work and other processes are not counted.
+- inProcess: requests are sent straight into the ASGI app (no HTTP parsing
+  or sockets), the harshest case since only application work remains. The
+  fastest round of each mode is reported.
+
+Usage (from the /server directory):
+    python -m benchmarks.metrics_overhead --requests 2000 --rounds 6
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import SERVER_DIR, process_cpu_seconds, running_server_process
+
+AIRPORT_IDS = [10397, 12892, 11298, 13930, 11292, 14107, 12478, 10140]
+
+# (method, path, JSON body) requests cycled through by both measurements
+Request = Tuple[str, str, bytes]
+
+
+def _requests() -> Dict[str, List[Request]]:
+    """The /predict and /airports/{id} request mixes that are measured."""
+    return {
+        "predict": [("POST", "/predict", json.dumps({"dayOfWeek": (i % 7) + 1, "airportId": airport_id}).encode())
+                    for i, airport_id in enumerate(AIRPORT_IDS)],
+        "airportById": [("GET", f"/airports/{airport_id}", b"") for airport_id in AIRPORT_IDS],
+    }
+
+
+def _overhead(off_us: float, on_us: float) -> Dict[str, float]:
+    """Summarize an off vs on measurement."""
+    return {
+        "offUs": round(off_us, 2),
+        "onUs": round(on_us, 2),
+        "overheadUs": round(on_us - off_us, 2),
+        "overheadPercent": round((on_us - off_us) / off_us * 100, 2),
+    }
+
+
+def _server_cpu(requests: List[Request], count: int, rounds: int, start_order: Tuple[bool, bool]) -> Dict[bool, float]:
+    """Server CPU seconds per mode for one pair of server processes."""
+    headers = {"content-type": "application/json"}
+    with running_server_process(env={"METRICS_ENABLED": str(int(start_order[0]))}) as first, \
+            running_server_process(env={"METRICS_ENABLED": str(int(start_order[1]))}) as second:
+        servers = dict(zip(start_order, (first, second)))
+        clients = {enabled: httpx.Client(base_url=url) for enabled, (url, _) in servers.items()}
+        cpu = {False: 0.0, True: 0.0}
+        try:
+            for client in clients.values():
+                for method, path, body in requests * 50:
+                    client.request(method, path, content=body or None, headers=headers if body else None)
+            for round_index in range(rounds):
+                for enabled in ((False, True) if round_index % 2 == 0 else (True, False)):
+                    client, pid = clients[enabled], servers[enabled][1].pid
+                    start = process_cpu_seconds(pid)
+                    for i in range(count):
+                        method, path, body = requests[i % len(requests)]
+                        response = client.request(method, path, content=body or None,
+                                                  headers=headers if body else None)
+                        assert response.status_code == 200, response.text
+                    cpu[enabled] += process_cpu_seconds(pid) - start
+        finally:
+            for client in clients.values():
+                client.close()
+    return cpu
+
+
+def benchmark_server(requests: List[Request], count: int, rounds: int) -> Dict[str, float]:
+    """
+    Server process CPU per request over HTTP, metrics on vs off.
+
+    Two pairs of servers are started in opposite order, since two otherwise
+    identical processes can differ by a few percent on their own.
+    """
+    cpu = {False: 0.0, True: 0.0}
+    for start_order in ((False, True), (True, False)):
+        for enabled, seconds in _server_cpu(requests, count, rounds, start_order).items():
+            cpu[enabled] += seconds
+    total = count * rounds * 2
+    return _overhead(cpu[False] / total * 1e6, cpu[True] / total * 1e6)
+
+
+def _scope(method: str, path: str, body: bytes) -> Dict:
+    """Build a minimal HTTP scope as uvicorn would pass it."""
+    headers = [(b"host", b"localhost")]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": headers, "client": ("127.0.0.1", 50000), "server": ("localhost", 8080),
+    }
+
+
+async def _call(app, method: str, path: str, body: bytes = b"") -> int:
+    """Run one request through the app and return its status code."""
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(_scope(method, path, body), receive, send)
+    return status
+
+
+async def _cpu_us_per_request(app, requests: List[Request], count: int) -> float:
+    """CPU microseconds per request over `count` requests."""
+    start = time.process_time()
+    for i in range(count):
+        await _call(app, *requests[i % len(requests)])
+    return (time.process_time() - start) / count * 1e6
+
+
+def benchmark_in_process(requests: List[Request], count: int, rounds: int) -> Dict[str, float]:
+    """CPU per request through the ASGI app in this process, metrics on vs off."""
+    from app import app
+    from models.prediction import prediction_service
+    from utils import metrics
+
+    prediction_service.initialize()
+
+    async def run() -> Dict[bool, List[float]]:
+        for request in requests:
+            assert await _call(app, *request) == 200, request
+        await _cpu_us_per_request(app, requests, min(count, 1000))
+        timings: Dict[bool, List[float]] = {True: [], False: []}
+        for round_index in range(rounds):
+            for enabled in ((False, True) if round_index % 2 == 0 else (True, False)):
+                metrics.ENABLED = enabled
+                timings[enabled].append(await _cpu_us_per_request(app, requests, count))
+        metrics.ENABLED = True
+        return timings
+
+    timings = asyncio.run(run())
+    return _overhead(min(timings[False]), min(timings[True]))
+
+
+def main() -> None:
+    import logging
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Measure per-request CPU spent collecting metrics")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per round and mode")
+    parser.add_argument("--rounds", type=int, default=6, help="Interleaved on/off rounds")
+    parser.add_argument("--skip-server", action="store_true", help="Only run the in-process measurement")
+    args = parser.parse_args()
+
+    # Application modules resolve data files relative to the server directory
+    os.chdir(SERVER_DIR)
+    sys.path.insert(0, SERVER_DIR)
+    logging.disable(logging.INFO)
+
+    report = {}
+    for name, requests in _requests().items():
+        report[name] = {"inProcess": benchmark_in_process(requests, args.requests, args.rounds)}
+        if not args.skip_server:
+            report[name]["server"] = benchmark_server(requests, args.requests, args.rounds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Micro-batching benchmark: live-model /predict throughput with and without coalescing.
+
+Starts two servers with the probability table disabled (PROBABILITY_TABLE=0),
+so every prediction runs the live model: one scoring each request on its own
+(MICROBATCH_MAX_ROWS=1) and one with the default micro-batching settings.
+Each server is driven by many keep-alive connections in two phases:
+
+- saturation: every connection sends its next request as soon as the
+  previous response arrives, measuring the highest throughput.
+- fixed rate: requests arrive at --rate per second (500 by default) whatever
+  the response times, measuring latency at that load.
+
+The client speaks HTTP/1.1 over raw sockets so that it takes as little CPU
+as possible away from the server on small machines. Server CPU per request
+is read from /proc.
+
+Usage (from the /server directory):
+    python -m benchmarks.micro_batching --rate 500 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from benchmarks.common import (
+    KeepAliveConnection, latency_summary, open_connections, process_cpu_seconds, running_server_process
+)
+
+AIRPORT_IDS = [10397, 12892, 11298, 13930, 11292, 14107, 12478, 10140]
+
+
+def _request_bytes(host: str, index: int) -> bytes:
+    """Build a raw keep-alive POST /predict request."""
+    body = json.dumps({"dayOfWeek": (index % 7) + 1, "airportId": AIRPORT_IDS[index % len(AIRPORT_IDS)]}).encode()
+    head = (f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+async def run_saturation(base_url: str, connections: int, duration: float) -> Dict:
+    """
+    Send back-to-back requests on every connection until the deadline.
+
+    Returns:
+        Report with throughput, latency summary and error count
+    """
+    pool = await open_connections(base_url, connections)
+    host = base_url.rsplit("/", 1)[1]
+    payloads = [_request_bytes(host, i) for i in range(56)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def loop(connection: KeepAliveConnection, offset: int) -> None:
+        nonlocal errors
+        index = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if await connection.request(payloads[index % len(payloads)]) != 200:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+            index += 1
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(loop(connection, i) for i, connection in enumerate(pool)))
+    elapsed = time.perf_counter() - started
+    for connection in pool:
+        connection.writer.close()
+
+    return {
+        "requestsPerSecond": round(len(latencies) / elapsed, 1),
+        "latencyMs": latency_summary(latencies),
+        "errors": errors,
+    }
+
+
+async def run_fixed_rate(base_url: str, connections: int, rate: float, duration: float) -> Dict:
+    """
+    Start requests at a fixed rate, each on the next idle connection.
+
+    Requests that find no idle connection wait for one; their latency is
+    measured from their scheduled start, so a server that falls behind shows
+    up as growing latency instead of a lower request rate.
+
+    Returns:
+        Report with offered and achieved rate, latency summary and error count
+    """
+    pool = await open_connections(base_url, connections)
+    idle: asyncio.Queue = asyncio.Queue()
+    for connection in pool:
+        idle.put_nowait(connection)
+    host = base_url.rsplit("/", 1)[1]
+    payloads = [_request_bytes(host, i) for i in range(56)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def send(index: int, scheduled: float) -> None:
+        nonlocal errors
+        connection = await idle.get()
+        try:
+            if await connection.request(payloads[index % len(payloads)]) != 200:
+                errors += 1
+        finally:
+            idle.put_nowait(connection)
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+
+    total = int(rate * duration)
+    started = time.perf_counter()
+    tasks = []
+    for index in range(total):
+        scheduled = started + index / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send(index, scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    for connection in pool:
+        connection.writer.close()
+
+    return {
+        "offeredRate": rate,
+        "achievedRate": round(total / elapsed, 1),
+        "latencyMs": latency_summary(latencies),
+        "errors": errors,
+    }
+
+
+def benchmark_mode(env: Dict[str, str], connections: int, rate: float, duration: float) -> Dict:
+    """Run both phases against one server, reporting server CPU per request."""
+    with running_server_process(env={"PROBABILITY_TABLE": "0", "METRICS_ENABLED": "1", **env}) as (base_url, process):
+        asyncio.run(run_saturation(base_url, connections, min(duration, 2.0)))
+
+        cpu = process_cpu_seconds(process.pid)
+        saturation = asyncio.run(run_saturation(base_url, connections, duration))
+        saturation["serverCpuUsPerRequest"] = round(
+            (process_cpu_seconds(process.pid) - cpu) / max(1, saturation["latencyMs"]["count"]) * 1e6, 1
+        )
+
+        cpu = process_cpu_seconds(process.pid)
+        fixed_rate = asyncio.run(run_fixed_rate(base_url, connections, rate, duration))
+        fixed_rate["serverCpuUsPerRequest"] = round(
+            (process_cpu_seconds(process.pid) - cpu) / max(1, fixed_rate["latencyMs"]["count"]) * 1e6, 1
+        )
+    return {"saturation": saturation, "fixedRate": fixed_rate}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare live-model /predict throughput with and without micro-batching")
+    parser.add_argument("--connections", type=int, default=64, help="Concurrent keep-alive connections")
+    parser.add_argument("--rate", type=float, default=500.0, help="Requests per second in the fixed-rate phase")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase")
+    parser.add_argument("--max-rows", type=int, help="MICROBATCH_MAX_ROWS for the batched server")
+    parser.add_argument("--max-wait-us", type=int, help="MICROBATCH_MAX_WAIT_US for the batched server")
+    args = parser.parse_args()
+
+    batched_env = {}
+    if args.max_rows is not None:
+        batched_env["MICROBATCH_MAX_ROWS"] = str(args.max_rows)
+    if args.max_wait_us is not None:
+        batched_env["MICROBATCH_MAX_WAIT_US"] = str(args.max_wait_us)
+
+    unbatched = benchmark_mode({"MICROBATCH_MAX_ROWS": "1"}, args.connections, args.rate, args.duration)
+    batched = benchmark_mode(batched_env, args.connections, args.rate, args.duration)
+    report = {
+        "unbatched": unbatched,
+        "batched": batched,
+        "throughputGain": round(
+            batched["saturation"]["requestsPerSecond"] / unbatched["saturation"]["requestsPerSecond"], 2
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Pre-fork benchmark: total memory and time-to-ready of the launcher vs uvicorn --workers.
+
+For each worker count, starts the API twice:
+
+- uvicorn: `python -m uvicorn app:app --workers N`, where every worker is a
+  fresh interpreter that imports the application and initializes the
+  prediction service in its lifespan.
+- launcher: `python -m launcher --workers N`, which loads everything once in
+  the master and forks the workers from it.
+
+Time-to-ready is measured from process start until every worker has logged
+"Application startup complete.". Memory is summed over the whole process
+tree from /proc: RSS counts shared pages once per process, PSS splits them
+between the processes sharing them, so PSS is the memory actually used.
+
+Usage (from the /server directory):
+    python -m benchmarks.prefork --workers 1 4 16
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.common import SERVER_DIR, free_port, wait_until_healthy
+
+READY_LINE = "Application startup complete."
+
+
+def _process_tree(root: int) -> List[int]:
+    """The process and all its descendants."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+
+def _tree_memory_kb(root: int) -> Dict[str, int]:
+    """Total RSS and PSS of a process tree in KiB."""
+    totals = {"processes": 0, "rssKb": 0, "pssKb": 0}
+    for pid in _process_tree(root):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    if name == "Rss":
+                        totals["rssKb"] += int(value.split()[0])
+                    elif name == "Pss":
+                        totals["pssKb"] += int(value.split()[0])
+        except OSError:
+            continue
+        totals["processes"] += 1
+    return totals
+
+
+def measure(mode: str, workers: int, timeout: float = 300.0) -> Dict:
+    """
+    Start a server, wait for all its workers and measure its memory.
+
+    Args:
+        mode: "uvicorn" or "launcher"
+        workers: Number of workers
+        timeout: Seconds to wait for the workers
+
+    Returns:
+        Report with time-to-ready and process tree memory
+    """
+    port = free_port()
+    if mode == "launcher":
+        command = [sys.executable, "-m", "launcher"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app:app"]
+    command += ["--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+                "--log-level", "info", "--no-access-log"]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=SERVER_DIR, env={**os.environ}, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    ready = threading.Event()
+
+    def read_log() -> None:
+        seen = 0
+        # Keep draining after the workers are up so the server never blocks on stderr
+        for line in process.stderr:
+            if READY_LINE in line:
+                seen += 1
+                if seen == workers:
+                    ready.set()
+
+    reader = threading.Thread(target=read_log, daemon=True)
+    reader.start()
+    try:
+        if not ready.wait(timeout):
+            raise TimeoutError(f"{mode} did not start {workers} workers within {timeout}s")
+        ready_seconds = time.perf_counter() - started
+        wait_until_healthy(f"http://127.0.0.1:{port}")
+        # Let worker startup settle before reading memory
+        time.sleep(1.0)
+        memory = _tree_memory_kb(process.pid)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        reader.join(timeout=5)
+
+    return {"timeToReadyMs": round(ready_seconds * 1000), **memory}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the pre-fork launcher with uvicorn --workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Worker counts to measure")
+    args = parser.parse_args()
+
+    report = {}
+    for workers in args.workers:
+        uvicorn_report = measure("uvicorn", workers)
+        launcher_report = measure("launcher", workers)
+        report[str(workers)] = {
+            "uvicorn": uvicorn_report,
+            "launcher": launcher_report,
+            "pssSavedKb": uvicorn_report["pssKb"] - launcher_report["pssKb"],
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
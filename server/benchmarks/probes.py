@@ -0,0 +1,162 @@
+"""
+Probe benchmark: cost of /livez, /readyz and /health, and their effect on /predict p99.
+
+Three measurements:
+
+- service: in-process time to build and serialize the detailed status (what
+  every /health call used to do) against serving the cached JSON.
+- probe latency: each probe endpoint requested back to back on one
+  keep-alive connection, with the server CPU it used per request.
+- interference: /predict at a fixed rate (500 requests/s by default), alone
+  and with probes arriving at --probe-rate per second, far more often than
+  an orchestrator would send them. Probes use their own connections. The
+  modes alternate over --rounds rounds and the median p99 is reported.
+
+Usage (from the /server directory):
+    python -m benchmarks.probes --rate 500 --probe-rate 50 --duration 10 --rounds 3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from typing import Dict, List, Sequence
+
+from benchmarks.common import (
+    latency_summary, open_connections, process_cpu_seconds, running_server_process
+)
+from benchmarks.micro_batching import run_fixed_rate
+from utils.json_encoding import dumps
+
+PROBE_PATHS = ["/livez", "/readyz", "/health", "/health?verbose=1"]
+
+
+def _get_bytes(host: str, path: str) -> bytes:
+    """Build a raw keep-alive GET request."""
+    return f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+
+
+def benchmark_service(iterations: int = 2000) -> Dict:
+    """Time building and serializing the detailed service status against serving the cached JSON."""
+    logging.disable(logging.INFO)
+    from models.prediction import prediction_service
+    assert prediction_service.initialize()
+
+    def per_call_us(func) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return round((time.perf_counter() - start) / iterations * 1e6, 1)
+
+    def build_status() -> bytes:
+        status = {"initialized": True, "readiness": prediction_service.get_readiness()}
+        return dumps({**status, **prediction_service._build_status_details()})
+
+    return {
+        "buildStatusUs": per_call_us(build_status),
+        "cachedStatusUs": per_call_us(prediction_service.get_service_status_json),
+    }
+
+
+async def run_probe_latency(base_url: str, path: str, requests: int) -> Dict:
+    """Request one probe back to back and summarize its latency."""
+    (connection,) = await open_connections(base_url, 1)
+    payload = _get_bytes(base_url.rsplit("/", 1)[1], path)
+    latencies: List[float] = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        assert await connection.request(payload) == 200
+        latencies.append((time.perf_counter() - start) * 1000)
+    connection.writer.close()
+    return {"latencyMs": latency_summary(latencies)}
+
+
+async def run_with_probes(base_url: str, connections: int, rate: float, duration: float,
+                          probe_paths: Sequence[str], probe_rate: float) -> Dict:
+    """Run the fixed-rate /predict load while sending probes at probe_rate per second."""
+    probe_latencies: List[float] = []
+
+    async def probe_loop() -> None:
+        pool = await open_connections(base_url, len(probe_paths))
+        host = base_url.rsplit("/", 1)[1]
+        payloads = [_get_bytes(host, path) for path in probe_paths]
+        started = time.perf_counter()
+        index = 0
+        while time.perf_counter() - started < duration:
+            scheduled = started + index / probe_rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = time.perf_counter()
+            await pool[index % len(pool)].request(payloads[index % len(payloads)])
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            index += 1
+        for connection in pool:
+            connection.writer.close()
+
+    tasks = [run_fixed_rate(base_url, connections, rate, duration)]
+    if probe_paths:
+        tasks.append(probe_loop())
+    predict = (await asyncio.gather(*tasks))[0]
+    report = {"predict": predict}
+    if probe_paths:
+        report["probes"] = {"count": len(probe_latencies), "latencyMs": latency_summary(probe_latencies)}
+    return report
+
+
+def _summarize_runs(runs: List[Dict]) -> Dict:
+    """Median /predict and probe latency percentiles over repeated runs."""
+    summary = {
+        "predictP50Ms": statistics.median(run["predict"]["latencyMs"]["p50"] for run in runs),
+        "predictP99Ms": statistics.median(run["predict"]["latencyMs"]["p99"] for run in runs),
+        "predictP99MsPerRun": [run["predict"]["latencyMs"]["p99"] for run in runs],
+        "predictErrors": sum(run["predict"]["errors"] for run in runs),
+    }
+    if "probes" in runs[0]:
+        summary["probeP99Ms"] = statistics.median(run["probes"]["latencyMs"]["p99"] for run in runs)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure probe cost and its effect on /predict latency")
+    parser.add_argument("--connections", type=int, default=64, help="Concurrent /predict connections")
+    parser.add_argument("--rate", type=float, default=500.0, help="/predict requests per second")
+    parser.add_argument("--probe-rate", type=float, default=50.0, help="Probe requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per interference run")
+    parser.add_argument("--rounds", type=int, default=3, help="Interference runs per mode")
+    parser.add_argument("--probe-requests", type=int, default=2000, help="Requests per probe latency run")
+    args = parser.parse_args()
+
+    report = {"service": benchmark_service()}
+    with running_server_process() as (base_url, process):
+        asyncio.run(run_with_probes(base_url, args.connections, args.rate, min(args.duration, 2.0), [], 0))
+
+        report["probeLatency"] = {}
+        for path in PROBE_PATHS:
+            cpu = process_cpu_seconds(process.pid)
+            result = asyncio.run(run_probe_latency(base_url, path, args.probe_requests))
+            result["serverCpuUsPerRequest"] = round(
+                (process_cpu_seconds(process.pid) - cpu) / args.probe_requests * 1e6, 1
+            )
+            report["probeLatency"][path] = result
+
+        modes = {
+            "noProbes": [],
+            "livezReadyz": ["/livez", "/readyz"],
+            "healthVerbose": ["/health?verbose=1"],
+        }
+        # Modes alternate within each round so that drift affects them alike
+        runs: Dict[str, List[Dict]] = {mode: [] for mode in modes}
+        for _ in range(args.rounds):
+            for mode, paths in modes.items():
+                runs[mode].append(asyncio.run(run_with_probes(
+                    base_url, args.connections, args.rate, args.duration, paths, args.probe_rate
+                )))
+        report["interference"] = {mode: _summarize_runs(mode_runs) for mode, mode_runs in runs.items()}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
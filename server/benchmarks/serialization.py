@@ -0,0 +1,116 @@
+"""
+Serialization microbenchmark: CPU time per /predict response.
+
+Compares writing the prediction result directly as JSON bytes with the
+pydantic path (build the response models, let FastAPI validate and
+re-serialize them). Measured in-process with time.process_time(), both for
+the serialization step alone and for full requests through the ASGI app.
+
+Usage (from the /server directory):
+    python -m benchmarks.serialization --iterations 20000
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict
+
+from benchmarks.common import SERVER_DIR
+
+AIRPORT_IDS = [10397, 12892, 11298, 13930, 11292, 14107, 12478, 10140]
+
+
+def _cpu_us_per_call(func: Callable[[int], object], iterations: int) -> float:
+    """Measure CPU microseconds per call, after a short warm-up."""
+    for i in range(min(iterations, 500)):
+        func(i)
+    start = time.process_time()
+    for i in range(iterations):
+        func(i)
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def _compare(fast_us: float, pydantic_us: float) -> Dict[str, float]:
+    """Summarize a fast vs pydantic measurement."""
+    return {
+        "fastUs": round(fast_us, 2),
+        "pydanticUs": round(pydantic_us, 2),
+        "savedUs": round(pydantic_us - fast_us, 2),
+        "speedup": round(pydantic_us / fast_us, 2) if fast_us else 0.0,
+    }
+
+
+def benchmark_serialization(iterations: int) -> Dict[str, float]:
+    """
+    Time only the step from a prediction result to response bytes.
+
+    The pydantic side mirrors what FastAPI does for a response_model:
+    dump the returned model, validate it against the response field, encode
+    it with jsonable_encoder and render it with JSONResponse.
+    """
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from models.prediction import prediction_service
+    from models.schemas import PredictionResponse
+    from routers.predictions import build_prediction_response
+    from utils.json_encoding import dumps
+
+    prediction_service.initialize()
+    results = [prediction_service.predict_flight_delay((i % 7) + 1, airport_id)
+               for i, airport_id in enumerate(AIRPORT_IDS)]
+
+    def fast(i: int) -> bytes:
+        return dumps(results[i % len(results)])
+
+    def pydantic(i: int) -> bytes:
+        model = build_prediction_response(results[i % len(results)])
+        validated = PredictionResponse.model_validate(model.model_dump())
+        return JSONResponse(jsonable_encoder(validated)).body
+
+    assert json.loads(fast(0)) == json.loads(pydantic(0))
+    return _compare(_cpu_us_per_call(fast, iterations), _cpu_us_per_call(pydantic, iterations))
+
+
+def benchmark_endpoint(iterations: int) -> Dict[str, float]:
+    """Time full POST /predict requests through the ASGI app in-process."""
+    from fastapi.testclient import TestClient
+
+    import routers.predictions as predictions_router
+    from app import app
+
+    bodies = [{"dayOfWeek": (i % 7) + 1, "airportId": airport_id} for i, airport_id in enumerate(AIRPORT_IDS)]
+    timings = {}
+    with TestClient(app) as client:
+        for mode in (True, False):
+            predictions_router.FAST_SERIALIZATION = mode
+            timings[mode] = _cpu_us_per_call(
+                lambda i: client.post("/predict", json=bodies[i % len(bodies)]), iterations
+            )
+    return _compare(timings[True], timings[False])
+
+
+def main() -> None:
+    import logging
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Measure per-request CPU saved by direct response serialization")
+    parser.add_argument("--iterations", type=int, default=20000, help="Calls per serialization measurement")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint measurement")
+    args = parser.parse_args()
+
+    # Application modules resolve data files relative to the server directory
+    os.chdir(SERVER_DIR)
+    sys.path.insert(0, SERVER_DIR)
+    logging.disable(logging.INFO)
+
+    report = {
+        "serialization": benchmark_serialization(args.iterations),
+        "endpoint": benchmark_endpoint(args.requests),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Shared state benchmark: per-worker initialization time and memory with and without SHARED_STATE_PATH.
+
+Starts N worker processes at once, as uvicorn/gunicorn do, each importing
+the application and initializing the prediction service. Without a shared
+state every worker loads the model and airports and builds the probability
+table itself; with one, the first worker publishes the state and the
+others map it. Each worker reports its initialization time and its
+resident memory from /proc (RSS, and the private part that is not shared
+with other processes).
+
+Usage (from the /server directory):
+    python -m benchmarks.shared_state --workers 4 --rounds 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from benchmarks.common import SERVER_DIR
+
+# Run in each worker process; prints one JSON line
+_WORKER = """
+import json, logging, time
+logging.disable(logging.INFO)
+import app
+from models.prediction import prediction_service
+start = time.perf_counter()
+assert prediction_service.initialize()
+init_ms = (time.perf_counter() - start) * 1000
+memory = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        name, _, value = line.partition(":")
+        if name in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+            memory[name] = int(value.split()[0])
+status = prediction_service.get_service_status()
+print(json.dumps({
+    "initMs": init_ms,
+    "rssKb": memory["Rss"],
+    "privateKb": memory["Private_Clean"] + memory["Private_Dirty"],
+    "stateId": (status["sharedState"] or {}).get("stateId"),
+}))
+"""
+
+
+def _start_workers(count: int, shared_path: Optional[str]) -> List[Dict]:
+    """Start `count` workers together and collect their reports."""
+    env = {**os.environ}
+    env.pop("SHARED_STATE_PATH", None)
+    if shared_path is not None:
+        env["SHARED_STATE_PATH"] = shared_path
+    processes = [
+        subprocess.Popen([sys.executable, "-c", _WORKER], cwd=SERVER_DIR, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(count)
+    ]
+    reports = []
+    for process in processes:
+        output, _ = process.communicate(timeout=120)
+        if process.returncode != 0:
+            raise RuntimeError(f"Worker exited with status {process.returncode}")
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    return reports
+
+
+def _summarize(rounds: List[List[Dict]]) -> Dict:
+    """Median initialization time and memory per worker over all rounds."""
+    reports = [report for round_reports in rounds for report in round_reports]
+    return {
+        "initMsMedian": round(statistics.median(report["initMs"] for report in reports), 2),
+        "initMsMax": round(max(report["initMs"] for report in reports), 2),
+        "rssKbMedian": statistics.median(report["rssKb"] for report in reports),
+        "privateKbMedian": statistics.median(report["privateKb"] for report in reports),
+        "distinctStates": len({report["stateId"] for report in reports}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure worker startup with and without a shared state")
+    parser.add_argument("--workers", type=int, default=4, help="Workers started together")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as directory:
+        shared_path = os.path.join(directory, "flight-delay.state")
+        modes = {"perWorker": [], "sharedFirstStart": [], "sharedAttach": []}
+        for _ in range(args.rounds):
+            modes["perWorker"].append(_start_workers(args.workers, None))
+            if os.path.exists(shared_path):
+                os.unlink(shared_path)
+            # One worker publishes, the others wait for it and attach
+            modes["sharedFirstStart"].append(_start_workers(args.workers, shared_path))
+            # Restarted workers find the state already published
+            modes["sharedAttach"].append(_start_workers(args.workers, shared_path))
+
+    report = {"workers": args.workers, "rounds": args.rounds}
+    report.update({mode: _summarize(rounds) for mode, rounds in modes.items()})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Pre-fork Production Launcher for Flight Delay Prediction API
+
+Loads the application, model and airport data once in a master process and
+forks the workers from it, so each worker starts ready to serve and shares
+the preloaded memory with the master copy-on-write.
+
+- Garbage collection is disabled while preloading and everything loaded is
+  moved to the permanent generation with gc.freeze(), so collections in the
+  workers never write to (and thereby copy) the shared pages.
+- Workers inherit the listening socket and each run a uvicorn server on it.
+- The worker count defaults to WEB_CONCURRENCY, or the number of CPUs the
+  process may run on.
+- SIGHUP reloads the model in the master and replaces the workers one at a
+  time: each new worker is serving before an old one is stopped, and old
+  workers finish their in-flight requests. Workers that exit unexpectedly
+  are replaced. SIGTERM or SIGINT stop all workers gracefully.
+
+Usage (from the /server directory):
+    python -m launcher --host 0.0.0.0 --port 8080 --workers 4
+"""
+
+import argparse
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("launcher")
+
+# Seconds a new worker may take to start serving
+WORKER_READY_TIMEOUT = 60.0
+
+# Seconds a stopping worker may take to finish in-flight requests
+WORKER_STOP_TIMEOUT = 30.0
+
+# Signals handled by the master's main loop
+_MASTER_SIGNALS = {signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD}
+
+
+def default_worker_count() -> int:
+    """
+    Get the default number of workers.
+
+    Returns:
+        WEB_CONCURRENCY if set to a positive integer, otherwise the number
+        of CPUs this process may run on
+    """
+    value = os.environ.get("WEB_CONCURRENCY")
+    if value:
+        try:
+            if int(value) > 0:
+                return int(value)
+        except ValueError:
+            pass
+        logger.warning(f"Ignoring invalid WEB_CONCURRENCY={value!r}")
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def freeze_heap() -> None:
+    """Collect garbage, then exempt every surviving object from future collections."""
+    gc.unfreeze()
+    gc.collect()
+    gc.freeze()
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """
+    Create the listening socket shared by all workers.
+
+    Args:
+        host: Interface to bind
+        port: TCP port (0 picks a free one)
+        backlog: Listen backlog
+
+    Returns:
+        Bound, listening and inheritable socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _create_server_class():
+    """Define the worker server class (uvicorn is imported after preloading)."""
+    import uvicorn
+
+    class WorkerServer(uvicorn.Server):
+        """uvicorn server that tells the master once it is serving."""
+
+        def __init__(self, config: uvicorn.Config, ready_fd: int):
+            super().__init__(config)
+            self.ready_fd: Optional[int] = ready_fd
+
+        async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+            await super().startup(sockets=sockets)
+            if self.ready_fd is not None:
+                if not self.should_exit:
+                    os.write(self.ready_fd, b"1")
+                os.close(self.ready_fd)
+                self.ready_fd = None
+
+    return WorkerServer
+
+
+class Launcher:
+    """Master process forking preloaded uvicorn workers."""
+
+    def __init__(self, app, sock: socket.socket, workers: int, log_level: str = "info", access_log: bool = True):
+        """
+        Create the launcher.
+
+        Args:
+            app: Preloaded ASGI application
+            sock: Listening socket from bind_socket()
+            workers: Number of workers to keep running
+            log_level: uvicorn log level
+            access_log: Whether workers write uvicorn access logs
+        """
+        import uvicorn
+
+        self.sock = sock
+        self.worker_count = workers
+        self.config = uvicorn.Config(app, lifespan="on", log_level=log_level, access_log=access_log)
+        self.server_class = _create_server_class()
+        # pid -> start time of each running worker
+        self.workers: Dict[int, float] = {}
+        # Workers being stopped on purpose
+        self._retiring: Dict[int, float] = {}
+        self._stopping = False
+
+    def run(self) -> int:
+        """
+        Start the workers and supervise them until SIGTERM or SIGINT.
+
+        Returns:
+            Process exit code
+        """
+        signal.pthread_sigmask(signal.SIG_BLOCK, _MASTER_SIGNALS)
+        host, port = self.sock.getsockname()[:2]
+        started = time.perf_counter()
+        ready = self.spawn_workers(self.worker_count)
+        logger.info(
+            f"Listening on {host}:{port} with {ready}/{self.worker_count} workers ready "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms (master pid {os.getpid()})"
+        )
+        if ready == 0:
+            self.stop()
+            return 1
+
+        while True:
+            info = signal.sigtimedwait(_MASTER_SIGNALS, 1.0)
+            self._reap()
+            if info is None or info.si_signo == signal.SIGCHLD:
+                continue
+            if info.si_signo in (signal.SIGTERM, signal.SIGINT):
+                self.stop()
+                return 0
+            if info.si_signo == signal.SIGHUP:
+                self.rolling_restart()
+
+    def spawn_workers(self, count: int) -> int:
+        """
+        Fork workers and wait until they serve.
+
+        Args:
+            count: Number of workers to start
+
+        Returns:
+            Number of workers that became ready
+        """
+        # Nothing may be mid-write in the log writer when forking
+        from utils.logging_config import flush_logging
+        flush_logging()
+
+        pending: List[Tuple[int, int]] = []
+        for _ in range(count):
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                self._run_worker(write_fd)
+            os.close(write_fd)
+            self.workers[pid] = time.monotonic()
+            pending.append((pid, read_fd))
+
+        ready = 0
+        deadline = time.monotonic() + WORKER_READY_TIMEOUT
+        for pid, read_fd in pending:
+            readable, _, _ = select.select([read_fd], [], [], max(0.0, deadline - time.monotonic()))
+            if readable and os.read(read_fd, 1) == b"1":
+                ready += 1
+            else:
+                logger.error(f"Worker {pid} did not start serving")
+            os.close(read_fd)
+        return ready
+
+    def _run_worker(self, ready_fd: int) -> None:
+        """Serve requests in a forked worker; never returns."""
+        exit_code = 0
+        try:
+            for signum in (signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            # uvicorn shuts down gracefully on these and re-raises them once
+            # done; ignoring the re-raise lets the worker flush its logs
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: None)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, _MASTER_SIGNALS)
+            gc.enable()
+            self.server_class(self.config, ready_fd).run(sockets=[self.sock])
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} failed: {e}")
+            exit_code = 1
+        finally:
+            from utils.logging_config import flush_logging
+            flush_logging()
+            os._exit(exit_code)
+
+    def _reap(self) -> None:
+        """Collect exited workers and replace the ones that were not stopped on purpose."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.workers.pop(pid, None)
+            if self._retiring.pop(pid, None) is not None or self._stopping:
+                continue
+            logger.warning(f"Worker {pid} exited unexpectedly ({_describe_status(status)}), starting a replacement")
+            if self.spawn_workers(1) == 0:
+                # Do not fork in a tight loop while workers cannot start
+                time.sleep(1.0)
+
+    def retire(self, pid: int, timeout: float = WORKER_STOP_TIMEOUT) -> None:
+        """
+        Stop a worker gracefully and wait for it to exit.
+
+        Args:
+            pid: Worker process ID
+            timeout: Seconds to wait before killing it
+        """
+        self._retiring[pid] = time.monotonic()
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + timeout
+        while pid in self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.01)
+        if pid in self.workers:
+            logger.warning(f"Worker {pid} did not stop within {timeout:.0f}s, killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid, None)
+            self._retiring.pop(pid, None)
+
+    def rolling_restart(self) -> bool:
+        """
+        Reload the model in the master, then replace the workers one at a time.
+
+        Returns:
+            True if every worker was replaced
+        """
+        from models.prediction import RELOAD_SWAPPED, prediction_service
+
+        result = prediction_service.reload_model()
+        if result["status"] != RELOAD_SWAPPED:
+            logger.error(f"Rolling restart cancelled, model reload failed: {result.get('error')}")
+            return False
+        freeze_heap()
+
+        old_workers = list(self.workers)
+        logger.info(f"Rolling restart of {len(old_workers)} workers with model {result['newVersion']}")
+        for pid in old_workers:
+            if self.spawn_workers(1) == 0:
+                logger.error("Rolling restart stopped: a replacement worker did not start")
+                return False
+            self.retire(pid)
+        logger.info("Rolling restart complete")
+        return True
+
+    def stop(self) -> None:
+        """Stop all workers gracefully."""
+        self._stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.01)
+        for pid in list(self.workers):
+            logger.warning(f"Worker {pid} did not stop within {WORKER_STOP_TIMEOUT:.0f}s, killing it")
+            os.kill(pid, signal.SIGKILL)
+        self._reap()
+        logger.info("All workers stopped")
+
+
+def _describe_status(status: int) -> str:
+    """Describe a waitpid() status."""
+    if os.WIFSIGNALED(status):
+        return f"signal {os.WTERMSIG(status)}"
+    return f"exit code {os.WEXITSTATUS(status)}"
+
+
+def preload():
+    """
+    Import the application and load the model and airports in this process.
+
+    Returns:
+        The ASGI application, or None if the prediction service failed to
+        initialize
+    """
+    from app import app
+    from models.prediction import prediction_service
+
+    if not prediction_service.initialize(force=True):
+        return None
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with preloaded, pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)), help="Port to bind")
+    parser.add_argument("--workers", type=int, default=default_worker_count(),
+                        help="Number of workers (default: WEB_CONCURRENCY or the CPU count)")
+    parser.add_argument("--log-level", default="info", help="uvicorn log level")
+    parser.add_argument("--no-access-log", action="store_true", help="Disable uvicorn access logs")
+    args = parser.parse_args()
+
+    # Nothing is collected while loading; everything loaded is frozen before forking
+    gc.disable()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    app = preload()
+    if app is None:
+        logger.error("Failed to preload the prediction service")
+        sys.exit(1)
+    freeze_heap()
+
+    sock = bind_socket(args.host, args.port)
+    launcher = Launcher(app, sock, max(1, args.workers), log_level=args.log_level,
+                        access_log=not args.no_access_log)
+    sys.exit(launcher.run())
+
+
+if __name__ == "__main__":
+    main()
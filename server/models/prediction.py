@@ -4,13 +4,90 @@ Flight Delay Prediction Logic
 Combines model and airport services to provide complete prediction functionality.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Tuple
-from services.model_service import model_service
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, List, Sequence, Tuple, Optional
+
+import numpy as np
+
+from services.model_service import ModelSnapshot, compiled_model_arrays, model_service
 from services.airport_service import airport_service
+from services.micro_batcher import MicroBatcher
+from services.probability_table import ProbabilityTable, probability_table_enabled
+from services.shared_state import (
+    SharedState,
+    StateContents,
+    get_shared_state_path,
+    publish_or_attach,
+    read_state_id,
+    source_signatures
+)
+from utils import metrics
+from utils.arrays import as_int64_array
+from utils.executor import get_executor
+from utils.json_encoding import dumps
+from utils.logging_config import log_sampled
+from utils.metrics import CACHE_REQUESTS, PREDICTION_STAGE_SECONDS, stage_timer
+from utils.result_cache import ResultCache, get_cache_settings
+from utils.startup import timed
 
 logger = logging.getLogger(__name__)
 
+DAY_OF_WEEK_ERROR = "dayOfWeek must be an integer between 1 and 7 (1=Monday, 7=Sunday)"
+
+# Per-row status codes returned by PredictionService.score_rows()
+ROW_OK = 0
+ROW_INVALID_DAY = 1
+ROW_UNKNOWN_AIRPORT = 2
+ROW_NO_MODEL_MAPPING = 3
+
+
+def row_error_message(code: int, airport_id: int) -> str:
+    """
+    Get the error message for a non-OK row status code.
+    
+    Args:
+        code: Row status code from score_rows()
+        airport_id: Airport ID of the row
+        
+    Returns:
+        Human readable error message
+    """
+    if code == ROW_INVALID_DAY:
+        return DAY_OF_WEEK_ERROR
+    if code == ROW_UNKNOWN_AIRPORT:
+        return f"Airport with ID {airport_id} not found in dataset"
+    return f"No model mapping found for airport ID {airport_id}"
+
+# Stages of predict_flight_delay() timed into the stage latency histogram
+STAGE_VALIDATION = PREDICTION_STAGE_SECONDS.labels("validation")
+STAGE_AIRPORT_LOOKUP = PREDICTION_STAGE_SECONDS.labels("airport_lookup")
+STAGE_MODEL_ID_MAPPING = PREDICTION_STAGE_SECONDS.labels("model_id_mapping")
+STAGE_INFERENCE = PREDICTION_STAGE_SECONDS.labels("inference")
+STAGE_RESULT = PREDICTION_STAGE_SECONDS.labels("result")
+TABLE_HITS = CACHE_REQUESTS.labels("probability_table", "hit")
+TABLE_MISSES = CACHE_REQUESTS.labels("probability_table", "miss")
+RESULT_CACHE_NAME = "prediction_result"
+STATUS_CACHE_NAME = "service_status"
+
+# Initialization states reported by PredictionService.get_readiness()
+STATE_NOT_STARTED = "not_started"
+STATE_INITIALIZING = "initializing"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+# Retry backoff after a failed initialization (doubles per consecutive failure)
+INIT_RETRY_BASE_SECONDS = 1.0
+INIT_RETRY_MAX_SECONDS = 60.0
+
+# Model reload outcomes reported by PredictionService.reload_model()
+RELOAD_SWAPPED = "success"
+RELOAD_REJECTED = "error"
+RELOAD_IN_PROGRESS = "in_progress"
+
 class PredictionService:
     """Service that orchestrates model and airport data for predictions."""
     
@@ -19,36 +96,245 @@ class PredictionService:
         self.model_service = model_service
         self.airport_service = airport_service
         self._initialized = False
+        # Single-flight initialization state
+        self._init_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._init_future: Optional[Future] = None
+        self._init_state = STATE_NOT_STARTED
+        self._init_failures = 0
+        self._last_init_error: Optional[str] = None
+        self._retry_at = 0.0
+        # Only one model reload runs at a time; predictions never take this lock
+        self._reload_lock = threading.Lock()
+        # State mapped from SHARED_STATE_PATH, when workers share one
+        self._shared_state: Optional[SharedState] = None
+        # Coalesces concurrent live model calls from predict_flight_delay_async()
+        self.micro_batcher = MicroBatcher(self.model_service)
+        # Enriched single-prediction results by (dayOfWeek, airportId), valid
+        # for one model snapshot and one version of the airport data
+        self.result_cache = ResultCache(RESULT_CACHE_NAME, *get_cache_settings())
+        # Status details for /health?verbose=1, as a dict and as JSON, rebuilt
+        # only when the model, airport data or shared state changes
+        self.status_cache = ResultCache(STATUS_CACHE_NAME, max_entries=2)
     
-    def initialize(self) -> bool:
+    @property
+    def probability_table(self) -> Optional[ProbabilityTable]:
+        """Probability table of the model snapshot currently being served."""
+        snapshot = self.model_service.snapshot
+        return snapshot.table if snapshot is not None else None
+    
+    @probability_table.setter
+    def probability_table(self, table: Optional[ProbabilityTable]) -> None:
+        snapshot = self.model_service.snapshot
+        if snapshot is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        self.model_service.swap(snapshot.with_table(table))
+    
+    def initialize(self, force: bool = False) -> bool:
         """
         Initialize both model and airport services.
         
+        Only one initialization runs at a time; concurrent callers wait for
+        it and share its result. After a failure, calls return False without
+        reloading anything until the retry backoff expires.
+        
+        Args:
+            force: Retry immediately even while a failure backoff is active
+            
         Returns:
             True if both services loaded successfully
         """
+        with self._init_lock:
+            if self._initialized:
+                return True
+            if not force and self._in_backoff():
+                return False
+            
+            self._init_state = STATE_INITIALIZING
+            error = self._load_services()
+            
+            with self._state_lock:
+                if error is None:
+                    self._initialized = True
+                    self._init_state = STATE_READY
+                    self._init_failures = 0
+                    self._last_init_error = None
+                    logger.info("Prediction service initialized successfully")
+                    return True
+                
+                self._init_state = STATE_FAILED
+                self._init_failures += 1
+                self._last_init_error = error
+                backoff = min(INIT_RETRY_MAX_SECONDS, INIT_RETRY_BASE_SECONDS * 2 ** (self._init_failures - 1))
+                self._retry_at = time.monotonic() + backoff
+                logger.error(f"{error}; retrying initialization in {backoff:.0f}s")
+                return False
+    
+    async def ensure_initialized(self) -> bool:
+        """
+        Initialize the service from async code without blocking the event loop.
+        
+        The first caller starts initialization in the worker pool; concurrent
+        callers await the same result instead of starting their own.
+        
+        Returns:
+            True if the service is initialized
+        """
+        if self._initialized:
+            return True
+        
+        with self._state_lock:
+            future = self._init_future
+            if future is None or future.done():
+                if self._in_backoff():
+                    return False
+                future = self._init_future = get_executor().submit(self.initialize)
+        return await asyncio.wrap_future(future)
+    
+    def _in_backoff(self) -> bool:
+        """Whether a previous failure is still within its retry backoff."""
+        return self._init_state == STATE_FAILED and time.monotonic() < self._retry_at
+    
+    def _load_services(self) -> Optional[str]:
+        """
+        Load the model and airport data and build the probability table.
+        
+        Returns:
+            None on success, otherwise an error message
+        """
         try:
             logger.info("Initializing prediction service...")
             
+            # Attach to the state published for all workers, building it first
+            # if this is the first worker
+            shared_path = get_shared_state_path()
+            if shared_path is not None:
+                with timed("attach shared state"):
+                    self._attach_shared_state(
+                        publish_or_attach(shared_path, self._build_shared_state, is_current=self._is_current_state)
+                    )
+                return None
+            
             # Load model
-            model_loaded = self.model_service.load_model()
+            with timed("load model"):
+                model_loaded = self.model_service.load_model()
             if not model_loaded:
-                logger.error("Failed to load model")
-                return False
+                return "Failed to load model"
             
             # Load airports
-            airports_loaded = self.airport_service.load_airports()
+            with timed("load airports"):
+                airports_loaded = self.airport_service.load_airports()
             if not airports_loaded:
-                logger.error("Failed to load airports")
-                return False
+                return "Failed to load airports"
             
-            self._initialized = True
-            logger.info("Prediction service initialized successfully")
-            return True
+            # Precompute day x airport probabilities for table lookups
+            with timed("build probability table"):
+                self.probability_table = self._build_probability_table()
+            
+            return None
             
         except Exception as e:
-            logger.error(f"Failed to initialize prediction service: {e}")
+            return f"Failed to initialize prediction service: {e}"
+    
+    def _state_sources(self) -> Dict[str, Optional[list]]:
+        """Fingerprints of the files a shared state is built from."""
+        return source_signatures([
+            self.model_service.model_path, self.model_service.compiled_path, self.airport_service.airports_path
+        ])
+    
+    def _is_current_state(self, state: SharedState) -> bool:
+        """Whether a published state was built from the model and airport files on disk."""
+        return state.metadata.get("sources") == self._state_sources()
+    
+    def _build_shared_state(self) -> StateContents:
+        """Load the model and airports and build the state shared by all workers."""
+        snapshot = self.model_service.load_snapshot()
+        if not self.airport_service.load_airports():
+            raise RuntimeError("Failed to load airports")
+        with timed("build probability table"):
+            snapshot = snapshot.with_table(self._build_probability_table(snapshot))
+        return self._shared_state_contents(snapshot)
+    
+    def _shared_state_contents(self, snapshot: ModelSnapshot) -> StateContents:
+        """
+        Collect a model snapshot and the loaded airports as shareable arrays.
+        
+        Args:
+            snapshot: Model snapshot, with its probability table if it has one
+            
+        Returns:
+            Tuple of (arrays, metadata) to publish
+        """
+        kind, model_arrays = compiled_model_arrays(snapshot.model_object, snapshot.model_data)
+        airport_arrays, airport_metadata = self.airport_service.export_arrays()
+        arrays = {f"model.{name}": array for name, array in model_arrays.items()}
+        arrays.update({f"airports.{name}": array for name, array in airport_arrays.items()})
+        if snapshot.table is not None:
+            arrays.update({
+                "table.airport_ids": snapshot.table.airport_ids,
+                "table.probabilities": snapshot.table.probabilities,
+                "table.is_delayed": snapshot.table.is_delayed
+            })
+        metadata = {
+            "modelKind": kind,
+            "model": snapshot.metadata,
+            "airports": airport_metadata,
+            "sources": self._state_sources()
+        }
+        return arrays, metadata
+    
+    def _attach_shared_state(self, state: SharedState) -> None:
+        """Serve the model, probability table and airports of a shared state."""
+        self.airport_service.load_from_arrays(state.group("airports."), state.metadata["airports"])
+        table_arrays = state.group("table.")
+        table = ProbabilityTable(
+            table_arrays["airport_ids"], table_arrays["probabilities"], table_arrays["is_delayed"]
+        ) if table_arrays else None
+        self.model_service.swap(self.model_service.snapshot_from_arrays(
+            state.metadata["modelKind"], state.group("model."), state.metadata["model"], state.path, table
+        ))
+        self._shared_state = state
+    
+    def refresh_shared_state(self) -> bool:
+        """
+        Switch to the shared state if another worker published a new one.
+        
+        Returns:
+            True if a different state was attached
+        """
+        shared_path = get_shared_state_path()
+        if shared_path is None or not self._initialized:
             return False
+        
+        with self._reload_lock:
+            state_id = read_state_id(shared_path)
+            if state_id is None or (self._shared_state is not None and state_id == self._shared_state.state_id):
+                return False
+            try:
+                self._attach_shared_state(SharedState.attach(shared_path))
+            except Exception as e:
+                logger.error(f"Failed to attach shared state {shared_path}: {e}")
+                return False
+            logger.info(f"Attached to shared state {self._shared_state.state_id} published by another worker")
+            return True
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """
+        Get the initialization state without running anything expensive.
+        
+        Returns:
+            Dictionary with state, ready flag, failure count, last error and
+            seconds until the next retry is allowed
+        """
+        with self._state_lock:
+            retry_in = max(0.0, self._retry_at - time.monotonic()) if self._init_state == STATE_FAILED else None
+            return {
+                "state": self._init_state,
+                "ready": self._initialized,
+                "failures": self._init_failures,
+                "lastError": self._last_init_error,
+                "retryInSeconds": round(retry_in, 1) if retry_in is not None else None
+            }
     
     def predict_flight_delay(self, day_of_week: int, airport_id: int) -> Dict[str, Any]:
         """
@@ -65,80 +351,496 @@ class PredictionService:
             raise RuntimeError("Prediction service not initialized. Call initialize() first.")
         
         try:
-            # Validate inputs
-            valid, error_msg = self._validate_prediction_inputs(day_of_week, airport_id)
-            if not valid:
-                return {
-                    "status": "error",
-                    "error": error_msg,
-                    "input": {
-                        "dayOfWeek": day_of_week,
-                        "airportId": airport_id
-                    }
-                }
+            # Read the served snapshot once so a concurrent reload cannot mix
+            # two models; cached results are only valid for the same model
+            # and airport data
+            snapshot = self.model_service.snapshot
+            cache_version = (snapshot, self.airport_service.data_version)
+            cached = self.result_cache.get((day_of_week, airport_id), cache_version)
+            if cached is not None:
+                return cached
             
-            # Get airport information
-            airport_info = self.airport_service.get_airport_by_id(airport_id)
-            if not airport_info:
-                return {
-                    "status": "error",
-                    "error": f"Airport with ID {airport_id} not found",
-                    "input": {
-                        "dayOfWeek": day_of_week,
-                        "airportId": airport_id
-                    }
-                }
-            
-            # Get model airport ID (encoded ID used by the model)
-            model_airport_id = self.airport_service.get_model_airport_id(airport_id)
-            if model_airport_id is None:
-                return {
-                    "status": "error",
-                    "error": f"No model mapping found for airport ID {airport_id}",
-                    "input": {
-                        "dayOfWeek": day_of_week,
-                        "airportId": airport_id
-                    }
-                }
+            timer = stage_timer()
+            airport, error = self._resolve_prediction_input(day_of_week, airport_id, timer)
+            if error is not None:
+                return error
             
             # Make prediction using model airport ID
-            prediction_result = self.model_service.predict_delay(day_of_week, model_airport_id)
+            cell = self._lookup_table(day_of_week, airport.model_id, snapshot)
+            if metrics.ENABLED:
+                (TABLE_HITS if cell is not None else TABLE_MISSES).inc()
+            if cell is None:
+                live = self.model_service.predict_delay(day_of_week, airport.model_id, snapshot=snapshot)["prediction"]
+                cell = (live["noDelayProbability"], live["delayProbability"], live["isDelayed"])
+            timer.mark(STAGE_INFERENCE)
             
-            # Enhance result with airport information
-            enhanced_result = {
-                "status": "success",
+            result = self._build_prediction_result(day_of_week, airport_id, airport, cell, snapshot, timer)
+            self.result_cache.put((day_of_week, airport_id), result, cache_version)
+            return result
+            
+        except Exception as e:
+            return self._prediction_error(day_of_week, airport_id, e)
+    
+    async def predict_flight_delay_async(self, day_of_week: int, airport_id: int) -> Dict[str, Any]:
+        """
+        Predict flight delay probability from the event loop.
+        
+        Table hits are answered inline. Live model inference goes through the
+        micro-batcher, which scores concurrent requests together in the
+        worker pool.
+        
+        Args:
+            day_of_week: Day of week (1=Monday, 7=Sunday)
+            airport_id: Real airport ID from the airports dataset
+            
+        Returns:
+            Same result as predict_flight_delay()
+        """
+        if not self._initialized:
+            raise RuntimeError("Prediction service not initialized. Call initialize() first.")
+        
+        try:
+            snapshot = self.model_service.snapshot
+            cache_version = (snapshot, self.airport_service.data_version)
+            cached = self.result_cache.get((day_of_week, airport_id), cache_version)
+            if cached is not None:
+                return cached
+            
+            timer = stage_timer()
+            airport, error = self._resolve_prediction_input(day_of_week, airport_id, timer)
+            if error is not None:
+                return error
+            
+            cell = self._lookup_table(day_of_week, airport.model_id, snapshot)
+            if metrics.ENABLED:
+                (TABLE_HITS if cell is not None else TABLE_MISSES).inc()
+            if cell is None:
+                cell = await self.micro_batcher.predict(day_of_week, airport.model_id, snapshot)
+            timer.mark(STAGE_INFERENCE)
+            
+            result = self._build_prediction_result(day_of_week, airport_id, airport, cell, snapshot, timer)
+            # A reload while this request waited must not drop the new model's entries
+            if snapshot is self.model_service.snapshot:
+                self.result_cache.put((day_of_week, airport_id), result, cache_version)
+            return result
+            
+        except Exception as e:
+            return self._prediction_error(day_of_week, airport_id, e)
+    
+    def _resolve_prediction_input(self, day_of_week: int, airport_id: int, timer) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Validate a single prediction request and find its airport.
+        
+        Args:
+            day_of_week: Day of week (1=Monday, 7=Sunday)
+            airport_id: Real airport ID from the airports dataset
+            timer: Stage timer of the request
+            
+        Returns:
+            Tuple of (airport record, None), or (None, error result) if the
+            input is invalid or the airport cannot be scored
+        """
+        # Validate inputs
+        valid, error_msg = self._validate_prediction_inputs(day_of_week, airport_id)
+        timer.mark(STAGE_VALIDATION)
+        if not valid:
+            return None, self._input_error(day_of_week, airport_id, error_msg)
+        
+        # Get airport information (single index lookup for record and model ID)
+        airport = self.airport_service.get_airport_record(airport_id)
+        timer.mark(STAGE_AIRPORT_LOOKUP)
+        if airport is None:
+            return None, self._input_error(day_of_week, airport_id, f"Airport with ID {airport_id} not found")
+        
+        # Get model airport ID (encoded ID used by the model)
+        timer.mark(STAGE_MODEL_ID_MAPPING)
+        if airport.model_id is None:
+            return None, self._input_error(
+                day_of_week, airport_id, f"No model mapping found for airport ID {airport_id}"
+            )
+        
+        return airport, None
+    
+    def _build_prediction_result(self, day_of_week: int, airport_id: int, airport,
+                                 cell: Tuple[float, float, bool], snapshot: ModelSnapshot, timer) -> Dict[str, Any]:
+        """
+        Build a successful result in the PredictionResponse schema so it can
+        be serialized directly.
+        
+        Args:
+            day_of_week: Day of week (1=Monday, 7=Sunday)
+            airport_id: Real airport ID from the airports dataset
+            airport: Airport record
+            cell: Tuple of (no_delay_probability, delay_probability, is_delayed)
+            snapshot: Model snapshot that produced the prediction
+            timer: Stage timer of the request
+            
+        Returns:
+            Complete prediction result
+        """
+        no_delay_prob, delay_prob, is_delayed = cell
+        enhanced_result = {
+            "status": "success",
+            "input": {
+                "dayOfWeek": day_of_week,
+                "airportId": airport_id,
+                "airport": {
+                    "id": airport.id,
+                    "name": airport.name,
+                    "code": airport.code,
+                    "city": airport.city,
+                    "state": airport.state
+                }
+            },
+            "prediction": {
+                "delayProbability": delay_prob,
+                "isDelayed": is_delayed,
+                "noDelayProbability": no_delay_prob
+            },
+            "confidence": max(no_delay_prob, delay_prob),
+            "modelInfo": self.model_service.get_model_info_summary(snapshot)
+        }
+        timer.mark(STAGE_RESULT)
+        
+        logger.debug("Prediction completed for %s on day %d", airport.name, day_of_week)
+        return enhanced_result
+    
+    def _input_error(self, day_of_week: int, airport_id: int, error: str) -> Dict[str, Any]:
+        """Build the error result for a single prediction."""
+        return {
+            "status": "error",
+            "error": error,
+            "input": {
+                "dayOfWeek": day_of_week,
+                "airportId": airport_id
+            }
+        }
+    
+    def _prediction_error(self, day_of_week: int, airport_id: int, error: Exception) -> Dict[str, Any]:
+        """Log and build the error result for an unexpected prediction failure."""
+        logger.error("Prediction failed: %s", error)
+        return self._input_error(day_of_week, airport_id, f"Internal prediction error: {str(error)}")
+    
+    def predict_batch(self, days_of_week: Sequence[int], airport_ids: Sequence[int]) -> Dict[str, Any]:
+        """
+        Predict flight delay probabilities for many (day, airport) pairs at once.
+        
+        Inputs are validated together, airport IDs are resolved with one
+        vectorized lookup and all valid rows are scored with a single table
+        gather (or one model call when no table is available). Invalid rows
+        produce per-item errors without failing the rest of the batch.
+        
+        Args:
+            days_of_week: Days of week (1=Monday, 7=Sunday)
+            airport_ids: Real airport IDs, same length as days_of_week
+            
+        Returns:
+            Batch result with per-item results in input order and model info
+        """
+        if not self._initialized:
+            raise RuntimeError("Prediction service not initialized. Call initialize() first.")
+        
+        if len(days_of_week) != len(airport_ids):
+            raise ValueError("days_of_week and airport_ids must have the same length")
+        
+        # Out-of-range days become 0, which fails the day check below
+        days, _ = as_int64_array(days_of_week)
+        records, model_ids = self.airport_service.lookup_airports(airport_ids)
+        
+        valid_days = (days >= 1) & (days <= 7)
+        valid = valid_days & (model_ids >= 0)
+        
+        snapshot = self.model_service.snapshot
+        probabilities, is_delayed = self._score_batch(days[valid], model_ids[valid], snapshot)
+        
+        results: List[Dict[str, Any]] = []
+        scored = iter(zip(probabilities.tolist(), is_delayed.tolist()))
+        for index, (day, airport_id, record, day_ok, row_ok) in enumerate(
+            zip(list(days_of_week), list(airport_ids), records, valid_days.tolist(), valid.tolist())
+        ):
+            item: Dict[str, Any] = {
+                "index": index,
                 "input": {
-                    "dayOfWeek": day_of_week,
-                    "airportId": airport_id,
-                    "airport": {
-                        "name": airport_info["name"],
-                        "code": airport_info["code"],
-                        "city": airport_info["city"],
-                        "state": airport_info["state"]
-                    }
+                    "dayOfWeek": day,
+                    "airportId": airport_id
+                }
+            }
+            if not row_ok:
+                if not day_ok:
+                    code = ROW_INVALID_DAY
+                elif record is None:
+                    code = ROW_UNKNOWN_AIRPORT
+                else:
+                    code = ROW_NO_MODEL_MAPPING
+                error = row_error_message(code, airport_id)
+                item.update(status="error", error=error)
+                results.append(item)
+                continue
+            
+            (no_delay_prob, delay_prob), delayed = next(scored)
+            item.update(
+                status="success",
+                airport={
+                    "id": record.id,
+                    "name": record.name,
+                    "code": record.code,
+                    "city": record.city,
+                    "state": record.state
                 },
-                "prediction": {
-                    "delayProbability": prediction_result["prediction"]["delayProbability"],
-                    "isDelayed": prediction_result["prediction"]["isDelayed"],
-                    "noDelayProbability": prediction_result["prediction"]["noDelayProbability"]
+                prediction={
+                    "delayProbability": delay_prob,
+                    "isDelayed": delayed,
+                    "noDelayProbability": no_delay_prob
                 },
-                "confidence": prediction_result["confidence"],
-                "modelInfo": prediction_result["modelInfo"]
-            }
+                confidence=max(no_delay_prob, delay_prob)
+            )
+            results.append(item)
+        
+        succeeded = int(valid.sum())
+        if log_sampled("/predict/batch"):
+            logger.info("Batch prediction completed: %d/%d succeeded", succeeded, len(results),
+                        extra={"route": "/predict/batch", "succeeded": succeeded, "total": len(results)})
+        return {
+            "status": "success",
+            "results": results,
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "modelInfo": self.model_service.get_model_info_summary(snapshot)
+        }
+    
+    def score_rows(self, days_of_week: np.ndarray, airport_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score many rows into arrays, without building per-row dictionaries.
+        
+        Used for bulk scoring where results are serialized directly.
+        
+        Args:
+            days_of_week: Array of days of week (1=Monday, 7=Sunday)
+            airport_ids: Array of real airport IDs, same length as days_of_week
             
-            logger.info(f"Prediction completed for {airport_info['name']} on day {day_of_week}")
-            return enhanced_result
+        Returns:
+            Tuple of (probabilities with shape (n, 2), is_delayed with shape (n,),
+            status codes with shape (n,)); rows with a non-OK status are zero
+        """
+        if not self._initialized:
+            raise RuntimeError("Prediction service not initialized. Call initialize() first.")
+        
+        days = np.asarray(days_of_week, dtype=np.int64)
+        found, model_ids = self.airport_service.resolve_model_ids(airport_ids)
+        
+        status = np.full(len(days), ROW_OK, dtype=np.int8)
+        status[found & (model_ids < 0)] = ROW_NO_MODEL_MAPPING
+        status[~found] = ROW_UNKNOWN_AIRPORT
+        status[(days < 1) | (days > 7)] = ROW_INVALID_DAY
+        valid = status == ROW_OK
+        
+        probabilities = np.zeros((len(days), 2), dtype=np.float64)
+        is_delayed = np.zeros(len(days), dtype=bool)
+        probabilities[valid], is_delayed[valid] = self._score_batch(
+            days[valid], model_ids[valid], self.model_service.snapshot
+        )
+        return probabilities, is_delayed, status
+    
+    def _score_batch(self, days: np.ndarray, model_ids: np.ndarray,
+                     snapshot: ModelSnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score validated rows, using the probability table where possible.
+        
+        Args:
+            days: Valid days of week
+            model_ids: Model airport IDs for each row
+            snapshot: Model snapshot to score with
             
+        Returns:
+            Tuple of (probabilities with shape (n, 2), is_delayed with shape (n,))
+        """
+        if len(days) == 0:
+            return np.zeros((0, 2)), np.zeros(0, dtype=bool)
+        
+        if snapshot.table is None:
+            probabilities, predictions = self.model_service.predict_proba_batch(days, model_ids, snapshot=snapshot)
+            return probabilities, predictions == 1
+        
+        probabilities, is_delayed, found = snapshot.table.gather(days, model_ids)
+        if not found.all():
+            # Fall back to one live model call for rows outside the table
+            missing = ~found
+            live_probabilities, live_predictions = self.model_service.predict_proba_batch(
+                days[missing], model_ids[missing], snapshot=snapshot
+            )
+            probabilities[missing] = live_probabilities
+            is_delayed[missing] = live_predictions == 1
+        return probabilities, is_delayed
+    
+    def _build_probability_table(self, snapshot: Optional[ModelSnapshot] = None) -> Optional[ProbabilityTable]:
+        """
+        Build and verify the day x airport probability table.
+        
+        Args:
+            snapshot: Model snapshot to build the table for (defaults to the
+                one being served)
+            
+        Returns:
+            ProbabilityTable, or None if it could not be built or does not
+            match the model (predictions then fall back to live evaluation),
+            or None if PROBABILITY_TABLE is off
+        """
+        if not probability_table_enabled():
+            logger.info("Probability table disabled, serving predictions from the live model")
+            return None
+        
+        try:
+            table = ProbabilityTable.build(
+                self.model_service,
+                self.airport_service.get_model_airport_ids(),
+                snapshot=snapshot
+            )
         except Exception as e:
-            logger.error(f"Prediction failed: {e}")
-            return {
-                "status": "error",
-                "error": f"Internal prediction error: {str(e)}",
-                "input": {
-                    "dayOfWeek": day_of_week,
-                    "airportId": airport_id
+            logger.error(f"Failed to build probability table, using live model: {e}")
+            return None
+        
+        if not table.verify(self.model_service, snapshot=snapshot):
+            logger.error("Probability table does not match model output, using live model")
+            return None
+        
+        return table
+    
+    def _lookup_table(self, day_of_week: int, model_airport_id: int,
+                      snapshot: ModelSnapshot) -> Optional[Tuple[float, float, bool]]:
+        """
+        Look up a prediction in the precomputed probability table.
+        
+        Args:
+            day_of_week: Day of week (1=Monday, 7=Sunday)
+            model_airport_id: Model airport ID
+            snapshot: Model snapshot whose table to use
+            
+        Returns:
+            Tuple of (no_delay_probability, delay_probability, is_delayed), or
+            None if there is no table or the input is outside it
+        """
+        if snapshot.table is None:
+            return None
+        
+        return snapshot.table.lookup(day_of_week, model_airport_id)
+    
+    def reload_model(self, model_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Load a new model artifact and swap it in without interrupting predictions.
+        
+        The new model is loaded, validated and its probability table built
+        and verified while the current model keeps serving. Only then is the
+        served snapshot replaced in a single reference assignment, so requests
+        already running finish on the model they started with.
+        
+        Args:
+            model_path: Pickle (.pkl) or compiled (.npz) model to load; defaults
+                to the configured model paths
+            
+        Returns:
+            Reload report with status, previous and new model versions, load
+            time and parity against the previous model
+        """
+        if not self._initialized:
+            raise RuntimeError("Prediction service not initialized. Call initialize() first.")
+        
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": RELOAD_IN_PROGRESS, "error": "A model reload is already in progress"}
+        
+        try:
+            previous = self.model_service.snapshot
+            start = time.perf_counter()
+            try:
+                candidate = self.model_service.load_snapshot(model_path)
+                self._validate_model(candidate)
+            except Exception as e:
+                logger.error(f"Model reload rejected: {e}")
+                return {
+                    "status": RELOAD_REJECTED,
+                    "error": f"Failed to load model: {e}",
+                    "previousVersion": dict(previous.model_info)
                 }
+            
+            candidate = candidate.with_table(self._build_probability_table(candidate))
+            load_time_ms = (time.perf_counter() - start) * 1000
+            parity = self._compare_models(previous, candidate)
+            
+            shared_path = get_shared_state_path()
+            if shared_path is not None:
+                # Publish for the other workers, which attach when they see the file change
+                self._attach_shared_state(publish_or_attach(
+                    shared_path, lambda: self._shared_state_contents(candidate), republish=True
+                ))
+            else:
+                self.model_service.swap(candidate)
+            logger.info(
+                f"Model reloaded from {candidate.source} in {load_time_ms:.1f}ms: "
+                f"version {previous.model_info['version']} -> {candidate.model_info['version']}, "
+                f"max probability change {parity['maxAbsDiff']:.6f}"
+            )
+            return {
+                "status": RELOAD_SWAPPED,
+                "source": str(candidate.source),
+                "previousVersion": dict(previous.model_info),
+                "newVersion": dict(candidate.model_info),
+                "loadTimeMs": round(load_time_ms, 1),
+                "probabilityTable": candidate.table is not None,
+                "parity": parity
             }
+        finally:
+            self._reload_lock.release()
+    
+    def _validate_model(self, snapshot: ModelSnapshot) -> None:
+        """
+        Check that a freshly loaded model can serve predictions.
+        
+        Args:
+            snapshot: Candidate model snapshot
+            
+        Raises:
+            ValueError: If the model has the wrong shape or returns invalid probabilities
+        """
+        model = snapshot.model_object
+        if getattr(model, 'n_features_in_', 2) != 2:
+            raise ValueError(f"Model expects {model.n_features_in_} features, expected 2")
+        
+        probabilities, _ = self.model_service.predict_proba_batch(
+            np.array([1, 7]), np.array([1, 1]), snapshot=snapshot
+        )
+        if probabilities.shape != (2, 2) or not np.all(np.isfinite(probabilities)):
+            raise ValueError("Model returned invalid probabilities")
+        if not np.allclose(probabilities.sum(axis=1), 1.0):
+            raise ValueError("Model probabilities do not sum to 1")
+    
+    def _compare_models(self, previous: ModelSnapshot, candidate: ModelSnapshot) -> Dict[str, Any]:
+        """
+        Compare two models over every day x airport cell.
+        
+        Args:
+            previous: Model snapshot currently being served
+            candidate: Model snapshot about to be served
+            
+        Returns:
+            Dictionary with the number of cells compared, the maximum and mean
+            absolute delay probability difference and the number of cells
+            whose isDelayed decision changed
+        """
+        model_ids = np.unique(np.asarray(self.airport_service.get_model_airport_ids(), dtype=np.int64))
+        days = np.repeat(np.arange(1, 8, dtype=np.int64), len(model_ids))
+        airports = np.tile(model_ids, 7)
+        if len(days) == 0:
+            return {"cellsCompared": 0, "maxAbsDiff": 0.0, "meanAbsDiff": 0.0, "decisionChanges": 0}
+        
+        old_probabilities, old_predictions = self.model_service.predict_proba_batch(days, airports, snapshot=previous)
+        new_probabilities, new_predictions = self.model_service.predict_proba_batch(days, airports, snapshot=candidate)
+        diff = np.abs(new_probabilities[:, 1] - old_probabilities[:, 1])
+        return {
+            "cellsCompared": int(len(days)),
+            "maxAbsDiff": float(diff.max()),
+            "meanAbsDiff": float(diff.mean()),
+            "decisionChanges": int(np.count_nonzero(old_predictions != new_predictions))
+        }
     
     def _validate_prediction_inputs(self, day_of_week: int, airport_id: int) -> Tuple[bool, str]:
         """
@@ -153,7 +855,7 @@ class PredictionService:
         """
         # Validate day of week
         if not isinstance(day_of_week, int) or day_of_week < 1 or day_of_week > 7:
-            return False, "dayOfWeek must be an integer between 1 and 7 (1=Monday, 7=Sunday)"
+            return False, DAY_OF_WEEK_ERROR
         
         # Validate airport ID exists
         if not isinstance(airport_id, int):
@@ -168,13 +870,64 @@ class PredictionService:
         """
         Get status of all services.
         
+        The model, table, airport and shared state details are built once
+        per model snapshot, airport data and shared state, and reused until
+        one of them changes.
+        
         Returns:
             Dictionary with service status information
         """
         return {
             "initialized": self._initialized,
+            "readiness": self.get_readiness(),
+            **self._status_details()
+        }
+    
+    def get_service_status_json(self) -> bytes:
+        """
+        Get the status of all services serialized as JSON.
+        
+        Same content as get_service_status(); the details are serialized once
+        per version, only the initialization state is serialized per call.
+        
+        Returns:
+            UTF-8 encoded JSON object
+        """
+        version = self._status_version()
+        details = self.status_cache.get("json", version)
+        if details is None:
+            details = dumps(self._status_details())
+            self.status_cache.put("json", details, version)
+        head = dumps({"initialized": self._initialized, "readiness": self.get_readiness()})
+        return head[:-1] + b"," + details[1:]
+    
+    def _status_version(self) -> Tuple:
+        """Versions the cached status details are valid for."""
+        return (self.model_service.snapshot, self.airport_service.data_version, self._shared_state)
+    
+    def _status_details(self) -> Dict[str, Any]:
+        """Get the cached model, table, airport and shared state details, building them if stale."""
+        version = self._status_version()
+        details = self.status_cache.get("details", version)
+        if details is None:
+            details = self._build_status_details()
+            self.status_cache.put("details", details, version)
+        return details
+    
+    def _build_status_details(self) -> Dict[str, Any]:
+        """Build the model, table, airport and shared state parts of the service status."""
+        table = self.probability_table
+        return {
             "model": self.model_service.get_model_info(),
-            "airports": self.airport_service.get_airports_summary()
+            "probabilityTable": {
+                "enabled": table is not None,
+                "shape": list(table.shape) if table is not None else None
+            },
+            "airports": self.airport_service.get_airports_summary(),
+            "sharedState": {
+                "path": str(self._shared_state.path),
+                "stateId": self._shared_state.state_id
+            } if self._shared_state is not None else None
         }
 
 
@@ -8,6 +8,9 @@ from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+# Maximum number of items accepted by the batch prediction endpoint
+MAX_BATCH_SIZE = 1000
+
 class AirportInfo(BaseModel):
     """Airport information model."""
     id: int = Field(..., description="Unique airport identifier")
@@ -72,6 +75,56 @@ class PredictionResponse(BaseModel):
     confidence: float = Field(..., description="Model confidence (0-1)")
     modelInfo: ModelInfo = Field(..., description="Information about the model used")
 
+class BatchPredictionItem(BaseModel):
+    """Single item of a batch prediction request (validated per item by the service)."""
+    dayOfWeek: int = Field(..., description="Day of week (1=Monday, 2=Tuesday, ..., 7=Sunday)")
+    airportId: int = Field(..., description="Airport ID from the airports list")
+
+class BatchPredictionRequest(BaseModel):
+    """Request model for batch flight delay prediction."""
+    requests: List[BatchPredictionItem] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description=f"Prediction requests to score (1-{MAX_BATCH_SIZE} items)"
+    )
+
+class BatchPredictionResult(BaseModel):
+    """Result for one item of a batch prediction."""
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="Status of this item (success/error)")
+    input: Dict[str, Any] = Field(..., description="Input parameters for this item")
+    airport: Optional[AirportInfo] = Field(None, description="Airport information (on success)")
+    prediction: Optional[PredictionDetails] = Field(None, description="Prediction results (on success)")
+    confidence: Optional[float] = Field(None, description="Model confidence (0-1, on success)")
+    error: Optional[str] = Field(None, description="Error message (on error)")
+
+class BatchPredictionResponse(BaseModel):
+    """Response model for batch flight delay prediction."""
+    status: str = Field(..., description="Status of the batch (success)")
+    results: List[BatchPredictionResult] = Field(..., description="Per-item results in request order")
+    total: int = Field(..., description="Number of items in the batch")
+    succeeded: int = Field(..., description="Number of successful items")
+    failed: int = Field(..., description="Number of failed items")
+    modelInfo: ModelInfo = Field(..., description="Information about the model used")
+
+class ModelParity(BaseModel):
+    """Differences between a reloaded model and the model it replaced."""
+    cellsCompared: int = Field(..., description="Number of day x airport cells compared")
+    maxAbsDiff: float = Field(..., description="Largest absolute change in delay probability")
+    meanAbsDiff: float = Field(..., description="Mean absolute change in delay probability")
+    decisionChanges: int = Field(..., description="Number of cells whose isDelayed prediction changed")
+
+class ModelReloadResponse(BaseModel):
+    """Response model for a model reload."""
+    status: str = Field(..., description="Reload status (success)")
+    source: str = Field(..., description="Path of the loaded model artifact")
+    previousVersion: ModelInfo = Field(..., description="Model served before the reload")
+    newVersion: ModelInfo = Field(..., description="Model served after the reload")
+    loadTimeMs: float = Field(..., description="Time to load, validate and precompute the new model")
+    probabilityTable: bool = Field(..., description="Whether the new model is served from a probability table")
+    parity: ModelParity = Field(..., description="Parity check against the previous model")
+
 class ErrorResponse(BaseModel):
     """Error response model."""
     status: str = Field("error", description="Status (always 'error')")
@@ -0,0 +1,50 @@
+"""
+Admin Endpoints for Flight Delay Prediction API
+
+Provides operational endpoints such as reloading the model without a restart.
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+import logging
+
+from models.schemas import ErrorResponse, ModelReloadResponse
+from models.prediction import RELOAD_IN_PROGRESS, RELOAD_SWAPPED
+from routers.predictions import get_prediction_service
+from utils.executor import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    responses={409: {"model": ErrorResponse}, 422: {"model": ErrorResponse}},
+)
+
+@router.post(
+    "/model/reload",
+    response_model=ModelReloadResponse,
+    summary="Reload the model",
+    description="Loads the configured model artifact, validates it and swaps it in "
+                "atomically while predictions keep being served"
+)
+async def reload_model(service = Depends(get_prediction_service)):
+    """
+    Reload the prediction model from disk.
+    
+    Returns:
+        ModelReloadResponse: Load time and parity against the previous model
+        
+    Raises:
+        HTTPException: 409 if a reload is already running, 422 if the new
+            model was rejected (the previous model keeps serving)
+    """
+    logger.info("Model reload requested")
+    
+    # Loading and precomputing the new model runs in the worker pool
+    result = await run_in_executor(service.reload_model)
+    
+    if result["status"] == RELOAD_IN_PROGRESS:
+        raise HTTPException(status_code=409, detail=result["error"])
+    if result["status"] != RELOAD_SWAPPED:
+        raise HTTPException(status_code=422, detail=result["error"])
+    return result
@@ -4,15 +4,24 @@ Airport Endpoints for Flight Delay Prediction API
 Provides REST API endpoints for airport data.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 import logging
 
 from models.schemas import AirportsResponse, AirportInfo, ErrorResponse
 from services.airport_service import airport_service
+from utils import metrics
+from utils.executor import run_in_executor
+from utils.metrics import CACHE_REQUESTS
 
 logger = logging.getLogger(__name__)
 
+# Airport data only changes on reload; clients revalidate with the ETag after this
+AIRPORTS_CACHE_CONTROL = "public, max-age=300"
+
+# Conditional GET /airports requests answered with 304 (hit) or the full body (miss)
+ETAG_HITS = CACHE_REQUESTS.labels("airports_etag", "hit")
+ETAG_MISSES = CACHE_REQUESTS.labels("airports_etag", "miss")
+
 router = APIRouter(
     prefix="/airports",
     tags=["airports"],
@@ -21,8 +30,9 @@ router = APIRouter(
 
 async def get_airport_service():
     """Dependency to ensure airport service is initialized."""
-    if airport_service.airports_df is None:
-        success = airport_service.load_airports()
+    if not airport_service.is_loaded:
+        # CSV parsing runs in the worker pool to keep the event loop free
+        success = await run_in_executor(airport_service.ensure_loaded)
         if not success:
             raise HTTPException(
                 status_code=500,
@@ -36,33 +46,37 @@ async def get_airport_service():
     summary="Get all airports",
     description="Returns a list of all airports sorted alphabetically by name"
 )
-async def get_airports(service = Depends(get_airport_service)):
+async def get_airports(
+    request: Request,
+    service = Depends(get_airport_service)
+):
     """
     Get all airports sorted alphabetically by name.
     
+    The response body is serialized (and compressed) once per load of the
+    airports data and served with a strong ETag; requests with a matching
+    If-None-Match header get 304 Not Modified.
+    
     Returns:
         AirportsResponse: List of airports with id, name, code, city, and state
     """
     try:
-        airports_list = service.get_all_airports()
-        
-        # Convert to AirportInfo models
-        airport_models = [
-            AirportInfo(
-                id=airport["id"],
-                name=airport["name"],
-                code=airport["code"],
-                city=airport["city"],
-                state=airport["state"]
-            )
-            for airport in airports_list
-        ]
+        payload = service.get_airports_body()
+        encoding = payload.select_encoding(request.headers.get("accept-encoding"))
+        headers = payload.headers(encoding, AIRPORTS_CACHE_CONTROL)
         
-        logger.info(f"Returning {len(airport_models)} airports")
+        if_none_match = request.headers.get("if-none-match")
+        not_modified = payload.not_modified(if_none_match)
+        if if_none_match is not None and metrics.ENABLED:
+            (ETAG_HITS if not_modified else ETAG_MISSES).inc()
+        if not_modified:
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
         
-        return AirportsResponse(
-            airports=airport_models,
-            total=len(airport_models)
+        return Response(
+            content=payload.variants[encoding],
+            media_type=payload.media_type,
+            headers=headers
         )
         
     except Exception as e:
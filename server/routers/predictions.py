@@ -4,12 +4,16 @@ Prediction Endpoints for Flight Delay Prediction API
 Provides REST API endpoints for flight delay predictions.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 import logging
 
 from models.schemas import (
     PredictionRequest, 
     PredictionResponse, 
+    BatchPredictionRequest,
+    BatchPredictionResponse,
     ErrorResponse, 
     PredictionDetails,
     ModelInfo,
@@ -17,19 +21,76 @@ from models.schemas import (
     AirportInfo
 )
 from models.prediction import prediction_service
+from services.stream_scoring import DEFAULT_CHUNK_ROWS, MAX_CHUNK_ROWS, score_stream
+from utils.executor import run_in_executor
+from utils.json_encoding import JSON_MEDIA_TYPE, dumps, fast_serialization_enabled
+from utils.logging_config import log_sampled
+from utils.metrics import PREDICTION_STAGE_SECONDS, stage_timer
 
 logger = logging.getLogger(__name__)
 
+# Write prediction responses directly as JSON bytes (see build_prediction_response)
+FAST_SERIALIZATION = fast_serialization_enabled()
+
+# Last stage of a /predict request; the others are timed in PredictionService
+STAGE_SERIALIZATION = PREDICTION_STAGE_SECONDS.labels("serialization")
+
 router = APIRouter(
     prefix="/predict",
     tags=["predictions"],
     responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
 )
 
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request body.
+    
+    Starlette's StreamingResponse listens for client disconnects by calling
+    receive() concurrently with the body iterator on ASGI servers older than
+    spec 2.4 (uvicorn reports 2.3). That listener would swallow the request
+    body messages the iterator is waiting for, so this response only streams
+    and detects disconnects from failed sends instead.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        
+        if self.background is not None:
+            await self.background()
+
+def build_prediction_response(result: dict) -> PredictionResponse:
+    """
+    Build the pydantic response model for a successful prediction result.
+    
+    Only used when fast serialization is disabled; the fast path writes the
+    same result dictionary directly and must produce an identical body.
+    
+    Args:
+        result: Successful result from PredictionService.predict_flight_delay()
+        
+    Returns:
+        PredictionResponse
+    """
+    return PredictionResponse(
+        status="success",
+        input=PredictionInput(
+            dayOfWeek=result["input"]["dayOfWeek"],
+            airportId=result["input"]["airportId"],
+            airport=AirportInfo(**result["input"]["airport"])
+        ),
+        prediction=PredictionDetails(**result["prediction"]),
+        confidence=result["confidence"],
+        modelInfo=ModelInfo(**result["modelInfo"])
+    )
+
 async def get_prediction_service():
     """Dependency to ensure prediction service is initialized."""
     if not prediction_service._initialized:
-        success = prediction_service.initialize()
+        # Single-flight: concurrent requests share one initialization in the worker pool
+        success = await prediction_service.ensure_initialized()
         if not success:
             raise HTTPException(
                 status_code=500,
@@ -60,10 +121,10 @@ async def predict_flight_delay(
         HTTPException: If prediction fails or invalid input
     """
     try:
-        logger.info(f"Prediction request: day={request.dayOfWeek}, airport={request.airportId}")
-        
-        # Make prediction
-        result = service.predict_flight_delay(
+        # Make prediction: table lookups are answered on the event loop, live
+        # model inference is micro-batched with concurrent requests and runs
+        # in the worker pool
+        result = await service.predict_flight_delay_async(
             day_of_week=request.dayOfWeek,
             airport_id=request.airportId
         )
@@ -85,45 +146,123 @@ async def predict_flight_delay(
                 detail=error_detail
             )
         
-        # Convert result to response model
-        response = PredictionResponse(
-            status="success",
-            input=PredictionInput(
-                dayOfWeek=result["input"]["dayOfWeek"],
-                airportId=result["input"]["airportId"],
-                airport=AirportInfo(
-                    id=result["input"]["airport"]["name"] and result["input"]["airportId"] or 0,
-                    name=result["input"]["airport"]["name"],
-                    code=result["input"]["airport"]["code"],
-                    city=result["input"]["airport"]["city"],
-                    state=result["input"]["airport"]["state"]
-                )
-            ),
-            prediction=PredictionDetails(
-                delayProbability=result["prediction"]["delayProbability"],
-                isDelayed=result["prediction"]["isDelayed"],
-                noDelayProbability=result["prediction"]["noDelayProbability"]
-            ),
-            confidence=result["confidence"],
-            modelInfo=ModelInfo(
-                modelType=result["modelInfo"]["modelType"],
-                accuracy=result["modelInfo"]["accuracy"],
-                version=result["modelInfo"]["version"]
+        if log_sampled("/predict"):
+            logger.info(
+                "Prediction successful: day=%d, airport=%d, probability=%.3f",
+                request.dayOfWeek, request.airportId, result["prediction"]["delayProbability"],
+                extra={"route": "/predict", "dayOfWeek": request.dayOfWeek, "airportId": request.airportId,
+                       "delayProbability": result["prediction"]["delayProbability"]}
             )
-        )
         
-        logger.info(f"Prediction successful: {result['prediction']['delayProbability']:.3f}")
+        # The result is already in the PredictionResponse schema; write it out
+        # directly instead of building and re-serializing the pydantic models.
+        # On the pydantic path only building the models is timed, FastAPI
+        # validates and encodes them after the handler returns
+        timer = stage_timer()
+        if FAST_SERIALIZATION:
+            response = Response(content=dumps(result), media_type=JSON_MEDIA_TYPE)
+        else:
+            response = build_prediction_response(result)
+        timer.mark(STAGE_SERIALIZATION)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in prediction: {e}")
+        logger.error("Unexpected error in prediction: %s", e, extra={"route": "/predict"})
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.post(
+    "/batch",
+    response_model=BatchPredictionResponse,
+    summary="Predict flight delays in batch",
+    description="Predicts delay probabilities for many (dayOfWeek, airportId) pairs in one call, "
+                "returning per-item results and per-item errors"
+)
+async def predict_flight_delay_batch(
+    request: BatchPredictionRequest,
+    service = Depends(get_prediction_service)
+):
+    """
+    Predict flight delay probabilities for a batch of requests.
+    
+    Args:
+        request: Batch request with a list of dayOfWeek/airportId items
+        
+    Returns:
+        BatchPredictionResponse: Per-item results in request order
+        
+    Raises:
+        HTTPException: If the batch cannot be scored
+    """
+    try:
+        if log_sampled("/predict/batch"):
+            logger.info("Batch prediction request: %d items", len(request.requests),
+                        extra={"route": "/predict/batch", "items": len(request.requests)})
+        
+        result = await run_in_executor(
+            service.predict_batch,
+            days_of_week=[item.dayOfWeek for item in request.requests],
+            airport_ids=[item.airportId for item in request.requests]
+        )
+        return result
+        
+    except Exception as e:
+        logger.error("Unexpected error in batch prediction: %s", e, extra={"route": "/predict/batch"})
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post(
+    "/stream",
+    response_class=StreamingResponse,
+    summary="Stream bulk flight delay predictions",
+    description="Scores a newline-delimited JSON (application/x-ndjson) or CSV (text/csv) request body "
+                "chunk by chunk and streams NDJSON results back, one line per input row",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def predict_flight_delay_stream(
+    request: Request,
+    chunk_rows: int = Query(
+        DEFAULT_CHUNK_ROWS,
+        ge=1,
+        le=MAX_CHUNK_ROWS,
+        description="Rows scored per vectorized call"
+    ),
+    service = Depends(get_prediction_service)
+):
+    """
+    Stream bulk flight delay predictions.
+    
+    Args:
+        request: Raw request whose body holds NDJSON or CSV rows
+        chunk_rows: Rows scored per vectorized call
+        
+    Returns:
+        StreamingResponse: NDJSON result lines in input order
+    """
+    content_type = request.headers.get("content-type", "")
+    input_format = "csv" if "csv" in content_type.lower() else "ndjson"
+    logger.info("Streaming prediction request: format=%s, chunk_rows=%d", input_format, chunk_rows,
+                extra={"route": "/predict/stream", "format": input_format, "chunkRows": chunk_rows})
+    
+    return RequestBodyStreamingResponse(
+        score_stream(request.stream(), service, input_format=input_format, chunk_rows=chunk_rows),
+        media_type="application/x-ndjson"
+    )
+
 @router.get(
     "/status",
     summary="Get prediction service status",
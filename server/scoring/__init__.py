@@ -0,0 +1,5 @@
+"""
+Offline scoring with the flight delay model.
+
+Run from the /server directory, e.g. ``python -m scoring.bulk``.
+"""
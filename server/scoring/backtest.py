@@ -0,0 +1,381 @@
+"""
+Backtest of the Served Model Against Historical Flights
+
+Streams a historical flights file through the same scoring path as /predict
+(AirportService mapping and the model's probability table, via
+PredictionService.score_rows) and compares the predictions with the recorded
+DepDel15 outcomes. Predictions are never materialized: every chunk is reduced
+to fixed-size accumulators (confusion matrix, Brier score, log loss,
+calibration bins, per day of week and per airport statistics), which are
+merged across chunks and worker processes.
+
+The JSON report is deterministic for a given model and input, so reports of
+two model versions can be diffed directly; run timing is kept under "run".
+
+Usage (from the /server directory):
+    python -m scoring.backtest ../data/flights.csv --period 2013-04 --output backtest-2013-04.json
+"""
+
+import json
+import logging
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from models.prediction import ROW_OK, prediction_service
+from scoring.bulk import DEFAULT_CHUNK_BYTES, STATUS_NAMES, iter_csv_blocks
+from scoring.parallel import imap_chunks, resolve_jobs
+from training.ingest import CANCELLED_DROP, CANCELLED_KEEP, parse_csv_bytes
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMAT_VERSION = 1
+
+DAY_COLUMN = 'DayOfWeek'
+AIRPORT_COLUMN = 'OriginAirportID'
+TARGET_COLUMN = 'DepDel15'
+BACKTEST_COLUMNS = ('Year', 'Month', DAY_COLUMN, AIRPORT_COLUMN, TARGET_COLUMN, 'Cancelled')
+
+DEFAULT_CALIBRATION_BINS = 10
+
+# Probabilities are clipped before taking logs so a confident miss costs a finite loss
+LOG_LOSS_EPSILON = 1e-15
+
+# Columns of a per-group statistics row
+(STAT_N, STAT_DELAYED, STAT_PREDICTED, STAT_BRIER, STAT_LOG_LOSS,
+ STAT_TP, STAT_FP, STAT_FN, STAT_TN) = range(9)
+N_STATS = 9
+
+# Report floats are rounded so that reports diff cleanly
+REPORT_DECIMALS = 6
+
+
+def _group_stats(keys: np.ndarray, n_groups: int, outcome: np.ndarray, probability: np.ndarray,
+                 predicted: np.ndarray) -> np.ndarray:
+    """
+    Sum the per-row statistics of each group with one bincount per statistic.
+
+    Args:
+        keys: Group index per row
+        n_groups: Number of groups
+        outcome: 1 if the flight was delayed, else 0
+        probability: Predicted delay probability
+        predicted: Predicted class (True for delayed)
+
+    Returns:
+        Array of shape (n_groups, N_STATS)
+    """
+    outcome = outcome.astype(bool)
+    clipped = np.clip(probability, LOG_LOSS_EPSILON, 1 - LOG_LOSS_EPSILON)
+    per_row = (
+        None,
+        outcome,
+        probability,
+        (probability - outcome) ** 2,
+        -np.where(outcome, np.log(clipped), np.log(1 - clipped)),
+        predicted & outcome,
+        predicted & ~outcome,
+        ~predicted & outcome,
+        ~predicted & ~outcome,
+    )
+    stats = np.empty((n_groups, N_STATS))
+    for column, weights in enumerate(per_row):
+        stats[:, column] = np.bincount(
+            keys, weights=None if weights is None else weights.astype(np.float64), minlength=n_groups
+        )
+    return stats
+
+
+def _metrics(stats: np.ndarray) -> Dict[str, Any]:
+    """Turn a statistics row into report metrics."""
+    n = stats[STAT_N]
+    tp, fp, fn, tn = stats[STAT_TP], stats[STAT_FP], stats[STAT_FN], stats[STAT_TN]
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        'flights': int(n),
+        'delayRate': stats[STAT_DELAYED] / n if n else None,
+        'meanPredicted': stats[STAT_PREDICTED] / n if n else None,
+        'accuracy': (tp + tn) / n if n else None,
+        'precision': precision,
+        'recall': recall,
+        'f1Score': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        'brierScore': stats[STAT_BRIER] / n if n else None,
+        'logLoss': stats[STAT_LOG_LOSS] / n if n else None,
+        'confusionMatrix': {
+            'truePositive': int(tp), 'falsePositive': int(fp),
+            'falseNegative': int(fn), 'trueNegative': int(tn)
+        },
+    }
+
+
+def _round(value: Any) -> Any:
+    """Round floats in a nested report structure."""
+    if isinstance(value, float):
+        return round(value, REPORT_DECIMALS)
+    if isinstance(value, dict):
+        return {key: _round(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_round(item) for item in value]
+    return value
+
+
+class BacktestAccumulator:
+    """Mergeable, fixed-size summary of predictions against outcomes."""
+
+    def __init__(self, calibration_bins: int = DEFAULT_CALIBRATION_BINS):
+        """
+        Initialize an empty accumulator.
+
+        Args:
+            calibration_bins: Number of equal-width predicted probability bins
+        """
+        self.calibration_bins = calibration_bins
+        self.overall = np.zeros(N_STATS)
+        self.by_day = np.zeros((7, N_STATS))
+        # Real AirportID -> statistics row; bounded by the number of airports
+        self.by_airport: Dict[int, np.ndarray] = {}
+        # Per bin: flights, delayed flights, sum of predicted probabilities
+        self.calibration = np.zeros((calibration_bins, 3))
+        self.unscored = np.zeros(len(STATUS_NAMES), dtype=np.int64)
+
+    def add(self, days: np.ndarray, airports: np.ndarray, outcome: np.ndarray, probability: np.ndarray,
+            predicted: np.ndarray, status: np.ndarray) -> None:
+        """
+        Add a chunk of scored flights.
+
+        Args:
+            days: Day of week per flight
+            airports: Real origin AirportID per flight
+            outcome: 1 if the flight departed more than 15 minutes late
+            probability: Predicted delay probability
+            predicted: Predicted class (True for delayed)
+            status: Row status from PredictionService.score_rows(); only ROW_OK rows are evaluated
+        """
+        ok = status == ROW_OK
+        self.unscored += np.bincount(status[~ok], minlength=len(STATUS_NAMES))
+        days, airports, outcome, probability, predicted = (
+            days[ok], airports[ok], outcome[ok], probability[ok], predicted[ok]
+        )
+        if len(days) == 0:
+            return
+
+        self.overall += _group_stats(np.zeros(len(days), dtype=np.int64), 1, outcome, probability, predicted)[0]
+        self.by_day += _group_stats(days.astype(np.int64) - 1, 7, outcome, probability, predicted)
+
+        airport_ids, keys = np.unique(airports, return_inverse=True)
+        airport_stats = _group_stats(keys.reshape(-1), len(airport_ids), outcome, probability, predicted)
+        for airport_id, stats in zip(airport_ids.tolist(), airport_stats):
+            if airport_id in self.by_airport:
+                self.by_airport[airport_id] += stats
+            else:
+                self.by_airport[airport_id] = stats
+
+        bins = np.minimum((probability * self.calibration_bins).astype(np.int64), self.calibration_bins - 1)
+        for column, weights in enumerate((None, outcome.astype(np.float64), probability)):
+            self.calibration[:, column] += np.bincount(bins, weights=weights, minlength=self.calibration_bins)
+
+    def merge(self, other: "BacktestAccumulator") -> "BacktestAccumulator":
+        """
+        Add another accumulator's counts to this one.
+
+        Args:
+            other: Accumulator with the same number of calibration bins
+
+        Returns:
+            self
+        """
+        if other.calibration_bins != self.calibration_bins:
+            raise ValueError("Cannot merge accumulators with different calibration bins")
+        self.overall += other.overall
+        self.by_day += other.by_day
+        for airport_id, stats in other.by_airport.items():
+            if airport_id in self.by_airport:
+                self.by_airport[airport_id] += stats
+            else:
+                self.by_airport[airport_id] = stats.copy()
+        self.calibration += other.calibration
+        self.unscored += other.unscored
+        return self
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the JSON-serializable metrics report.
+
+        Returns:
+            Dictionary with overall, calibration, byDayOfWeek, byAirport and unscored sections
+        """
+        edges = np.linspace(0, 1, self.calibration_bins + 1).tolist()
+        calibration = []
+        for index, (flights, delayed, predicted) in enumerate(self.calibration.tolist()):
+            calibration.append({
+                'lower': edges[index],
+                'upper': edges[index + 1],
+                'flights': int(flights),
+                'meanPredicted': predicted / flights if flights else None,
+                'observedRate': delayed / flights if flights else None,
+            })
+        overall = self.overall.tolist()
+        flights = overall[STAT_N]
+        # Expected calibration error: flight-weighted gap between predicted and observed rates
+        ece = sum(abs(bin_['meanPredicted'] - bin_['observedRate']) * bin_['flights'] / flights
+                  for bin_ in calibration if bin_['flights']) if flights else None
+        return _round({
+            'overall': dict(_metrics(overall), expectedCalibrationError=ece),
+            'calibration': calibration,
+            'byDayOfWeek': {str(day): _metrics(stats) for day, stats in enumerate(self.by_day.tolist(), start=1)
+                            if stats[STAT_N]},
+            'byAirport': {str(airport_id): _metrics(self.by_airport[airport_id].tolist())
+                          for airport_id in sorted(self.by_airport)},
+            'unscored': {STATUS_NAMES[code]: int(count) for code, count in enumerate(self.unscored.tolist())
+                         if count},
+        })
+
+
+def _init_worker(model_path: Optional[str]) -> None:
+    """Load the served model (or the one to evaluate) once per process."""
+    if multiprocessing.parent_process() is not None:
+        # Worker processes only report problems; progress is logged by the main process
+        logging.getLogger().setLevel(logging.WARNING)
+    if not prediction_service.initialize():
+        raise RuntimeError("Prediction service failed to initialize")
+    if model_path is not None:
+        result = prediction_service.reload_model(model_path)
+        if 'newVersion' not in result:
+            raise RuntimeError(f"Could not load {model_path}: {result.get('error')}")
+
+
+def evaluate_columns(columns: Dict[str, np.ndarray], period: Optional[Tuple[int, int]] = None,
+                     calibration_bins: int = DEFAULT_CALIBRATION_BINS) -> BacktestAccumulator:
+    """
+    Score a chunk of flights and reduce it to an accumulator.
+
+    Args:
+        columns: Cleaned flight columns (see training.ingest)
+        period: Only evaluate flights of this (year, month)
+        calibration_bins: Number of calibration bins
+
+    Returns:
+        BacktestAccumulator for the chunk
+    """
+    if period is not None:
+        if 'Year' not in columns or 'Month' not in columns:
+            raise ValueError("Filtering by period requires Year and Month columns")
+        keep = (columns['Year'] == period[0]) & (columns['Month'] == period[1])
+        columns = {name: values[keep] for name, values in columns.items()}
+
+    days = columns[DAY_COLUMN].astype(np.int64)
+    airports = columns[AIRPORT_COLUMN].astype(np.int64)
+    probabilities, is_delayed, status = prediction_service.score_rows(days, airports)
+
+    accumulator = BacktestAccumulator(calibration_bins)
+    accumulator.add(days, airports, columns[TARGET_COLUMN], probabilities[:, 1], is_delayed, status)
+    return accumulator
+
+
+def _evaluate_block(task: Tuple[bytes, Dict[str, Any]]) -> BacktestAccumulator:
+    """Parse and evaluate one CSV block in a worker."""
+    data, options = task
+    columns = parse_csv_bytes(data, BACKTEST_COLUMNS, options['cancelled'])
+    return evaluate_columns(columns, options['period'], options['calibration_bins'])
+
+
+def _blocks(csv_paths: Iterable[Union[str, Path]], options: Dict[str, Any],
+            chunk_bytes: int) -> Iterator[Tuple[bytes, Dict[str, Any]]]:
+    """Yield (header + block, options) tasks for all files."""
+    for csv_path in csv_paths:
+        for header, block in iter_csv_blocks(csv_path, chunk_bytes):
+            yield header + block, options
+
+
+def run_backtest(csv_paths: Iterable[Union[str, Path]], model_path: Optional[str] = None,
+                 period: Optional[Tuple[int, int]] = None, n_jobs: int = 1,
+                 cancelled: str = CANCELLED_DROP, calibration_bins: int = DEFAULT_CALIBRATION_BINS,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Dict[str, Any]:
+    """
+    Evaluate a model on historical flights.
+
+    Args:
+        csv_paths: Historical flights CSV files
+        model_path: Model to evaluate (.pkl or .npz); defaults to the served model
+        period: Only evaluate flights of this (year, month)
+        n_jobs: Worker processes (-1 for one per CPU, 1 to run in this process)
+        cancelled: CANCELLED_DROP (default; they have no departure outcome) or CANCELLED_KEEP
+        calibration_bins: Number of calibration bins
+        chunk_bytes: Approximate bytes of CSV per chunk
+
+    Returns:
+        Report dictionary
+    """
+    csv_paths = [Path(csv_path) for csv_path in csv_paths]
+    options = {'period': period, 'cancelled': cancelled, 'calibration_bins': calibration_bins}
+    start = time.perf_counter()
+
+    # This process reports the model; workers load their own copy
+    _init_worker(model_path)
+    parallel = resolve_jobs(n_jobs) > 1
+    total = BacktestAccumulator(calibration_bins)
+    chunks = 0
+    for _, partial in imap_chunks(_evaluate_block, _blocks(csv_paths, options, chunk_bytes), n_jobs,
+                                  _init_worker if parallel else None, (model_path,)):
+        total.merge(partial)
+        chunks += 1
+
+    seconds = time.perf_counter() - start
+    report = {
+        'formatVersion': REPORT_FORMAT_VERSION,
+        'model': prediction_service.model_service.get_model_info_summary(),
+        'data': {
+            'files': [csv_path.name for csv_path in csv_paths],
+            'period': f"{period[0]:04d}-{period[1]:02d}" if period else None,
+            'cancelled': cancelled,
+        },
+        **total.report(),
+        'run': {
+            'chunks': chunks,
+            'seconds': round(seconds, 3),
+            'rowsPerSecond': round(total.overall[STAT_N] / seconds) if seconds else 0,
+        },
+    }
+    return report
+
+
+def _parse_period(value: str) -> Tuple[int, int]:
+    """Parse a YYYY-MM period argument."""
+    year, month = value.split('-')
+    return int(year), int(month)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate the delay model against historical flight outcomes")
+    parser.add_argument("data", nargs="*", default=["../data/flights.csv"], help="Historical flights CSV files")
+    parser.add_argument("--model", help="Model to evaluate (.pkl or .npz, default: the served model)")
+    parser.add_argument("--period", type=_parse_period, help="Only evaluate flights of this month (YYYY-MM)")
+    parser.add_argument("--include-cancelled", action="store_true",
+                        help="Count cancelled flights as on time, like training does")
+    parser.add_argument("--bins", type=int, default=DEFAULT_CALIBRATION_BINS, help="Calibration bins")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 for one per CPU)")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_BYTES / 1024 / 1024,
+                        help="CSV input per chunk in MiB")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    report = run_backtest(args.data, args.model, args.period, args.n_jobs,
+                          CANCELLED_KEEP if args.include_cancelled else CANCELLED_DROP, args.bins,
+                          int(args.chunk_mb * 1024 * 1024))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        logger.info(f"Wrote backtest report to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+Bulk Scoring of Flight Schedules
+
+Attaches delay probabilities to a schedule file (CSV or Parquet) with one
+row per flight. The file is processed in chunks: the day of week is derived
+from the flight date, origin AirportIDs are mapped to model IDs through
+AirportService and every chunk is scored with one vectorized probability
+table gather (PredictionService.score_rows). Output is written as chunks
+complete, in input order, so memory stays bounded for any file size.
+
+With --n-jobs > 1 the chunks are sharded across worker processes, which
+parse, score and format them; the main process only splits the input and
+writes results. CSV input is split into newline-aligned byte blocks without
+parsing, Parquet input by row group. Quoted fields containing newlines are
+not supported in CSV input.
+
+Usage (from the /server directory):
+    python -m scoring.bulk schedule.csv scored.csv --n-jobs 4
+"""
+
+import io
+import json
+import logging
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from models.prediction import (
+    ROW_INVALID_DAY,
+    ROW_NO_MODEL_MAPPING,
+    ROW_OK,
+    ROW_UNKNOWN_AIRPORT,
+    prediction_service,
+)
+from scoring.parallel import imap_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATE_COLUMN = 'FlightDate'
+DEFAULT_AIRPORT_COLUMN = 'OriginAirportID'
+
+# Bytes of CSV input per chunk (about 200k rows of a typical schedule)
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Columns appended to every output row
+PROBABILITY_COLUMN = 'DelayProbability'
+DELAYED_COLUMN = 'IsDelayed'
+STATUS_COLUMN = 'ScoreStatus'
+
+STATUS_NAMES = {
+    ROW_OK: 'ok',
+    ROW_INVALID_DAY: 'invalid_day',
+    ROW_UNKNOWN_AIRPORT: 'unknown_airport',
+    ROW_NO_MODEL_MAPPING: 'no_model_mapping',
+}
+
+# Seconds between progress log lines
+PROGRESS_INTERVAL = 5.0
+
+
+def _is_parquet(path: Union[str, Path]) -> bool:
+    """Whether a path names a Parquet file."""
+    return Path(path).suffix.lower() in ('.parquet', '.pq')
+
+
+def _require_pyarrow():
+    """Import pyarrow.parquet, which is only needed for Parquet files."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet files require pyarrow (pip install pyarrow)") from None
+    return pq
+
+
+def days_of_week(frame, date_column: str = DEFAULT_DATE_COLUMN, date_format: Optional[str] = None,
+                 day_column: Optional[str] = None) -> np.ndarray:
+    """
+    Derive the model's day of week for each row.
+
+    Args:
+        frame: pandas DataFrame chunk
+        date_column: Column holding the flight date
+        date_format: strptime format of the dates (inferred when None)
+        day_column: Column already holding the day of week (1=Monday, 7=Sunday), used instead of dates
+
+    Returns:
+        int64 array of days of week; 0 for unparseable dates
+    """
+    import pandas as pd
+
+    if day_column is not None:
+        return pd.to_numeric(frame[day_column], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    dates = pd.to_datetime(frame[date_column], format=date_format, errors='coerce')
+    return (dates.dt.dayofweek + 1).fillna(0).to_numpy(dtype=np.int64)
+
+
+def score_columns(frame, date_column: str = DEFAULT_DATE_COLUMN, airport_column: str = DEFAULT_AIRPORT_COLUMN,
+                  date_format: Optional[str] = None,
+                  day_column: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score the rows of a schedule chunk.
+
+    Args:
+        frame: pandas DataFrame chunk
+        date_column: Column holding the flight date
+        airport_column: Column holding the real origin AirportID
+        date_format: strptime format of the dates
+        day_column: Column holding the day of week, used instead of dates
+
+    Returns:
+        Tuple of (delay probabilities, is_delayed, status codes) from
+        PredictionService.score_rows()
+    """
+    import pandas as pd
+
+    days = days_of_week(frame, date_column, date_format, day_column)
+    airports = pd.to_numeric(frame[airport_column], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+    probabilities, is_delayed, status = prediction_service.score_rows(days, airports)
+    return probabilities[:, 1], is_delayed, status
+
+
+def score_frame(frame, date_column: str = DEFAULT_DATE_COLUMN, airport_column: str = DEFAULT_AIRPORT_COLUMN,
+                date_format: Optional[str] = None, day_column: Optional[str] = None):
+    """
+    Append delay probability, class and status columns to a schedule chunk.
+
+    Args:
+        frame: pandas DataFrame chunk
+        date_column: Column holding the flight date
+        airport_column: Column holding the real origin AirportID
+        date_format: strptime format of the dates
+        day_column: Column holding the day of week, used instead of dates
+
+    Returns:
+        The frame with PROBABILITY_COLUMN (empty when not scored),
+        DELAYED_COLUMN and STATUS_COLUMN added
+    """
+    delay_probability, is_delayed, status = score_columns(frame, date_column, airport_column,
+                                                          date_format, day_column)
+    return _append_predictions(frame, delay_probability, is_delayed, status)
+
+
+def _append_predictions(frame, delay_probability: np.ndarray, is_delayed: np.ndarray, status: np.ndarray):
+    """Add the prediction columns to a frame, leaving the probability and class empty for unscored rows."""
+    import pandas as pd
+
+    ok = status == ROW_OK
+    frame[PROBABILITY_COLUMN] = np.where(ok, delay_probability, np.nan)
+    delayed = pd.array(is_delayed, dtype='boolean')
+    delayed[~ok] = pd.NA
+    frame[DELAYED_COLUMN] = delayed
+    frame[STATUS_COLUMN] = pd.Categorical.from_codes(
+        status, categories=[STATUS_NAMES[code] for code in sorted(STATUS_NAMES)]
+    )
+    return frame
+
+
+def _status_counts(status: np.ndarray) -> Dict[str, int]:
+    """Count rows per status name."""
+    counts = np.bincount(status, minlength=len(STATUS_NAMES))
+    return {STATUS_NAMES[code]: int(count) for code, count in enumerate(counts) if count}
+
+
+def csv_suffixes(delay_probability: np.ndarray, is_delayed: np.ndarray, status: np.ndarray) -> List[bytes]:
+    """
+    Format the appended CSV fields of every row.
+
+    Probabilities come from the day x airport table, so there are only a few
+    hundred distinct suffixes; each is formatted once and shared.
+
+    Args:
+        delay_probability: Delay probability per row
+        is_delayed: Predicted class per row
+        status: Status code per row
+
+    Returns:
+        One b",probability,is_delayed,status" field string per row
+    """
+    ok = status == ROW_OK
+    values, inverse = np.unique(delay_probability[ok], return_inverse=True)
+    suffixes = [f",{value!r},{delayed},{STATUS_NAMES[ROW_OK]}".encode()
+                for value in values.tolist() for delayed in (False, True)]
+    error_base = len(suffixes)
+    suffixes += [f",,,{STATUS_NAMES[code]}".encode() for code in sorted(STATUS_NAMES)]
+
+    codes = error_base + status.astype(np.int64)
+    codes[ok] = inverse.reshape(-1) * 2 + is_delayed[ok]
+    return [suffixes[code] for code in codes.tolist()]
+
+
+def iter_csv_blocks(path: Union[str, Path], chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Split a CSV file into newline-aligned byte blocks without parsing it.
+
+    Args:
+        path: CSV file
+        chunk_bytes: Approximate bytes per block
+
+    Yields:
+        Tuples of (header line, block of complete data lines)
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        remainder = b''
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                break
+            data = remainder + data
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                remainder = data
+                continue
+            remainder = data[end:]
+            yield header, data[:end]
+        if remainder.strip():
+            yield header, remainder
+
+
+class _Task:
+    """Work sent to a scoring process: a chunk source plus the column options."""
+
+    def __init__(self, options: Dict[str, Any], csv_block: Optional[Tuple[bytes, bytes]] = None,
+                 parquet_path: Optional[str] = None, row_group: Optional[int] = None):
+        self.options = options
+        self.csv_block = csv_block
+        self.parquet_path = parquet_path
+        self.row_group = row_group
+
+
+def _read_task(task: _Task, columns: Optional[List[str]] = None):
+    """Parse the chunk of a task (optionally only some columns) into a DataFrame."""
+    import pandas as pd
+
+    if task.csv_block is not None:
+        header, block = task.csv_block
+        return pd.read_csv(io.BytesIO(header + block), usecols=columns)
+    pq = _require_pyarrow()
+    return pq.ParquetFile(task.parquet_path).read_row_group(task.row_group).to_pandas()
+
+
+def _empty_input_frame(input_path: Path):
+    """A zero-row DataFrame with the columns of the input file."""
+    import pandas as pd
+
+    if _is_parquet(input_path):
+        return _require_pyarrow().ParquetFile(input_path).schema_arrow.empty_table().to_pandas()
+    return pd.read_csv(input_path, nrows=0)
+
+
+def _csv_header(input_path: Path) -> bytes:
+    """The CSV header line of the input columns."""
+    if _is_parquet(input_path):
+        return _empty_input_frame(input_path).to_csv(index=False).encode()
+    with open(input_path, 'rb') as f:
+        return f.readline()
+
+
+def _init_worker() -> None:
+    """Load the model and airports once per scoring process."""
+    if multiprocessing.parent_process() is not None:
+        # Worker processes only report problems; progress is logged by the main process
+        logging.getLogger().setLevel(logging.WARNING)
+    if not prediction_service.initialize():
+        raise RuntimeError("Prediction service failed to initialize")
+
+
+def _score_task(task: _Task) -> Tuple[Any, int, Dict[str, int]]:
+    """
+    Parse, score and (for CSV output) format one chunk.
+
+    Returns:
+        Tuple of (CSV bytes or DataFrame, rows, rows per status)
+    """
+    options = task.options
+    key_columns = [options['day_column'] or options['date_column'], options['airport_column']]
+
+    if task.csv_block is not None and options['output_format'] == 'csv':
+        # CSV to CSV: parse only the key columns and append the fields to the original lines
+        lines = [line for line in task.csv_block[1].splitlines() if line.strip()]
+        frame = _read_task(task, key_columns)
+        if len(frame) == len(lines):
+            delay_probability, is_delayed, status = score_columns(
+                frame, options['date_column'], options['airport_column'], options['date_format'],
+                options['day_column']
+            )
+            lines = list(map(bytes.__add__, lines, csv_suffixes(delay_probability, is_delayed, status)))
+            return b'\n'.join(lines) + b'\n', len(lines), _status_counts(status)
+
+    frame = _read_task(task)
+    frame = score_frame(frame, options['date_column'], options['airport_column'],
+                        options['date_format'], options['day_column'])
+    counts = _status_counts(frame[STATUS_COLUMN].cat.codes.to_numpy())
+    if options['output_format'] == 'csv':
+        return frame.to_csv(index=False, header=False).encode(), len(frame), counts
+    return frame, len(frame), counts
+
+
+class _OutputWriter:
+    """Writes scored chunks to a CSV or Parquet file in order."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.format = 'parquet' if _is_parquet(path) else 'csv'
+        self._file = None
+        self._parquet_writer = None
+
+    def write(self, chunk, header: Optional[bytes]) -> None:
+        """Write one scored chunk (CSV bytes or a DataFrame)."""
+        if self.format == 'csv':
+            if self._file is None:
+                self._file = open(self.path, 'wb')
+                self._file.write(header.rstrip(b'\r\n') + f",{PROBABILITY_COLUMN},{DELAYED_COLUMN},"
+                                 f"{STATUS_COLUMN}\n".encode())
+            self._file.write(chunk)
+            return
+
+        import pyarrow as pa
+        pq = _require_pyarrow()
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def write_empty(self, input_path: Path, header: Optional[bytes]) -> None:
+        """Write a result with no rows: the CSV header line, or a Parquet file with the output schema."""
+        if self.format == 'csv':
+            self.write(b'', header)
+            return
+        empty = np.empty(0, dtype=np.int64)
+        self.write(_append_predictions(_empty_input_frame(input_path), empty.astype(np.float64),
+                                       empty.astype(bool), empty), None)
+
+    def close(self) -> None:
+        """Flush and close the output file."""
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def _tasks(input_path: Path, options: Dict[str, Any], chunk_bytes: int) -> Iterator[_Task]:
+    """Yield the chunks of the input file as tasks, lazily."""
+    if _is_parquet(input_path):
+        pq = _require_pyarrow()
+        for row_group in range(pq.ParquetFile(input_path).num_row_groups):
+            yield _Task(options, parquet_path=str(input_path), row_group=row_group)
+        return
+    for block in iter_csv_blocks(input_path, chunk_bytes):
+        yield _Task(options, csv_block=block)
+
+
+def score_file(input_path: Union[str, Path], output_path: Union[str, Path],
+               date_column: str = DEFAULT_DATE_COLUMN, airport_column: str = DEFAULT_AIRPORT_COLUMN,
+               date_format: Optional[str] = None, day_column: Optional[str] = None,
+               n_jobs: int = 1, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Score a schedule file and write it with the prediction columns appended.
+
+    Args:
+        input_path: Schedule .csv or .parquet file
+        output_path: Output .csv or .parquet file
+        date_column: Column holding the flight date
+        airport_column: Column holding the real origin AirportID
+        date_format: strptime format of the dates (inferred when None)
+        day_column: Column holding the day of week, used instead of dates
+        n_jobs: Scoring processes (-1 for one per CPU, 1 to score in this process)
+        chunk_bytes: Approximate bytes of CSV input per chunk
+        progress: Called with the running report every PROGRESS_INTERVAL seconds
+
+    Returns:
+        Report with rows, per-status counts, seconds and rowsPerSecond
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    writer = _OutputWriter(output_path)
+    options = {
+        'date_column': date_column,
+        'airport_column': airport_column,
+        'date_format': date_format,
+        'day_column': day_column,
+        'output_format': writer.format,
+    }
+
+    # Parquet input has no header line, so CSV output takes one built from its columns
+    header = _csv_header(input_path) if writer.format == 'csv' else None
+    report: Dict[str, Any] = {'rows': 0, 'status': {}, 'chunks': 0}
+    start = time.perf_counter()
+    last_progress = start
+
+    def record(result: Tuple[Any, int, Dict[str, int]]) -> None:
+        nonlocal last_progress
+        chunk, rows, counts = result
+        writer.write(chunk, header)
+        report['rows'] += rows
+        report['chunks'] += 1
+        for name, count in counts.items():
+            report['status'][name] = report['status'].get(name, 0) + count
+        now = time.perf_counter()
+        if progress is not None and now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            progress(dict(report, seconds=now - start, rowsPerSecond=report['rows'] / (now - start)))
+
+    try:
+        for _, result in imap_chunks(_score_task, _tasks(input_path, options, chunk_bytes), n_jobs,
+                                     _init_worker):
+            record(result)
+        if report['chunks'] == 0:
+            writer.write_empty(input_path, header)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    report['seconds'] = round(seconds, 3)
+    report['rowsPerSecond'] = round(report['rows'] / seconds) if seconds else 0
+    return report
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Attach delay probabilities to a flight schedule file")
+    parser.add_argument("input", help="Schedule .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--date-column", default=DEFAULT_DATE_COLUMN, help="Flight date column")
+    parser.add_argument("--date-format", help="strptime format of the dates, e.g. %%Y-%%m-%%d (inferred if omitted)")
+    parser.add_argument("--day-column", help="Day of week column (1=Monday) to use instead of dates")
+    parser.add_argument("--airport-column", default=DEFAULT_AIRPORT_COLUMN, help="Origin AirportID column")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Scoring processes (-1 for one per CPU)")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_BYTES / 1024 / 1024,
+                        help="CSV input per chunk in MiB")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def log_progress(report: Dict[str, Any]) -> None:
+        logger.info(f"{report['rows']:,} rows in {report['seconds']:.1f}s ({report['rowsPerSecond']:,.0f} rows/s)")
+
+    report = score_file(args.input, args.output, args.date_column, args.airport_column, args.date_format,
+                        args.day_column, args.n_jobs, int(args.chunk_mb * 1024 * 1024), log_progress)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Chunk-Parallel Execution for Offline Scoring
+
+Runs a function over a lazily produced sequence of chunk tasks in a process
+pool, keeping a bounded number of chunks in flight so memory stays constant
+however large the input is. Results come back in input order.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Chunks queued per worker process
+IN_FLIGHT_PER_WORKER = 2
+
+
+def resolve_jobs(n_jobs: int) -> int:
+    """
+    Resolve a job count option.
+
+    Args:
+        n_jobs: Requested processes; negative means one per CPU
+
+    Returns:
+        Number of processes (at least 1)
+    """
+    if n_jobs < 0:
+        return os.cpu_count() or 1
+    return max(1, n_jobs)
+
+
+def imap_chunks(func: Callable[[T], R], tasks: Iterable[T], n_jobs: int = 1,
+                initializer: Optional[Callable[..., Any]] = None,
+                initargs: Sequence[Any] = ()) -> Iterator[Tuple[T, R]]:
+    """
+    Apply a function to every task, in worker processes when n_jobs > 1.
+
+    Args:
+        func: Picklable function run on each task
+        tasks: Tasks, consumed lazily
+        n_jobs: Worker processes (-1 for one per CPU, 1 to run in this process)
+        initializer: Called once per worker (or once here when n_jobs is 1)
+        initargs: Arguments for the initializer
+
+    Yields:
+        Tuples of (task, result) in task order
+    """
+    n_jobs = resolve_jobs(n_jobs)
+    if n_jobs == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield task, func(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=initializer, initargs=tuple(initargs)) as executor:
+        pending: deque = deque()
+        for task in tasks:
+            pending.append((task, executor.submit(func, task)))
+            if len(pending) >= IN_FLIGHT_PER_WORKER * n_jobs:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
@@ -4,14 +4,108 @@ Airport Data Service for Flight Delay Prediction API
 Handles loading and serving airport data from the CSV file.
 """
 
-import pandas as pd
+import csv
+import json
+import numpy as np
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+from utils.arrays import as_int64_array
+from utils.http_cache import PrecompressedBody
 
 logger = logging.getLogger(__name__)
 
+# CSV column -> AirportRecord field it is loaded into
+_RECORD_FIELDS = {
+    'AirportID': 'id',
+    'AirportName': 'name',
+    'AirportCode': 'code',
+    'CityName': 'city',
+    'State': 'state',
+    'ModelAirportID': 'model_id'
+}
+
+# CSV values the loader treats as missing
+_MISSING_VALUES = frozenset({'', 'NA', 'N/A', 'NaN', 'nan', 'NULL', 'null', 'None'})
+
+
+class AirportRecord:
+    """Compact, immutable airport record used for in-memory lookups."""
+    
+    __slots__ = ('id', 'name', 'code', 'city', 'state', 'model_id')
+    
+    def __init__(self, id: int, name: str, code: Optional[str], city: Optional[str],
+                 state: Optional[str], model_id: Optional[int]):
+        for field, value in zip(self.__slots__, (id, name, code, city, state, model_id)):
+            object.__setattr__(self, field, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __repr__(self) -> str:
+        return f"AirportRecord(id={self.id}, code={self.code!r}, name={self.name!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to the airport dictionary format used by the API.
+        
+        Returns:
+            Airport dictionary including the model ID
+        """
+        return {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'city': self.city,
+            'state': self.state,
+            'modelId': self.model_id
+        }
+
+
+def _optional_str(value: Optional[str]) -> Optional[str]:
+    """Return a CSV value, mapping missing values to None."""
+    return None if value is None or value in _MISSING_VALUES else value
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    """Convert a CSV value such as '10140' or '10140.0' to int, mapping missing values to None."""
+    value = _optional_str(value)
+    return int(float(value)) if value is not None else None
+
+
+def _column_types(columns: Sequence[str], records: Iterable[AirportRecord]) -> Dict[str, str]:
+    """
+    Describe the type each CSV column is served as.
+    
+    Columns loaded into AirportRecord fields report the Python types of the
+    loaded values ('int', 'str', with ' | None' when some are missing). Other
+    columns are not loaded and remain the strings the csv module read.
+    
+    Args:
+        columns: CSV header
+        records: Loaded airport records
+        
+    Returns:
+        Mapping of column name to type description
+    """
+    records = list(records)
+    types = {}
+    for column in columns:
+        field = _RECORD_FIELDS.get(column)
+        if field is None:
+            types[column] = 'str'
+            continue
+        values = [getattr(record, field) for record in records]
+        names = sorted({type(value).__name__ for value in values if value is not None})
+        if any(value is None for value in values):
+            names.append('None')
+        types[column] = ' | '.join(names) or 'None'
+    return types
+
+
 class AirportService:
     """Service for loading and managing airport data."""
     
@@ -23,8 +117,19 @@ class AirportService:
             airports_path: Path to the airports CSV file
         """
         self.airports_path = Path(airports_path)
-        self.airports_df = None
-        self._airports_cache = None
+        # (index, value) pairs: derived data is rebuilt when the index changes
+        self._airports_cache: Optional[Tuple[Mapping[int, AirportRecord], List[Dict[str, Any]]]] = None
+        self._airports_body: Optional[Tuple[Mapping[int, AirportRecord], PrecompressedBody]] = None
+        # CSV header and the type each column is served as, for the dataset summary
+        self._columns: List[str] = []
+        self._column_types: Dict[str, str] = {}
+        # Immutable AirportID -> AirportRecord index built by load_airports()
+        self._airport_index: Optional[Mapping[int, AirportRecord]] = None
+        # Sorted ID arrays mirroring the index for vectorized lookups
+        self._sorted_airport_ids: Optional[np.ndarray] = None
+        self._sorted_model_ids: Optional[np.ndarray] = None
+        self._sorted_records: Tuple[AirportRecord, ...] = ()
+        self._load_lock = threading.Lock()
         
     def load_airports(self) -> bool:
         """
@@ -36,19 +141,32 @@ class AirportService:
         try:
             logger.info(f"Loading airports data from {self.airports_path}")
             
-            # Load the CSV file
-            self.airports_df = pd.read_csv(self.airports_path)
+            # Load the CSV file with the csv module
+            with open(self.airports_path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                columns = list(reader.fieldnames or [])
+                rows = list(reader)
             
             # Clean and validate data
-            self.airports_df = self.airports_df.dropna(subset=['AirportID', 'AirportName'])
+            rows = [
+                row for row in rows
+                if _optional_str(row.get('AirportID')) is not None and _optional_str(row.get('AirportName')) is not None
+            ]
             
             # Sort by airport name for consistent ordering
-            self.airports_df = self.airports_df.sort_values('AirportName')
+            rows.sort(key=lambda row: row['AirportName'])
+            
+            # Build the in-memory index used by all ID lookups
+            self._airport_index = self._build_airport_index(rows)
+            self._build_sorted_arrays()
+            self._columns = columns
+            self._column_types = _column_types(columns, self._airport_index.values())
             
-            logger.info(f"Loaded {len(self.airports_df)} airports successfully")
+            logger.info(f"Loaded {len(rows)} airports successfully")
             
-            # Clear cache to force refresh
+            # Clear caches to force refresh
             self._airports_cache = None
+            self._airports_body = None
             
             return True
             
@@ -56,62 +174,294 @@ class AirportService:
             logger.error(f"Failed to load airports data: {e}")
             return False
     
-    @lru_cache(maxsize=1)
+    def export_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Export the loaded airport data as plain arrays for sharing between processes.
+        
+        Returns:
+            Tuple of (arrays, metadata): one array per record field in index
+            order, the ID-sorted lookup arrays, and the CSV columns and types
+            
+        Raises:
+            RuntimeError: If airport data is not loaded
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Airports data not loaded")
+        
+        records = list(self._airport_index.values())
+        arrays = {
+            'id': np.array([record.id for record in records], dtype=np.int64),
+            'model_id': np.array([record.model_id if record.model_id is not None else -1 for record in records],
+                                 dtype=np.int64),
+            'sorted_airport_ids': self._sorted_airport_ids,
+            'sorted_model_ids': self._sorted_model_ids
+        }
+        # Fixed-width strings; missing values are stored as empty strings
+        for field in ('name', 'code', 'city', 'state'):
+            arrays[field] = np.array([getattr(record, field) or '' for record in records], dtype=np.str_)
+        return arrays, {'columns': list(self._columns), 'columnTypes': dict(self._column_types)}
+    
+    def load_from_arrays(self, arrays: Mapping[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+        """
+        Load airport data exported by export_arrays(), e.g. from shared memory.
+        
+        The ID-sorted lookup arrays are used in place without copying.
+        
+        Args:
+            arrays: Arrays from export_arrays()
+            metadata: Metadata from export_arrays()
+        """
+        index = {}
+        columns = zip(arrays['id'].tolist(), arrays['model_id'].tolist(), arrays['name'].tolist(),
+                      arrays['code'].tolist(), arrays['city'].tolist(), arrays['state'].tolist())
+        for airport_id, model_id, name, code, city, state in columns:
+            index[airport_id] = AirportRecord(
+                id=airport_id,
+                name=name,
+                code=code or None,
+                city=city or None,
+                state=state or None,
+                model_id=model_id if model_id >= 0 else None
+            )
+        
+        self._airport_index = MappingProxyType(index)
+        self._sorted_records = tuple(index[airport_id] for airport_id in arrays['sorted_airport_ids'].tolist())
+        self._sorted_airport_ids = arrays['sorted_airport_ids']
+        self._sorted_model_ids = arrays['sorted_model_ids']
+        self._columns = list(metadata.get('columns', []))
+        self._column_types = dict(metadata.get('columnTypes', {}))
+        self._airports_cache = None
+        self._airports_body = None
+        logger.info(f"Loaded {len(index)} airports from shared state")
+    
+    def ensure_loaded(self) -> bool:
+        """
+        Load airports data unless already loaded.
+        
+        Thread-safe: concurrent callers wait for a single load instead of
+        each reading the CSV.
+        
+        Returns:
+            bool: True if data is loaded, False otherwise
+        """
+        if self.is_loaded:
+            return True
+        with self._load_lock:
+            if self.is_loaded:
+                return True
+            return self.load_airports()
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether airport data has been loaded."""
+        return self._airport_index is not None
+    
+    @property
+    def data_version(self) -> Optional[Mapping[int, AirportRecord]]:
+        """
+        Token identifying the loaded airport data.
+        
+        A new object after every successful load_airports(); compare with
+        `is` to detect that data derived from airports is stale.
+        """
+        return self._airport_index
+    
     def get_all_airports(self) -> List[Dict[str, Any]]:
         """
         Get all airports as a list of dictionaries, sorted alphabetically by name.
         
+        The list is built once per load of the airports data and shared
+        between callers, so it must not be modified.
+        
         Returns:
             List of airport dictionaries with id and name
         """
-        if self.airports_df is None:
+        index = self._airport_index
+        if index is None:
             raise RuntimeError("Airports data not loaded. Call load_airports() first.")
         
+        cached = self._airports_cache
+        if cached is not None and cached[0] is index:
+            return cached[1]
+        
         # Convert to list of dictionaries
-        airports_list = []
-        for _, row in self.airports_df.iterrows():
-            airport = {
-                'id': int(row['AirportID']),
-                'name': str(row['AirportName']),
-                'code': str(row['AirportCode']) if pd.notna(row['AirportCode']) else None,
-                'city': str(row['CityName']) if pd.notna(row['CityName']) else None,
-                'state': str(row['State']) if pd.notna(row['State']) else None
+        airports_list = [
+            {
+                'id': record.id,
+                'name': record.name,
+                'code': record.code,
+                'city': record.city,
+                'state': record.state
             }
-            airports_list.append(airport)
+            for record in index.values()
+        ]
         
         # Sort by name (already sorted in load_airports, but ensure consistency)
         airports_list.sort(key=lambda x: x['name'])
         
-        logger.debug(f"Returning {len(airports_list)} airports")
+        self._airports_cache = (index, airports_list)
+        logger.debug(f"Built airports list with {len(airports_list)} airports")
         return airports_list
     
-    def get_airport_by_id(self, airport_id: int) -> Optional[Dict[str, Any]]:
+    def get_airports_body(self) -> PrecompressedBody:
         """
-        Get airport information by ID.
+        Get the serialized GET /airports response body.
+        
+        The JSON body and its compressed variants are built once per load of
+        the airports data.
+        
+        Returns:
+            PrecompressedBody with the AirportsResponse JSON
+        """
+        index = self._airport_index
+        if index is None:
+            raise RuntimeError("Airports data not loaded. Call load_airports() first.")
+        
+        cached = self._airports_body
+        if cached is not None and cached[0] is index:
+            return cached[1]
+        
+        airports_list = self.get_all_airports()
+        body = json.dumps(
+            {"airports": airports_list, "total": len(airports_list)},
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+        payload = PrecompressedBody(body)
+        self._airports_body = (index, payload)
+        logger.debug(f"Serialized airports response: {len(body)} bytes")
+        return payload
+    
+    @staticmethod
+    def _build_airport_index(rows: Iterable[Dict[str, str]]) -> Mapping[int, AirportRecord]:
+        """
+        Build an immutable AirportID -> AirportRecord index from the airports data.
         
         Args:
-            airport_id: The airport ID to search for
+            rows: Cleaned airport CSV rows
             
         Returns:
-            Airport dictionary or None if not found
+            Read-only mapping from airport ID to record
+        """
+        index = {}
+        for row in rows:
+            airport_id = _optional_int(row['AirportID'])
+            if airport_id in index:
+                logger.warning(f"Duplicate airport ID {airport_id} in airports data, keeping first")
+                continue
+            index[airport_id] = AirportRecord(
+                id=airport_id,
+                name=row['AirportName'],
+                code=_optional_str(row.get('AirportCode')),
+                city=_optional_str(row.get('CityName')),
+                state=_optional_str(row.get('State')),
+                model_id=_optional_int(row.get('ModelAirportID'))
+            )
+        return MappingProxyType(index)
+    
+    def _build_sorted_arrays(self) -> None:
+        """Build sorted airport/model ID arrays from the airport index."""
+        self._sorted_records = tuple(
+            self._airport_index[airport_id] for airport_id in sorted(self._airport_index)
+        )
+        self._sorted_airport_ids = np.array([record.id for record in self._sorted_records], dtype=np.int64)
+        # -1 marks airports without a model mapping
+        self._sorted_model_ids = np.array(
+            [record.model_id if record.model_id is not None else -1 for record in self._sorted_records],
+            dtype=np.int64
+        )
+        for array in (self._sorted_airport_ids, self._sorted_model_ids):
+            array.flags.writeable = False
+    
+    def _locate_airports(self, airport_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
         """
-        if self.airports_df is None:
+        Find positions of airport IDs in the sorted ID array.
+        
+        Args:
+            airport_ids: Real airport IDs to locate
+            
+        Returns:
+            Tuple of (positions, found mask)
+        """
+        if self._sorted_airport_ids is None:
             raise RuntimeError("Airports data not loaded. Call load_airports() first.")
         
-        airport_row = self.airports_df[self.airports_df['AirportID'] == airport_id]
+        # IDs beyond int64 cannot belong to any airport; they are reported as not found
+        ids, in_range = as_int64_array(airport_ids)
+        if len(self._sorted_airport_ids) == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
         
-        if airport_row.empty:
-            return None
+        positions = np.searchsorted(self._sorted_airport_ids, ids)
+        positions = np.minimum(positions, len(self._sorted_airport_ids) - 1)
+        return positions, (self._sorted_airport_ids[positions] == ids) & in_range
+    
+    def resolve_model_ids(self, airport_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map many real airport IDs to model airport IDs without building records.
         
-        row = airport_row.iloc[0]
-        return {
-            'id': int(row['AirportID']),
-            'name': str(row['AirportName']),
-            'code': str(row['AirportCode']) if pd.notna(row['AirportCode']) else None,
-            'city': str(row['CityName']) if pd.notna(row['CityName']) else None,
-            'state': str(row['State']) if pd.notna(row['State']) else None,
-            'modelId': int(row['ModelAirportID']) if pd.notna(row['ModelAirportID']) else None
-        }
+        Args:
+            airport_ids: Real airport IDs to resolve
+            
+        Returns:
+            Tuple of (found mask, model_ids); model_ids holds -1 when the
+            airport is unknown or has no model mapping
+        """
+        positions, found = self._locate_airports(airport_ids)
+        if len(self._sorted_model_ids) == 0:
+            return found, np.full(len(found), -1, dtype=np.int64)
+        return found, np.where(found, self._sorted_model_ids[positions], -1)
+    
+    def lookup_airports(self, airport_ids: Sequence[int]) -> Tuple[List[Optional[AirportRecord]], np.ndarray]:
+        """
+        Resolve many airport IDs with one vectorized sorted-array lookup.
+        
+        Args:
+            airport_ids: Real airport IDs to resolve
+            
+        Returns:
+            Tuple of (records, model_ids): records holds the AirportRecord or
+            None per input, model_ids holds the model airport ID or -1 when
+            the airport is unknown or has no model mapping
+        """
+        positions, found = self._locate_airports(airport_ids)
+        if len(self._sorted_model_ids) == 0:
+            return [None] * len(found), np.full(len(found), -1, dtype=np.int64)
+        
+        model_ids = np.where(found, self._sorted_model_ids[positions], -1)
+        records = [
+            self._sorted_records[position] if is_found else None
+            for position, is_found in zip(positions.tolist(), found.tolist())
+        ]
+        return records, model_ids
+    
+    def get_airport_record(self, airport_id: int) -> Optional[AirportRecord]:
+        """
+        Get the indexed airport record for an ID.
+        
+        Args:
+            airport_id: The airport ID to look up
+            
+        Returns:
+            AirportRecord or None if not found
+        """
+        if self._airport_index is None:
+            raise RuntimeError("Airports data not loaded. Call load_airports() first.")
+        
+        return self._airport_index.get(airport_id)
+    
+    def get_airport_by_id(self, airport_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get airport information by ID.
+        
+        Args:
+            airport_id: The airport ID to search for
+            
+        Returns:
+            Airport dictionary or None if not found
+        """
+        record = self.get_airport_record(airport_id)
+        return record.to_dict() if record is not None else None
     
     def get_model_airport_id(self, airport_id: int) -> Optional[int]:
         """
@@ -124,16 +474,20 @@ class AirportService:
         Returns:
             Model airport ID or None if not found
         """
-        if self.airports_df is None:
-            raise RuntimeError("Airports data not loaded. Call load_airports() first.")
-        
-        airport_row = self.airports_df[self.airports_df['AirportID'] == airport_id]
+        record = self.get_airport_record(airport_id)
+        return record.model_id if record is not None else None
+    
+    def get_model_airport_ids(self) -> List[int]:
+        """
+        Get all model airport IDs known to the airports dataset.
         
-        if airport_row.empty:
-            return None
+        Returns:
+            List of model airport IDs (airports without a mapping are skipped)
+        """
+        if self._airport_index is None:
+            raise RuntimeError("Airports data not loaded. Call load_airports() first.")
         
-        model_id = airport_row.iloc[0]['ModelAirportID']
-        return int(model_id) if pd.notna(model_id) else None
+        return [record.model_id for record in self._airport_index.values() if record.model_id is not None]
     
     def validate_airport_id(self, airport_id: int) -> bool:
         """
@@ -145,10 +499,10 @@ class AirportService:
         Returns:
             True if airport exists, False otherwise
         """
-        if self.airports_df is None:
+        if self._airport_index is None:
             return False
         
-        return not self.airports_df[self.airports_df['AirportID'] == airport_id].empty
+        return airport_id in self._airport_index
     
     def get_airports_summary(self) -> Dict[str, Any]:
         """
@@ -157,14 +511,14 @@ class AirportService:
         Returns:
             Dictionary with dataset summary information
         """
-        if self.airports_df is None:
+        if not self.is_loaded:
             return {"status": "Airports data not loaded"}
         
         return {
             "status": "loaded",
-            "totalAirports": len(self.airports_df),
-            "columns": list(self.airports_df.columns),
-            "dataTypes": {col: str(dtype) for col, dtype in self.airports_df.dtypes.items()},
+            "totalAirports": len(self._airport_index),
+            "columns": list(self._columns),
+            "dataTypes": dict(self._column_types),
             "sampleAirports": self.get_all_airports()[:5]  # First 5 airports as sample
         }
 
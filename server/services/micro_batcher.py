@@ -0,0 +1,170 @@
+"""
+Micro-Batching for Live Model Inference
+
+Single predictions that miss the probability table need a live model call,
+whose fixed cost (input validation, array conversion, a worker pool hop)
+dwarfs the work for one row. The MicroBatcher collects concurrent rows on
+the event loop for up to MICROBATCH_MAX_ROWS rows or MICROBATCH_MAX_WAIT_US
+microseconds and scores them with one vectorized call in the worker pool,
+then hands each awaiting request its own result.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils import metrics
+from utils.executor import run_in_executor
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 64
+DEFAULT_MAX_WAIT_US = 500
+
+BATCH_SIZE = Histogram(
+    "flight_delay_microbatch_size_rows",
+    "Rows scored per micro-batched live model call.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+).labels()
+QUEUE_SECONDS = Histogram(
+    "flight_delay_microbatch_queue_seconds",
+    "Time a row waited in the micro-batcher before its batch was scored.",
+    buckets=(5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 0.1)
+).labels()
+
+
+def _env_int(name: str, default: int, minimum: int) -> int:
+    """Read an integer setting, falling back to the default when unset or invalid."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return max(minimum, int(value))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}")
+        return default
+
+
+def get_batch_settings() -> Tuple[int, int]:
+    """
+    Get the micro-batching limits.
+
+    Configured with MICROBATCH_MAX_ROWS (default 64; 1 scores every row on
+    its own) and MICROBATCH_MAX_WAIT_US (default 500).
+
+    Returns:
+        Tuple of (maximum rows per batch, maximum wait in microseconds)
+    """
+    return (_env_int("MICROBATCH_MAX_ROWS", DEFAULT_MAX_ROWS, 1),
+            _env_int("MICROBATCH_MAX_WAIT_US", DEFAULT_MAX_WAIT_US, 0))
+
+
+class _PendingRow:
+    """One row waiting to be scored."""
+
+    __slots__ = ("day", "model_id", "snapshot", "future", "queued_at")
+
+    def __init__(self, day: int, model_id: int, snapshot, future: asyncio.Future):
+        self.day = day
+        self.model_id = model_id
+        self.snapshot = snapshot
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row model calls into vectorized calls."""
+
+    def __init__(self, model_service, max_rows: Optional[int] = None, max_wait_us: Optional[int] = None):
+        """
+        Create a micro-batcher.
+
+        Args:
+            model_service: ModelService whose predict_proba_batch() scores the rows
+            max_rows: Rows that trigger an immediate flush (defaults to MICROBATCH_MAX_ROWS)
+            max_wait_us: Longest the first row of a batch waits for more rows
+                (defaults to MICROBATCH_MAX_WAIT_US)
+        """
+        default_rows, default_wait = get_batch_settings()
+        self.model_service = model_service
+        self.max_rows = max_rows if max_rows is not None else default_rows
+        self.max_wait = (max_wait_us if max_wait_us is not None else default_wait) / 1e6
+        self._pending: List[_PendingRow] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # The loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def predict(self, day_of_week: int, model_airport_id: int, snapshot) -> Tuple[float, float, bool]:
+        """
+        Score one row as part of the next batch.
+
+        Must be called on the event loop. Rows are only batched with rows
+        for the same model snapshot, so a reload never mixes two models.
+
+        Args:
+            day_of_week: Day of week (1=Monday, 7=Sunday)
+            model_airport_id: Model airport ID
+            snapshot: Model snapshot to score with
+
+        Returns:
+            Tuple of (no_delay_probability, delay_probability, is_delayed)
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Rows and timers never carry over to a different event loop
+            self._loop, self._pending, self._flush_handle = loop, [], None
+
+        future = loop.create_future()
+        self._pending.append(_PendingRow(day_of_week, model_airport_id, snapshot, future))
+        if len(self._pending) >= self.max_rows:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Start scoring everything pending; runs on the event loop."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        rows, self._pending = self._pending, []
+
+        groups: Dict[int, List[_PendingRow]] = {}
+        for row in rows:
+            groups.setdefault(id(row.snapshot), []).append(row)
+        for group in groups.values():
+            task = asyncio.ensure_future(self._score(group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, rows: List[_PendingRow]) -> None:
+        """Score one batch in the worker pool and resolve its futures."""
+        if metrics.ENABLED:
+            started = time.perf_counter()
+            BATCH_SIZE.observe(len(rows))
+            for row in rows:
+                QUEUE_SECONDS.observe(started - row.queued_at)
+
+        try:
+            probabilities, predictions = await run_in_executor(
+                self.model_service.predict_proba_batch,
+                np.fromiter((row.day for row in rows), dtype=np.int64, count=len(rows)),
+                np.fromiter((row.model_id for row in rows), dtype=np.int64, count=len(rows)),
+                snapshot=rows[0].snapshot
+            )
+        except Exception as e:
+            for row in rows:
+                if not row.future.done():
+                    row.future.set_exception(e)
+            return
+
+        for row, (no_delay, delay), predicted in zip(rows, probabilities.tolist(), predictions.tolist()):
+            # A request whose client went away has already been cancelled
+            if not row.future.done():
+                row.future.set_result((no_delay, delay, predicted == 1))
@@ -4,30 +4,413 @@ Model Service for Flight Delay Prediction
 Handles loading and serving the machine learning model for flight delay predictions.
 """
 
+import hashlib
+import json
 import pickle
-import joblib
 import logging
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Tuple
-import pandas as pd
+from typing import Dict, Any, Optional, Tuple, Union
+import numpy as np
+
+from utils.startup import timed, timed_import
 
 logger = logging.getLogger(__name__)
 
+# Version of the compiled .npz model artifact layout
+COMPILED_FORMAT_VERSION = 1
+
+# Kinds of compiled artifacts: linear coefficients or a day x airport probability table
+COMPILED_KIND_LINEAR = 'linear'
+COMPILED_KIND_TABLE = 'table'
+
+DAYS_OF_WEEK = 7
+
+
+def _file_sha256(path: Path) -> str:
+    """Compute the SHA-256 hex digest of a file."""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class CompiledLogisticModel:
+    """
+    NumPy-only scorer for a binary logistic regression model.
+    
+    Mirrors the parts of the scikit-learn estimator interface used by
+    ModelService (predict, predict_proba, classes_) so serving does not need
+    to import scikit-learn or SciPy.
+    """
+    
+    def __init__(self, coef: np.ndarray, intercept: float, classes: np.ndarray):
+        """
+        Initialize the compiled model.
+        
+        Args:
+            coef: Coefficients, one per feature
+            intercept: Intercept term
+            classes: Class labels in model order ([negative, positive])
+        """
+        self.coef_ = np.asarray(coef, dtype=np.float64).reshape(-1)
+        self.intercept_ = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = len(self.coef_)
+    
+    def decision_function(self, X) -> np.ndarray:
+        """Compute the linear decision value for each row."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input with {self.n_features_in_} features, got shape {X.shape}")
+        return X @ self.coef_ + self.intercept_
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Compute [negative, positive] class probabilities for each row."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack((1.0 - positive, positive))
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict the class label for each row."""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+class CompiledTableModel:
+    """
+    NumPy-only scorer backed by a day x airport table of delay probabilities.
+    
+    Used for models whose features are encoded (one-hot or target encoded
+    airports): the model is still a function of (day, airport) only, so it
+    is evaluated once per cell at export time. Airports outside the table
+    use the model's per-day output for an unseen airport.
+    """
+    
+    def __init__(self, airport_ids: np.ndarray, delay_probability: np.ndarray,
+                 unknown_airport_probability: np.ndarray, classes: np.ndarray):
+        """
+        Initialize the compiled model.
+        
+        Args:
+            airport_ids: Sorted airport IDs, one per table column
+            delay_probability: Array of shape (7, n_airports) with delay probabilities
+            unknown_airport_probability: Array of shape (7,) for airports not in the table
+            classes: Class labels in model order ([negative, positive])
+        """
+        self.airport_ids = np.asarray(airport_ids, dtype=np.int64)
+        self.delay_probability = np.asarray(delay_probability, dtype=np.float64)
+        self.unknown_airport_probability = np.asarray(unknown_airport_probability, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = 2
+        if self.delay_probability.shape != (DAYS_OF_WEEK, len(self.airport_ids)):
+            raise ValueError(f"Probability table must have shape ({DAYS_OF_WEEK}, {len(self.airport_ids)})")
+    
+    def _delay_probability(self, X) -> np.ndarray:
+        """Look up the delay probability of each [day, airport] row."""
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input with {self.n_features_in_} features, got shape {X.shape}")
+        days = X[:, 0].astype(np.int64)
+        airports = X[:, 1].astype(np.int64)
+        if np.any((days < 1) | (days > DAYS_OF_WEEK)):
+            raise ValueError(f"Day of week must be between 1 and {DAYS_OF_WEEK}")
+        
+        rows = days - 1
+        columns = np.minimum(np.searchsorted(self.airport_ids, airports), max(len(self.airport_ids) - 1, 0))
+        if len(self.airport_ids) == 0:
+            return self.unknown_airport_probability[rows]
+        known = self.airport_ids[columns] == airports
+        return np.where(known, self.delay_probability[rows, columns], self.unknown_airport_probability[rows])
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Look up [negative, positive] class probabilities for each row."""
+        positive = self._delay_probability(X)
+        return np.column_stack((1.0 - positive, positive))
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict the class label for each row."""
+        return self.classes_[(self._delay_probability(X) > 0.5).astype(int)]
+
+
+def _is_raw_linear(model) -> bool:
+    """Whether a model is a binary linear classifier over the raw [day, airport] features."""
+    coef = getattr(model, 'coef_', None)
+    return (coef is not None and getattr(model, 'intercept_', None) is not None
+            and len(model.classes_) == 2 and coef.shape == (1, 2))
+
+
+def _model_airport_ids(model, model_data: Dict[str, Any]) -> np.ndarray:
+    """Airport IDs a model was trained on, from the model data or its encoder."""
+    airport_ids = model_data.get('airport_ids')
+    if airport_ids is None:
+        steps = getattr(model, 'named_steps', {})
+        airport_ids = getattr(steps.get('encode'), 'airport_ids_', None)
+    if airport_ids is None:
+        raise ValueError(f"Cannot compile {type(model).__name__}: the model data has no airport_ids")
+    return np.unique(np.asarray(airport_ids, dtype=np.int64))
+
+
+def compiled_model_arrays(model, model_data: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, np.ndarray]]:
+    """
+    Get the arrays that make up the compiled form of a model.
+    
+    Args:
+        model: Compiled model, or a scikit-learn binary classifier over
+            [day, airport]
+        model_data: Pickled model data, needed to compile models with
+            encoded airports
+        
+    Returns:
+        Tuple of (compiled kind, arrays including the class labels)
+        
+    Raises:
+        ValueError: If the model is not a binary classifier over [day, airport]
+    """
+    if isinstance(model, CompiledLogisticModel):
+        return COMPILED_KIND_LINEAR, {
+            'coef': model.coef_,
+            'intercept': np.array([model.intercept_]),
+            'classes': model.classes_
+        }
+    if isinstance(model, CompiledTableModel):
+        return COMPILED_KIND_TABLE, {
+            'airport_ids': model.airport_ids,
+            'delay_probability': model.delay_probability,
+            'unknown_airport_probability': model.unknown_airport_probability,
+            'classes': model.classes_
+        }
+    
+    if len(getattr(model, 'classes_', ())) != 2:
+        raise ValueError(f"Cannot compile {type(model).__name__}: only binary classifiers are supported")
+    
+    if _is_raw_linear(model):
+        return COMPILED_KIND_LINEAR, {
+            'coef': np.asarray(model.coef_, dtype=np.float64).reshape(-1),
+            'intercept': np.asarray(model.intercept_, dtype=np.float64).reshape(-1),
+            'classes': np.asarray(model.classes_)
+        }
+    
+    airport_ids = _model_airport_ids(model, model_data or {})
+    days = np.arange(1, DAYS_OF_WEEK + 1)
+    grid = np.column_stack((np.repeat(days, len(airport_ids)), np.tile(airport_ids, DAYS_OF_WEEK)))
+    # Scored with an ID no airport has, for airports added after training
+    unknown = np.column_stack((days, np.full(DAYS_OF_WEEK, -1)))
+    return COMPILED_KIND_TABLE, {
+        'airport_ids': airport_ids,
+        'delay_probability': model.predict_proba(grid)[:, 1].reshape(DAYS_OF_WEEK, len(airport_ids)),
+        'unknown_airport_probability': model.predict_proba(unknown)[:, 1],
+        'classes': np.asarray(model.classes_)
+    }
+
+
+def build_compiled_model(kind: str, arrays) -> Union[CompiledLogisticModel, CompiledTableModel]:
+    """
+    Build a compiled model from its arrays.
+    
+    Args:
+        kind: Compiled kind (linear or table)
+        arrays: Mapping with the arrays returned by compiled_model_arrays()
+        
+    Returns:
+        Compiled model
+        
+    Raises:
+        ValueError: If the kind is not supported
+    """
+    if kind == COMPILED_KIND_LINEAR:
+        return CompiledLogisticModel(
+            coef=arrays['coef'],
+            intercept=float(arrays['intercept'][0]),
+            classes=arrays['classes']
+        )
+    if kind == COMPILED_KIND_TABLE:
+        return CompiledTableModel(
+            airport_ids=arrays['airport_ids'],
+            delay_probability=arrays['delay_probability'],
+            unknown_airport_probability=arrays['unknown_airport_probability'],
+            classes=arrays['classes']
+        )
+    raise ValueError(f"Unsupported compiled model kind: {kind}")
+
+
+def export_compiled_model(model_path: Union[str, Path], output_path: Union[str, Path]) -> Path:
+    """
+    Export a pickled logistic regression model to a compact .npz artifact.
+    
+    Linear models over the raw [day, airport] features are stored as their
+    coefficients and intercept. Other models (e.g. with one-hot encoded
+    airports) are evaluated for every day x airport cell and stored as a
+    probability table. Either way the artifact holds the class order and the
+    metadata ModelService exposes, and can be loaded with NumPy alone.
+    
+    Args:
+        model_path: Path to the pickled model data (model.pkl)
+        output_path: Path of the .npz artifact to write
+        
+    Returns:
+        Path of the written artifact
+        
+    Raises:
+        ValueError: If the model is not a binary classifier over [day, airport]
+    """
+    model_path = Path(model_path)
+    output_path = Path(output_path)
+    
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    
+    kind, arrays = compiled_model_arrays(model_data['model_object'], model_data)
+    
+    accuracy = model_data.get('accuracy')
+    training_samples = model_data.get('training_samples')
+    metadata = {
+        'format_version': COMPILED_FORMAT_VERSION,
+        'kind': kind,
+        'source_sha256': _file_sha256(model_path),
+        'compiled_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'model_type': model_data.get('model_type'),
+        'accuracy': float(accuracy) if accuracy is not None else None,
+        'model_version': model_data.get('model_version', '1.0'),
+        'training_samples': int(training_samples) if training_samples is not None else None,
+        'export_date': model_data.get('export_date'),
+        'features': list(model_data.get('features', ['DayOfWeek', 'OriginAirport_Model']))
+    }
+    
+    with open(output_path, 'wb') as f:
+        np.savez(f, metadata=np.array(json.dumps(metadata)), **arrays)
+    
+    logger.info(f"Exported compiled model to {output_path}")
+    return output_path
+
+
+def load_compiled_model(path: Union[str, Path]) -> Tuple[Union[CompiledLogisticModel, CompiledTableModel], Dict[str, Any]]:
+    """
+    Load a compiled .npz model artifact.
+    
+    Args:
+        path: Path to the .npz artifact
+        
+    Returns:
+        Tuple of (compiled model, metadata dictionary)
+        
+    Raises:
+        ValueError: If the artifact format is not supported
+    """
+    with np.load(path, allow_pickle=False) as artifact:
+        metadata = json.loads(str(artifact['metadata']))
+        if metadata.get('format_version') != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format: {metadata.get('format_version')}")
+        model = build_compiled_model(metadata.get('kind', COMPILED_KIND_LINEAR), artifact)
+    return model, metadata
+
+class ModelSnapshot:
+    """
+    Immutable view of a loaded model and its precomputed lookup structures.
+    
+    ModelService serves from a single snapshot reference; reloading builds a
+    new snapshot and swaps the reference, so in-flight predictions keep using
+    the snapshot they started with and the read path takes no lock.
+    """
+    
+    __slots__ = ('model_object', 'model_data', 'features', 'metadata', 'model_info', 'table', 'source', 'loaded_at')
+    
+    def __init__(self, model_object, model_data: Optional[Dict[str, Any]], features, metadata: Dict[str, Any],
+                 source: Path, table=None, loaded_at: Optional[str] = None):
+        values = {
+            'model_object': model_object,
+            'model_data': model_data,
+            'features': features,
+            'metadata': metadata,
+            # Plain Python types so the info can be serialized directly
+            'model_info': {
+                'modelType': metadata.get('model_type'),
+                'accuracy': float(metadata['accuracy']) if metadata.get('accuracy') is not None else None,
+                'version': metadata.get('version')
+            },
+            'table': table,
+            'source': source,
+            'loaded_at': loaded_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        for field, value in values.items():
+            object.__setattr__(self, field, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def with_table(self, table) -> "ModelSnapshot":
+        """
+        Create a copy of this snapshot with a different probability table.
+        
+        Args:
+            table: ProbabilityTable for this model, or None
+            
+        Returns:
+            New ModelSnapshot sharing the same model
+        """
+        return ModelSnapshot(
+            model_object=self.model_object,
+            model_data=self.model_data,
+            features=self.features,
+            metadata=self.metadata,
+            source=self.source,
+            table=table,
+            loaded_at=self.loaded_at
+        )
+
+
 class ModelService:
     """Service for loading and using the flight delay prediction model."""
     
-    def __init__(self, model_path: str = "../models/model.pkl"):
+    def __init__(self, model_path: str = "../models/model.pkl", compiled_path: Optional[str] = "../models/model.npz"):
         """
         Initialize the model service.
         
         Args:
             model_path: Path to the model file
+            compiled_path: Path to the compiled NumPy artifact, preferred over
+                the pickle when it exists and was exported from it
         """
         self.model_path = Path(model_path)
-        self.model_data = None
-        self.model_object = None
-        self.features = None
-        self.metadata = {}
+        self.compiled_path = Path(compiled_path) if compiled_path else None
+        self._snapshot: Optional[ModelSnapshot] = None
+    
+    @property
+    def snapshot(self) -> Optional[ModelSnapshot]:
+        """The model snapshot currently being served."""
+        return self._snapshot
+    
+    @property
+    def model_object(self):
+        """The model currently being served (None until loaded)."""
+        snapshot = self._snapshot
+        return snapshot.model_object if snapshot is not None else None
+    
+    @property
+    def model_data(self) -> Optional[Dict[str, Any]]:
+        """Raw pickled model data (None when serving the compiled artifact)."""
+        snapshot = self._snapshot
+        return snapshot.model_data if snapshot is not None else None
+    
+    @property
+    def features(self):
+        """Input features of the current model."""
+        snapshot = self._snapshot
+        return snapshot.features if snapshot is not None else None
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata of the current model."""
+        snapshot = self._snapshot
+        return snapshot.metadata if snapshot is not None else {}
+    
+    def swap(self, snapshot: ModelSnapshot) -> Optional[ModelSnapshot]:
+        """
+        Atomically replace the served model snapshot.
+        
+        Args:
+            snapshot: Fully built snapshot to serve from now on
+            
+        Returns:
+            The previously served snapshot
+        """
+        previous, self._snapshot = self._snapshot, snapshot
+        return previous
         
     def load_model(self) -> bool:
         """
@@ -37,55 +420,171 @@ class ModelService:
             bool: True if model loaded successfully, False otherwise
         """
         try:
-            logger.info(f"Loading model from {self.model_path}")
-            
-            # Load the model data
-            with open(self.model_path, 'rb') as f:
-                self.model_data = pickle.load(f)
-            
-            # Extract model components
-            self.model_object = self.model_data['model_object']
-            self.features = self.model_data.get('features', ['DayOfWeek', 'OriginAirport_Model'])
-            
-            # Store metadata
-            self.metadata = {
-                'model_type': self.model_data.get('model_type'),
-                'accuracy': self.model_data.get('accuracy'),
-                'version': self.model_data.get('model_version', '1.0'),
-                'export_date': self.model_data.get('export_date'),
-                'training_samples': self.model_data.get('training_samples'),
-                'features': self.features
-            }
-            
-            logger.info(f"Model loaded successfully: {self.metadata['model_type']}")
-            logger.info(f"Model accuracy: {self.metadata['accuracy']}")
+            self.swap(self.load_snapshot())
             return True
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             return False
     
-    def predict_delay(self, day_of_week: int, airport_id: int) -> Dict[str, Any]:
+    def load_snapshot(self, model_path: Optional[Union[str, Path]] = None) -> ModelSnapshot:
+        """
+        Load a model into a new snapshot without serving it.
+        
+        Args:
+            model_path: Pickle (.pkl) or compiled (.npz) model to load; defaults
+                to the configured paths, preferring a fresh compiled artifact
+            
+        Returns:
+            ModelSnapshot for the loaded model
+            
+        Raises:
+            Exception: If the model cannot be loaded
+        """
+        if model_path is not None:
+            model_path = Path(model_path)
+            if model_path.suffix == '.npz':
+                return self._load_compiled_snapshot(model_path)
+            return self._load_pickle_snapshot(model_path)
+        
+        snapshot = self._try_compiled_snapshot()
+        if snapshot is not None:
+            return snapshot
+        return self._load_pickle_snapshot(self.model_path)
+    
+    def _load_pickle_snapshot(self, model_path: Path) -> ModelSnapshot:
+        """Load a pickled model into a snapshot."""
+        logger.info(f"Loading model from {model_path}")
+        
+        # Unpickling imports scikit-learn; import it first so the startup
+        # report separates the import from reading the model
+        timed_import('sklearn')
+        with open(model_path, 'rb') as f, timed("unpickle model"):
+            model_data = pickle.load(f)
+        
+        # Extract model components
+        features = model_data.get('features', ['DayOfWeek', 'OriginAirport_Model'])
+        
+        # Store metadata
+        metadata = {
+            'model_type': model_data.get('model_type'),
+            'accuracy': model_data.get('accuracy'),
+            'version': model_data.get('model_version', '1.0'),
+            'export_date': model_data.get('export_date'),
+            'training_samples': model_data.get('training_samples'),
+            'features': features
+        }
+        
+        logger.info(f"Model loaded successfully: {metadata['model_type']}")
+        logger.info(f"Model accuracy: {metadata['accuracy']}")
+        return ModelSnapshot(
+            model_object=model_data['model_object'],
+            model_data=model_data,
+            features=features,
+            metadata=metadata,
+            source=model_path
+        )
+    
+    def _try_compiled_snapshot(self) -> Optional[ModelSnapshot]:
+        """
+        Load the configured compiled artifact if it exists and matches the pickle.
+        
+        Returns:
+            ModelSnapshot, or None to fall back to the pickle
+        """
+        if self.compiled_path is None or not self.compiled_path.exists():
+            return None
+        
+        try:
+            snapshot = self._load_compiled_snapshot(self.compiled_path)
+        except Exception as e:
+            logger.warning(f"Failed to load compiled model {self.compiled_path}, loading pickle instead: {e}")
+            return None
+        
+        if self.model_path.exists() and snapshot.metadata.get('source_sha256') != _file_sha256(self.model_path):
+            logger.warning(f"Compiled model {self.compiled_path} is stale, loading {self.model_path} instead")
+            return None
+        return snapshot
+    
+    def _load_compiled_snapshot(self, compiled_path: Path) -> ModelSnapshot:
+        """Load a compiled .npz model artifact into a snapshot."""
+        logger.info(f"Loading compiled model from {compiled_path}")
+        
+        model, compiled_metadata = load_compiled_model(compiled_path)
+        features = compiled_metadata.get('features')
+        metadata = {
+            'model_type': compiled_metadata.get('model_type'),
+            'accuracy': compiled_metadata.get('accuracy'),
+            'version': compiled_metadata.get('model_version', '1.0'),
+            'export_date': compiled_metadata.get('export_date'),
+            'training_samples': compiled_metadata.get('training_samples'),
+            'features': features,
+            'source_sha256': compiled_metadata.get('source_sha256')
+        }
+        
+        logger.info(f"Model loaded successfully: {metadata['model_type']} (compiled)")
+        logger.info(f"Model accuracy: {metadata['accuracy']}")
+        return ModelSnapshot(
+            model_object=model,
+            model_data=None,
+            features=features,
+            metadata=metadata,
+            source=compiled_path
+        )
+    
+    def snapshot_from_arrays(self, kind: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any],
+                             source: Path, table=None) -> ModelSnapshot:
+        """
+        Build a snapshot from compiled model arrays, e.g. mapped from shared memory.
+        
+        Args:
+            kind: Compiled kind (linear or table)
+            arrays: Arrays from compiled_model_arrays()
+            metadata: Metadata of the model the arrays were compiled from
+            source: File the arrays were read from
+            table: ProbabilityTable for this model, or None
+            
+        Returns:
+            ModelSnapshot serving the compiled model
+        """
+        return ModelSnapshot(
+            model_object=build_compiled_model(kind, arrays),
+            model_data=None,
+            features=metadata.get('features'),
+            metadata=metadata,
+            source=source,
+            table=table
+        )
+    
+    def _require_snapshot(self, snapshot: Optional[ModelSnapshot]) -> ModelSnapshot:
+        """Resolve the snapshot to use, defaulting to the one being served."""
+        snapshot = snapshot if snapshot is not None else self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        return snapshot
+    
+    def predict_delay(self, day_of_week: int, airport_id: int, snapshot: Optional[ModelSnapshot] = None) -> Dict[str, Any]:
         """
         Predict flight delay probability.
         
         Args:
             day_of_week: Day of week (1=Monday, 7=Sunday)
             airport_id: Airport model ID (1-70)
+            snapshot: Model snapshot to use (defaults to the one being served)
             
         Returns:
             Dict containing prediction results
         """
-        if self.model_object is None:
-            raise RuntimeError("Model not loaded. Call load_model() first.")
+        snapshot = self._require_snapshot(snapshot)
+        model = snapshot.model_object
         
         try:
             # Prepare input data
             input_data = [[day_of_week, airport_id]]
             
             # Make prediction
-            prediction = self.model_object.predict(input_data)[0]
-            probabilities = self.model_object.predict_proba(input_data)[0]
+            prediction = model.predict(input_data)[0]
+            probabilities = model.predict_proba(input_data)[0]
             
             # Extract probabilities
             no_delay_prob = float(probabilities[0])
@@ -103,11 +602,7 @@ class ModelService:
                     'noDelayProbability': no_delay_prob
                 },
                 'confidence': confidence,
-                'modelInfo': {
-                    'modelType': self.metadata.get('model_type'),
-                    'accuracy': self.metadata.get('accuracy'),
-                    'version': self.metadata.get('version')
-                }
+                'modelInfo': dict(snapshot.model_info)
             }
             
             logger.debug(f"Prediction made for day={day_of_week}, airport={airport_id}: {delay_prob:.3f}")
@@ -116,7 +611,43 @@ class ModelService:
         except Exception as e:
             logger.error(f"Prediction failed: {e}")
             raise RuntimeError(f"Prediction failed: {e}")
-    
+
+    def predict_proba_batch(self, days_of_week: np.ndarray, airport_ids: np.ndarray,
+                            snapshot: Optional[ModelSnapshot] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score many (day, airport) rows with a single vectorized model call.
+
+        Args:
+            days_of_week: Array of days of week (1=Monday, 7=Sunday)
+            airport_ids: Array of airport model IDs, same length as days_of_week
+            snapshot: Model snapshot to use (defaults to the one being served)
+
+        Returns:
+            Tuple of (probabilities with shape (n, 2), predicted classes with shape (n,))
+        """
+        model = self._require_snapshot(snapshot).model_object
+
+        input_data = np.column_stack((days_of_week, airport_ids))
+        probabilities = model.predict_proba(input_data)
+        # Derive classes from the probabilities instead of a second predict() call
+        predictions = model.classes_[np.argmax(probabilities, axis=1)]
+        return probabilities, predictions
+
+    def get_model_info_summary(self, snapshot: Optional[ModelSnapshot] = None) -> Dict[str, Any]:
+        """
+        Get the compact model information included in every prediction.
+
+        Args:
+            snapshot: Model snapshot to describe (defaults to the one being served)
+
+        Returns:
+            Dict with modelType, accuracy and version
+        """
+        snapshot = snapshot if snapshot is not None else self._snapshot
+        if snapshot is None:
+            return {'modelType': None, 'accuracy': None, 'version': None}
+        return dict(snapshot.model_info)
+
     def get_model_info(self) -> Dict[str, Any]:
         """
         Get model metadata and information.
@@ -161,3 +692,15 @@ class ModelService:
 
 # Global model service instance
 model_service = ModelService()
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Export the pickled model to a compiled NumPy artifact")
+    parser.add_argument("--model", default="../models/model.pkl", help="Path to the pickled model data")
+    parser.add_argument("--output", default="../models/model.npz", help="Path of the .npz artifact to write")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    export_compiled_model(args.model, args.output)
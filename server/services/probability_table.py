@@ -0,0 +1,175 @@
+"""
+Probability Table for Flight Delay Prediction
+
+Precomputes the model output for every (day of week, airport) cell so that
+serving a prediction becomes a single array lookup instead of a model call.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Days of week supported by the model (1=Monday, 7=Sunday)
+DAYS_OF_WEEK = np.arange(1, 8, dtype=np.int64)
+
+
+def probability_table_enabled() -> bool:
+    """
+    Check whether predictions should be served from the probability table.
+
+    Controlled by the PROBABILITY_TABLE environment variable (on by default);
+    when off, every prediction runs the live model.
+
+    Returns:
+        True unless PROBABILITY_TABLE is "0", "false", "no" or "off"
+    """
+    return os.environ.get("PROBABILITY_TABLE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class ProbabilityTable:
+    """Dense, read-only day x airport table of model probabilities."""
+
+    def __init__(self, airport_ids: np.ndarray, probabilities: np.ndarray, is_delayed: np.ndarray):
+        """
+        Initialize the probability table.
+
+        Args:
+            airport_ids: Sorted model airport IDs, one per table column
+            probabilities: Array of shape (7, n_airports, 2) with
+                [no delay, delay] probabilities
+            is_delayed: Boolean array of shape (7, n_airports) with the
+                model's class prediction
+        """
+        self.airport_ids = airport_ids
+        self.probabilities = probabilities
+        self.is_delayed = is_delayed
+        # Compact airport index: model airport ID -> table column
+        self.airport_index: Dict[int, int] = {
+            int(model_id): column for column, model_id in enumerate(airport_ids)
+        }
+        for array in (self.airport_ids, self.probabilities, self.is_delayed):
+            array.flags.writeable = False
+
+    @classmethod
+    def build(cls, model_service, model_airport_ids: Iterable[int], snapshot=None) -> "ProbabilityTable":
+        """
+        Build the table by scoring every day x airport cell in one model call.
+
+        Args:
+            model_service: Loaded ModelService used to score the grid
+            model_airport_ids: Model airport IDs to include as columns
+            snapshot: Model snapshot to score with (defaults to the one being served)
+
+        Returns:
+            ProbabilityTable covering all days for the given airports
+        """
+        airport_ids = np.unique(np.fromiter(model_airport_ids, dtype=np.int64))
+        days = np.repeat(DAYS_OF_WEEK, len(airport_ids))
+        airports = np.tile(airport_ids, len(DAYS_OF_WEEK))
+
+        probabilities, predictions = model_service.predict_proba_batch(days, airports, snapshot=snapshot)
+
+        shape = (len(DAYS_OF_WEEK), len(airport_ids))
+        table = cls(
+            airport_ids=airport_ids,
+            probabilities=np.ascontiguousarray(probabilities.reshape(shape + (2,)), dtype=np.float64),
+            is_delayed=(predictions.reshape(shape) == 1),
+        )
+        logger.info(f"Built probability table for {shape[0]} days x {shape[1]} airports")
+        return table
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Table shape as (days, airports)."""
+        return self.is_delayed.shape
+
+    def lookup(self, day_of_week: int, model_airport_id: int) -> Optional[Tuple[float, float, bool]]:
+        """
+        Look up the precomputed prediction for a single cell.
+
+        Args:
+            day_of_week: Day of week (1=Monday, 7=Sunday)
+            model_airport_id: Model airport ID
+
+        Returns:
+            Tuple of (no_delay_probability, delay_probability, is_delayed),
+            or None if the cell is outside the table
+        """
+        column = self.airport_index.get(model_airport_id)
+        if column is None or not 1 <= day_of_week <= len(DAYS_OF_WEEK):
+            return None
+
+        no_delay_prob, delay_prob = self.probabilities[day_of_week - 1, column].tolist()
+        return no_delay_prob, delay_prob, bool(self.is_delayed[day_of_week - 1, column])
+
+    def gather(self, days_of_week: np.ndarray, model_airport_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Look up many cells at once with a vectorized gather.
+
+        Args:
+            days_of_week: Array of days of week (1=Monday, 7=Sunday)
+            model_airport_ids: Array of model airport IDs, same length as days_of_week
+
+        Returns:
+            Tuple of (probabilities with shape (n, 2), is_delayed with shape (n,),
+            found mask with shape (n,)); rows outside the table are zero/False
+            and marked False in the found mask
+        """
+        days_of_week = np.asarray(days_of_week, dtype=np.int64)
+        model_airport_ids = np.asarray(model_airport_ids, dtype=np.int64)
+
+        columns = np.searchsorted(self.airport_ids, model_airport_ids)
+        columns = np.minimum(columns, max(len(self.airport_ids) - 1, 0))
+        found = (days_of_week >= 1) & (days_of_week <= len(DAYS_OF_WEEK))
+        if len(self.airport_ids):
+            found &= self.airport_ids[columns] == model_airport_ids
+        else:
+            found[:] = False
+
+        probabilities = np.zeros((len(days_of_week), 2), dtype=np.float64)
+        is_delayed = np.zeros(len(days_of_week), dtype=bool)
+        rows = days_of_week[found] - 1
+        probabilities[found] = self.probabilities[rows, columns[found]]
+        is_delayed[found] = self.is_delayed[rows, columns[found]]
+        return probabilities, is_delayed, found
+
+    def verify(self, model_service, sample_airports: int = 8, atol: float = 1e-12, snapshot=None) -> bool:
+        """
+        Check that the table agrees with live model output.
+
+        Every day is checked for an evenly spaced sample of airports using the
+        single-row prediction path.
+
+        Args:
+            model_service: Loaded ModelService to compare against
+            sample_airports: Number of airport columns to spot check
+            atol: Absolute tolerance for probability comparison
+            snapshot: Model snapshot to compare against (defaults to the one being served)
+
+        Returns:
+            True if every checked cell matches the model
+        """
+        if len(self.airport_ids) == 0:
+            return True
+
+        columns = np.unique(np.linspace(0, len(self.airport_ids) - 1, num=sample_airports).astype(int))
+        for column in columns:
+            model_airport_id = int(self.airport_ids[column])
+            for day in DAYS_OF_WEEK.tolist():
+                live = model_service.predict_delay(day, model_airport_id, snapshot=snapshot)["prediction"]
+                no_delay_prob, delay_prob, is_delayed = self.lookup(day, model_airport_id)
+                if (
+                    abs(live["delayProbability"] - delay_prob) > atol
+                    or abs(live["noDelayProbability"] - no_delay_prob) > atol
+                    or live["isDelayed"] != is_delayed
+                ):
+                    logger.error(
+                        f"Probability table mismatch for day={day}, airport={model_airport_id}: "
+                        f"table={delay_prob}, model={live['delayProbability']}"
+                    )
+                    return False
+        return True
@@ -0,0 +1,247 @@
+"""
+Shared Serving State for Multi-Worker Deployments
+
+With several uvicorn or gunicorn workers, each worker would otherwise load
+the model, parse the airports file and build the probability table on its
+own. When SHARED_STATE_PATH is set, the first worker to start builds them
+once and publishes them in a single read-only file, ideally on tmpfs
+(/dev/shm). Every worker maps that file and serves the arrays in place:
+the pages are shared between processes, startup skips the table build, and
+all workers serve exactly the same model and airport data.
+
+File layout: an 8-byte magic, the header length, a JSON header (metadata
+plus the dtype, shape and offset of each array) and the raw array data,
+aligned to 64 bytes. The file is replaced atomically, so a worker mapping
+the previous version keeps serving it until it attaches to the new one.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"FDSTATE1"
+_HEADER_LENGTH = struct.Struct("<Q")
+_ALIGNMENT = 64
+
+# Arrays and metadata making up a published state
+StateContents = Tuple[Dict[str, np.ndarray], Dict[str, Any]]
+
+
+def get_shared_state_path() -> Optional[Path]:
+    """
+    Get the configured shared state file.
+
+    Returns:
+        SHARED_STATE_PATH, or None when workers load their own state
+    """
+    value = os.environ.get("SHARED_STATE_PATH", "").strip()
+    return Path(value) if value else None
+
+
+def source_signatures(paths: Iterable[Optional[Path]]) -> Dict[str, Optional[list]]:
+    """
+    Cheap fingerprints of the files a state was built from.
+
+    Args:
+        paths: Source files (None entries are skipped)
+
+    Returns:
+        Mapping of path to [mtime in ns, size], or None for missing files
+    """
+    signatures: Dict[str, Optional[list]] = {}
+    for path in paths:
+        if path is None:
+            continue
+        try:
+            stat = os.stat(path)
+            signatures[str(path)] = [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            signatures[str(path)] = None
+    return signatures
+
+
+def _state_id(arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> str:
+    """Content hash of a state, so republishing identical data keeps its ID."""
+    digest = hashlib.sha256(json.dumps(metadata, sort_keys=True, default=str).encode())
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def write_shared_state(path: Path, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> str:
+    """
+    Write a state file, atomically replacing any previous one.
+
+    Args:
+        path: State file to write
+        arrays: Named arrays (numeric or fixed-width string dtypes)
+        metadata: JSON-serializable metadata
+
+    Returns:
+        State ID (content hash) recorded in the file
+    """
+    state_id = _state_id(arrays, metadata)
+    layout = {}
+    offset = 0
+    contiguous = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(f"Array {name!r} has dtype object and cannot be shared")
+        contiguous[name] = array
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    header = json.dumps({"stateId": state_id, "metadata": metadata, "arrays": layout}, default=str).encode()
+    data_start = -(-(len(_MAGIC) + _HEADER_LENGTH.size + len(header)) // _ALIGNMENT) * _ALIGNMENT
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+            for name, array in contiguous.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    return state_id
+
+
+class SharedState:
+    """A published state mapped read-only into this process."""
+
+    def __init__(self, path: Path, state_id: str, metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.state_id = state_id
+        self.metadata = metadata
+        self.arrays = arrays
+
+    @classmethod
+    def attach(cls, path: Path) -> "SharedState":
+        """
+        Map a state file without copying its arrays.
+
+        Args:
+            path: State file written by write_shared_state()
+
+        Returns:
+            SharedState whose arrays are read-only views of the mapping
+
+        Raises:
+            ValueError: If the file is not a state file
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        prefix = len(_MAGIC) + _HEADER_LENGTH.size
+        if buffer[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a shared state file")
+        (header_length,) = _HEADER_LENGTH.unpack(buffer[len(_MAGIC):prefix])
+        header = json.loads(buffer[prefix:prefix + header_length])
+        data_start = -(-(prefix + header_length) // _ALIGNMENT) * _ALIGNMENT
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            # Views keep the mapping alive; it is unmapped when the last one goes away
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+        return cls(path, header["stateId"], header["metadata"], arrays)
+
+    def group(self, prefix: str) -> Dict[str, np.ndarray]:
+        """
+        Get the arrays published under a prefix.
+
+        Args:
+            prefix: Array name prefix, e.g. "model."
+
+        Returns:
+            Arrays with the prefix removed from their names
+        """
+        return {name[len(prefix):]: array for name, array in self.arrays.items() if name.startswith(prefix)}
+
+
+def read_state_id(path: Path) -> Optional[str]:
+    """
+    Read the ID of the currently published state without mapping its arrays.
+
+    Args:
+        path: State file
+
+    Returns:
+        State ID, or None if there is no readable state file
+    """
+    try:
+        with open(path, "rb") as f:
+            prefix = f.read(len(_MAGIC) + _HEADER_LENGTH.size)
+            if prefix[:len(_MAGIC)] != _MAGIC:
+                return None
+            (header_length,) = _HEADER_LENGTH.unpack(prefix[len(_MAGIC):])
+            return json.loads(f.read(header_length))["stateId"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def publish_or_attach(path: Path, build: Callable[[], StateContents],
+                      is_current: Callable[[SharedState], bool] = lambda state: True,
+                      republish: bool = False) -> SharedState:
+    """
+    Attach to the published state, building and publishing it first if needed.
+
+    Runs under an exclusive lock on "<path>.lock", so when several workers
+    start together exactly one of them builds the state and the others wait
+    and attach to it.
+
+    Args:
+        path: State file
+        build: Builds the arrays and metadata to publish
+        is_current: Whether an existing state may be served; stale states
+            (e.g. built from an older model file) are rebuilt
+        republish: Always build and publish, e.g. after a model reload
+
+    Returns:
+        The attached state
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            if not republish and path.exists():
+                try:
+                    state = SharedState.attach(path)
+                    if is_current(state):
+                        logger.info(f"Attached to shared state {state.state_id} at {path}")
+                        return state
+                    logger.info(f"Shared state {state.state_id} at {path} is stale, rebuilding it")
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Ignoring unreadable shared state {path}: {e}")
+
+            arrays, metadata = build()
+            if path.exists() and read_state_id(path) == _state_id(arrays, metadata):
+                # Another worker already published the same data; keep the file untouched
+                return SharedState.attach(path)
+            state_id = write_shared_state(path, arrays, metadata)
+            logger.info(f"Published shared state {state_id} to {path}")
+            return SharedState.attach(path)
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,313 @@
+"""
+Streaming Bulk Scoring for Flight Delay Prediction
+
+Parses newline-delimited JSON or CSV request bodies incrementally, scores the
+rows chunk by chunk with the vectorized prediction path and yields NDJSON
+result lines. Memory is bounded by the chunk size and the maximum line length,
+and because results are produced by an async generator, a slow reader stops
+the request body from being consumed (backpressure).
+"""
+
+import csv
+import json
+import logging
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models.prediction import ROW_OK, row_error_message
+from utils.arrays import INT64_MAX, INT64_MIN
+from utils.executor import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per vectorized call
+DEFAULT_CHUNK_ROWS = 5000
+MAX_CHUNK_ROWS = 100000
+
+# Longest accepted input line; longer lines are reported as errors and skipped
+MAX_LINE_BYTES = 4096
+
+INPUT_FORMATS = ("ndjson", "csv")
+
+
+class LineSplitter:
+    """Split a stream of byte chunks into lines with a bounded buffer."""
+
+    def __init__(self, max_line_bytes: int = MAX_LINE_BYTES):
+        """
+        Initialize the splitter.
+
+        Args:
+            max_line_bytes: Maximum length of a single line in bytes
+        """
+        self.max_line_bytes = max_line_bytes
+        self._buffer = bytearray()
+        self._overflow = False
+
+    def feed(self, chunk: bytes) -> Iterator[Optional[bytes]]:
+        """
+        Feed a chunk of bytes and yield every completed line.
+
+        Args:
+            chunk: Next chunk of the request body
+
+        Yields:
+            Complete lines without the trailing newline, or None for a line
+            that exceeded max_line_bytes
+        """
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline < 0:
+                break
+            yield self._complete(chunk[start:newline])
+            start = newline + 1
+
+        if not self._overflow:
+            self._buffer += chunk[start:]
+            if len(self._buffer) > self.max_line_bytes:
+                self._buffer.clear()
+                self._overflow = True
+
+    def flush(self) -> Iterator[Optional[bytes]]:
+        """
+        Yield the final line if the body did not end with a newline.
+
+        Yields:
+            The remaining line, or None if it exceeded max_line_bytes
+        """
+        if self._buffer or self._overflow:
+            yield self._complete(b"")
+
+    def _complete(self, tail: bytes) -> Optional[bytes]:
+        """Finish the buffered line with the given tail."""
+        if self._overflow or len(self._buffer) + len(tail) > self.max_line_bytes:
+            line = None
+        else:
+            line = bytes(self._buffer + tail) if self._buffer else tail
+        self._buffer.clear()
+        self._overflow = False
+        return line
+
+
+class _RowParser:
+    """Base parser turning an input line into (dayOfWeek, airportId)."""
+
+    def parse(self, line: str) -> Optional[Tuple[int, int]]:
+        """
+        Parse one line.
+
+        Args:
+            line: Decoded, non-empty input line
+
+        Returns:
+            Tuple of (dayOfWeek, airportId), or None for a header line
+
+        Raises:
+            ValueError: If the line is malformed
+        """
+        raise NotImplementedError
+
+
+def _as_int(value, field: str) -> int:
+    """Convert a parsed value to int, rejecting booleans, fractional numbers and values outside int64."""
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be an integer")
+    if not isinstance(value, int):
+        try:
+            value = int(str(value).strip())
+        except ValueError:
+            raise ValueError(f"{field} must be an integer")
+    if not INT64_MIN <= value <= INT64_MAX:
+        raise ValueError(f"{field} must be an integer between {INT64_MIN} and {INT64_MAX}")
+    return value
+
+
+class NDJSONRowParser(_RowParser):
+    """Parse lines of the form {"dayOfWeek": 1, "airportId": 10397}."""
+
+    def parse(self, line: str) -> Optional[Tuple[int, int]]:
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e.msg}")
+        if not isinstance(row, dict):
+            raise ValueError("Each line must be a JSON object")
+        if "dayOfWeek" not in row or "airportId" not in row:
+            raise ValueError("Each line must contain dayOfWeek and airportId")
+        return _as_int(row["dayOfWeek"], "dayOfWeek"), _as_int(row["airportId"], "airportId")
+
+
+class CSVRowParser(_RowParser):
+    """Parse CSV lines; the first line must be a header with dayOfWeek and airportId columns."""
+
+    def __init__(self):
+        self._columns: Optional[Tuple[int, int]] = None
+
+    @property
+    def has_header(self) -> bool:
+        """Whether a valid header line has been parsed."""
+        return self._columns is not None
+
+    def parse(self, line: str) -> Optional[Tuple[int, int]]:
+        values = next(csv.reader([line]))
+        if self._columns is None:
+            header = [value.strip().lower() for value in values]
+            if "dayofweek" not in header or "airportid" not in header:
+                raise ValueError("CSV header must contain dayOfWeek and airportId columns")
+            self._columns = (header.index("dayofweek"), header.index("airportid"))
+            return None
+
+        day_column, airport_column = self._columns
+        if len(values) <= max(day_column, airport_column):
+            raise ValueError("CSV row is missing dayOfWeek or airportId")
+        return _as_int(values[day_column], "dayOfWeek"), _as_int(values[airport_column], "airportId")
+
+
+def _make_parser(input_format: str) -> _RowParser:
+    """Create a row parser for the given input format."""
+    if input_format == "csv":
+        return CSVRowParser()
+    if input_format == "ndjson":
+        return NDJSONRowParser()
+    raise ValueError(f"Unsupported input format: {input_format}")
+
+
+class _Chunk:
+    """Rows collected for one vectorized scoring call."""
+
+    def __init__(self):
+        self.line_numbers: List[int] = []
+        self.days: List[int] = []
+        self.airport_ids: List[int] = []
+        # Parse errors by position in the chunk
+        self.errors = {}
+
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def add(self, line_number: int, day_of_week: int, airport_id: int) -> None:
+        self.line_numbers.append(line_number)
+        self.days.append(day_of_week)
+        self.airport_ids.append(airport_id)
+
+    def add_error(self, line_number: int, error: str) -> None:
+        self.errors[len(self.line_numbers)] = error
+        self.add(line_number, 0, 0)
+
+
+def score_chunk(service, chunk: _Chunk) -> bytes:
+    """
+    Score a chunk of rows and serialize the results as NDJSON.
+
+    Args:
+        service: Initialized PredictionService
+        chunk: Parsed rows to score
+
+    Returns:
+        NDJSON bytes with one result line per input row
+    """
+    probabilities, is_delayed, status = service.score_rows(
+        np.asarray(chunk.days, dtype=np.int64),
+        np.asarray(chunk.airport_ids, dtype=np.int64)
+    )
+
+    lines = []
+    for index, (line_number, day, airport_id, (no_delay_prob, delay_prob), delayed, code) in enumerate(zip(
+        chunk.line_numbers, chunk.days, chunk.airport_ids,
+        probabilities.tolist(), is_delayed.tolist(), status.tolist()
+    )):
+        if index in chunk.errors:
+            row = {"line": line_number, "dayOfWeek": None, "airportId": None, "error": chunk.errors[index]}
+        elif code != ROW_OK:
+            row = {
+                "line": line_number,
+                "dayOfWeek": day,
+                "airportId": airport_id,
+                "error": row_error_message(code, airport_id)
+            }
+        else:
+            row = {
+                "line": line_number,
+                "dayOfWeek": day,
+                "airportId": airport_id,
+                "delayProbability": delay_prob,
+                "noDelayProbability": no_delay_prob,
+                "isDelayed": delayed
+            }
+        lines.append(json.dumps(row, separators=(",", ":")))
+
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+async def score_stream(
+    body: AsyncIterator[bytes],
+    service,
+    input_format: str = "ndjson",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> AsyncIterator[bytes]:
+    """
+    Score a streamed request body chunk by chunk.
+
+    Args:
+        body: Async iterator over request body bytes
+        service: Initialized PredictionService
+        input_format: "ndjson" or "csv"
+        chunk_rows: Rows per vectorized scoring call
+
+    Yields:
+        NDJSON result bytes, one chunk at a time; scoring and serialization
+        of each chunk run in the worker pool
+    """
+    parser = _make_parser(input_format)
+    splitter = LineSplitter()
+    chunk = _Chunk()
+    line_number = 0
+    total_rows = 0
+
+    def consume(line: Optional[bytes]) -> bool:
+        """Add a line to the current chunk; return False to stop the stream."""
+        nonlocal line_number
+        line_number += 1
+        if line is None:
+            chunk.add_error(line_number, f"Line exceeds {MAX_LINE_BYTES} bytes")
+            return True
+
+        text = line.decode("utf-8", errors="replace").strip()
+        if not text:
+            return True
+
+        try:
+            parsed = parser.parse(text)
+        except ValueError as e:
+            chunk.add_error(line_number, str(e))
+            # Without a valid CSV header no further rows can be parsed
+            return not (isinstance(parser, CSVRowParser) and not parser.has_header)
+
+        if parsed is not None:
+            chunk.add(line_number, *parsed)
+        return True
+
+    async def lines() -> AsyncIterator[Optional[bytes]]:
+        async for data in body:
+            for line in splitter.feed(data):
+                yield line
+        for line in splitter.flush():
+            yield line
+
+    async for line in lines():
+        keep_going = consume(line)
+        if len(chunk) >= chunk_rows or not keep_going:
+            total_rows += len(chunk)
+            yield await run_in_executor(score_chunk, service, chunk)
+            chunk = _Chunk()
+        if not keep_going:
+            break
+
+    if len(chunk):
+        total_rows += len(chunk)
+        yield await run_in_executor(score_chunk, service, chunk)
+
+    logger.info("Streaming prediction completed: %d rows", total_rows, extra={"route": "/predict/stream"})
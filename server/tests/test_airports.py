@@ -146,3 +146,51 @@ class TestAirportsEndpoints:
         # Should respond within 1 second (generous for CI/testing)
         response_time = end_time - start_time
         assert response_time < 1.0, f"Response time {response_time:.3f}s exceeds 1 second"
+
+    def test_airports_etag_conditional_get(self, client: TestClient):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        response = client.get("/airports")
+        etag = response.headers["etag"]
+        assert etag.startswith('"')
+        assert "max-age" in response.headers["cache-control"]
+        
+        cached = client.get("/airports", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+        
+        # A stale tag gets the full body
+        stale = client.get("/airports", headers={"If-None-Match": '"stale"'})
+        assert stale.status_code == 200
+        assert stale.json()["total"] == 70
+
+    def test_airports_gzip_variant(self, client: TestClient):
+        """Test that gzip is served to clients that accept it, with its own ETag."""
+        identity = client.get("/airports", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        
+        compressed = client.get("/airports", headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["vary"] == "Accept-Encoding"
+        assert compressed.headers["etag"] != identity.headers["etag"]
+        assert compressed.json() == identity.json()
+        
+        # The gzip ETag revalidates the same data
+        cached = client.get(
+            "/airports",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]}
+        )
+        assert cached.status_code == 304
+
+    def test_airports_cache_invalidated_on_reload(self, client: TestClient):
+        """Test that reloading airport data rebuilds the cached response."""
+        from services.airport_service import airport_service
+        
+        before = airport_service.get_airports_body()
+        assert airport_service.get_airports_body() is before
+        
+        assert airport_service.load_airports()
+        after = airport_service.get_airports_body()
+        assert after is not before
+        # Same data, same ETag
+        assert after.etags == before.etags
@@ -5,6 +5,8 @@ Tests for the main FastAPI application endpoints.
 import pytest
 from fastapi.testclient import TestClient
 
+from models.prediction import prediction_service
+
 
 class TestMainEndpoints:
     """Test main application endpoints."""
@@ -54,6 +56,39 @@ class TestMainEndpoints:
             if isinstance(services, dict) and "initialized" in services:
                 assert isinstance(services["initialized"], bool)
 
+    def test_probe_endpoints(self, client: TestClient, monkeypatch):
+        """Test that /livez and /readyz answer with fixed bodies and /readyz follows readiness."""
+        response = client.get("/livez")
+        assert response.status_code == 200
+        assert response.content == b'{"status":"alive"}'
+        assert response.headers["content-type"] == "application/json"
+        
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+        
+        monkeypatch.setattr(prediction_service, "_initialized", False)
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json() == {"status": "not_ready"}
+        assert client.head("/livez").status_code == 200
+
+    def test_health_verbose_uses_cached_status(self, client: TestClient):
+        """Test that /health?verbose=1 serves the full status, built once per model snapshot."""
+        brief = client.get("/health").json()
+        assert set(brief["services"]) == {"initialized", "readiness"}
+        
+        verbose = client.get("/health", params={"verbose": 1}).json()
+        assert verbose["status"] == "healthy"
+        assert verbose["services"] == prediction_service.get_service_status()
+        details = prediction_service._status_details()
+        assert prediction_service._status_details() is details
+        
+        # Swapping in a new snapshot rebuilds the details
+        prediction_service.probability_table = prediction_service.probability_table
+        assert prediction_service._status_details() is not details
+        assert client.get("/health", params={"verbose": 1}).json()["services"] == verbose["services"]
+
     def test_docs_endpoint(self, client: TestClient):
         """Test that API documentation is available."""
         response = client.get("/docs")
@@ -101,3 +136,77 @@ class TestMainEndpoints:
         
         # Should have CORS headers
         assert "access-control-allow-origin" in response.headers
+
+
+def _sample(text: str, series: str) -> float:
+    """Read one sample value from a Prometheus text exposition."""
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus /metrics endpoint."""
+
+    def test_request_and_stage_metrics(self, client: TestClient, monkeypatch):
+        """Test that requests, prediction stages and the model version are exported."""
+        from utils import metrics
+
+        monkeypatch.setattr(metrics, "STAGE_SAMPLE_EVERY", 1)
+        monkeypatch.setattr(metrics, "_stage_countdown", 0)
+        # Stages are only timed for predictions that miss the result cache
+        prediction_service.result_cache.clear()
+        predict_count = 'flight_delay_http_request_duration_seconds_count{method="POST",route="/predict",status="200"}'
+        before = client.get("/metrics").text
+
+        for day in (1, 2, 3):
+            assert client.post("/predict", json={"dayOfWeek": day, "airportId": 10397}).status_code == 200
+        assert client.get("/airports/12345678").status_code == 404
+        assert client.get("/no-such-page").status_code == 404
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == metrics.EXPOSITION_MEDIA_TYPE
+        text = response.text
+
+        assert _sample(text, predict_count) - _sample(before, predict_count) == 3
+        assert _sample(text, 'flight_delay_http_request_duration_seconds_count'
+                             '{method="GET",route="/airports/{airport_id}",status="404"}') >= 1
+        assert _sample(text, 'flight_delay_http_request_duration_seconds_count'
+                             '{method="GET",route="unmatched",status="404"}') >= 1
+        # Only the scrape itself is in flight
+        assert _sample(text, "flight_delay_http_requests_in_flight") == 1
+        for stage in ("validation", "airport_lookup", "model_id_mapping", "inference", "result", "serialization"):
+            series = f'flight_delay_prediction_stage_duration_seconds_count{{stage="{stage}"}}'
+            assert _sample(text, series) - _sample(before, series) == 3
+        assert _sample(text, 'flight_delay_cache_requests_total{cache="probability_table",result="hit"}') >= 3
+        version = prediction_service.model_service.get_model_info_summary()["version"]
+        assert f'flight_delay_model_info{{version="{version}"' in text
+
+    def test_histogram_merges_thread_shards(self):
+        """Test that observations from many threads add up in the exposition."""
+        import threading
+
+        from utils.metrics import Histogram, Registry
+
+        registry = Registry()
+        histogram = Histogram("test_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0), registry=registry)
+        child = histogram.labels("/x")
+
+        def observe():
+            for value in (0.05, 0.5, 5.0):
+                child.observe(value)
+
+        threads = [threading.Thread(target=observe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        text = registry.render().decode()
+        assert _sample(text, 'test_seconds_bucket{route="/x",le="0.1"}') == 8
+        assert _sample(text, 'test_seconds_bucket{route="/x",le="1"}') == 16
+        assert _sample(text, 'test_seconds_bucket{route="/x",le="+Inf"}') == 24
+        assert _sample(text, 'test_seconds_count{route="/x"}') == 24
+        assert _sample(text, 'test_seconds_sum{route="/x"}') == pytest.approx(8 * 5.55)
@@ -0,0 +1,72 @@
+"""
+Performance benchmarks for the Flight Delay Prediction API.
+
+These tests start real server processes and are marked slow
+(deselect with -m "not slow").
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget from process start to the first healthy /health response
+COLD_START_BUDGET_SECONDS = 5.0
+
+
+def _free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get_json(url: str, timeout: float = 1.0):
+    """GET a URL and decode the JSON body."""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status, json.loads(response.read())
+
+
+@pytest.mark.slow
+class TestColdStart:
+    """Benchmark server cold start."""
+
+    def test_time_to_first_healthy_response(self):
+        """Test that a fresh server process answers /health as healthy within budget."""
+        port = _free_port()
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=SERVER_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            elapsed = None
+            while time.perf_counter() - start < COLD_START_BUDGET_SECONDS * 3:
+                try:
+                    status, data = _get_json(f"http://127.0.0.1:{port}/health")
+                    if status == 200 and data["status"] == "healthy":
+                        elapsed = time.perf_counter() - start
+                        break
+                except (urllib.error.URLError, ConnectionError, OSError):
+                    pass
+                time.sleep(0.02)
+        finally:
+            process.terminate()
+            _, stderr = process.communicate(timeout=10)
+
+        assert elapsed is not None, f"Server never became healthy:\n{stderr.decode()[-2000:]}"
+        print(f"\nTime from process start to first healthy /health: {elapsed * 1000:.0f}ms")
+        assert elapsed < COLD_START_BUDGET_SECONDS, (
+            f"Cold start took {elapsed:.2f}s, budget is {COLD_START_BUDGET_SECONDS:.1f}s"
+        )
+        assert b"Startup timing:" in stderr
@@ -210,3 +210,236 @@ class TestPredictionEndpoints:
         # Test with empty body
         response = client.post("/predict")
         assert response.status_code == 422
+
+    def test_predict_batch(self, client: TestClient):
+        """Test batch prediction returns per-item results in request order."""
+        requests = [
+            {"dayOfWeek": day, "airportId": airport_id}
+            for airport_id in [10397, 12892, 11298]
+            for day in range(1, 8)
+        ]
+        response = client.post("/predict/batch", json={"requests": requests})
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["total"] == len(requests)
+        assert data["succeeded"] == len(requests)
+        assert data["failed"] == 0
+        assert "modelInfo" in data
+        
+        # Batch results should match single predictions
+        for request, item in zip(requests, data["results"]):
+            assert item["status"] == "success"
+            assert item["input"] == request
+            
+            single = client.post("/predict", json=request).json()
+            assert item["prediction"]["delayProbability"] == single["prediction"]["delayProbability"]
+            assert item["prediction"]["isDelayed"] == single["prediction"]["isDelayed"]
+            assert item["confidence"] == single["confidence"]
+            assert item["airport"]["name"] == single["input"]["airport"]["name"]
+
+    def test_predict_batch_partial_errors(self, client: TestClient):
+        """Test that invalid items fail individually without failing the batch."""
+        requests = [
+            {"dayOfWeek": 1, "airportId": 10397},
+            {"dayOfWeek": 1, "airportId": 99999},  # Non-existent airport
+            {"dayOfWeek": 9, "airportId": 10397},  # Invalid day
+            {"dayOfWeek": 7, "airportId": 12892},
+        ]
+        response = client.post("/predict/batch", json={"requests": requests})
+        
+        assert response.status_code == 200
+        data = response.json()
+        results = data["results"]
+        
+        assert data["succeeded"] == 2
+        assert data["failed"] == 2
+        assert [item["index"] for item in results] == [0, 1, 2, 3]
+        assert [item["status"] for item in results] == ["success", "error", "error", "success"]
+        assert "not found" in results[1]["error"]
+        assert "dayOfWeek" in results[2]["error"]
+        assert results[1]["prediction"] is None
+
+    def test_predict_batch_out_of_range_items(self, client: TestClient):
+        """Test that values too large for int64 fail their own item instead of the batch."""
+        requests = [
+            {"dayOfWeek": 1, "airportId": 10397},
+            {"dayOfWeek": 1, "airportId": 2 ** 70},
+            {"dayOfWeek": -2 ** 70, "airportId": 10397},
+            {"dayOfWeek": 7, "airportId": 12892},
+        ]
+        response = client.post("/predict/batch", json={"requests": requests})
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [item["status"] for item in results] == ["success", "error", "error", "success"]
+        assert "not found" in results[1]["error"]
+        assert "dayOfWeek" in results[2]["error"]
+        assert results[1]["input"]["airportId"] == 2 ** 70
+
+    def test_predict_batch_validation(self, client: TestClient):
+        """Test batch request validation."""
+        response = client.post("/predict/batch", json={"requests": []})
+        assert response.status_code == 422
+        
+        response = client.post("/predict/batch", json={"requests": [{"dayOfWeek": 1}]})
+        assert response.status_code == 422
+        
+        response = client.post("/predict/batch", json={})
+        assert response.status_code == 422
+
+    def test_predict_stream_ndjson(self, client: TestClient):
+        """Test streaming prediction with newline-delimited JSON input."""
+        import json
+        
+        body = "\n".join([
+            json.dumps({"dayOfWeek": 1, "airportId": 10397}),
+            json.dumps({"dayOfWeek": 1, "airportId": 99999}),
+            "not json",
+            "",
+            json.dumps({"dayOfWeek": 7, "airportId": 12892}),
+        ])
+        response = client.post(
+            "/predict/stream?chunk_rows=2",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["line"] for row in rows] == [1, 2, 3, 5]
+        assert "error" not in rows[0] and "error" not in rows[3]
+        assert "not found" in rows[1]["error"]
+        assert "Invalid JSON" in rows[2]["error"]
+        
+        single = client.post("/predict", json={"dayOfWeek": 1, "airportId": 10397}).json()
+        assert rows[0]["delayProbability"] == single["prediction"]["delayProbability"]
+        assert rows[0]["isDelayed"] == single["prediction"]["isDelayed"]
+
+    def test_predict_stream_out_of_range_id(self, client: TestClient):
+        """Test that an id too large for int64 fails its own row instead of the stream."""
+        import json
+        
+        body = "\n".join([
+            json.dumps({"dayOfWeek": 1, "airportId": 10397}),
+            json.dumps({"dayOfWeek": 1, "airportId": 2 ** 70}),
+            json.dumps({"dayOfWeek": 7, "airportId": 12892}),
+        ])
+        response = client.post("/predict/stream", content=body, headers={"Content-Type": "application/x-ndjson"})
+        
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["line"] for row in rows] == [1, 2, 3]
+        assert "airportId must be an integer" in rows[1]["error"]
+        assert "error" not in rows[0] and "error" not in rows[2]
+        
+        body = f"dayOfWeek,airportId\n1,10397\n{2 ** 70},10397\n7,12892"
+        response = client.post("/predict/stream", content=body, headers={"Content-Type": "text/csv"})
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 3
+        assert "dayOfWeek must be an integer" in rows[1]["error"]
+        assert "error" not in rows[0] and "error" not in rows[2]
+
+    def test_predict_stream_csv(self, client: TestClient):
+        """Test streaming prediction with CSV input."""
+        import json
+        
+        body = "airportId,dayOfWeek\n10397,1\n10397,8\n12892,3"
+        response = client.post(
+            "/predict/stream",
+            content=body,
+            headers={"Content-Type": "text/csv"}
+        )
+        
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 3
+        assert rows[0]["dayOfWeek"] == 1 and rows[0]["airportId"] == 10397
+        assert "dayOfWeek" in rows[1]["error"]
+        assert 0 <= rows[2]["delayProbability"] <= 1
+        
+        # A missing header stops the stream with a single error line
+        response = client.post("/predict/stream", content="1,10397\n", headers={"Content-Type": "text/csv"})
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 1 and "header" in rows[0]["error"]
+
+
+def _assert_matches_schema(value, schema, defs, path="$"):
+    """Check a decoded JSON value against a pydantic JSON schema (objects, scalars, anyOf)."""
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+    if "anyOf" in schema:
+        errors = []
+        for option in schema["anyOf"]:
+            try:
+                _assert_matches_schema(value, option, defs, path)
+                return
+            except AssertionError as e:
+                errors.append(str(e))
+        raise AssertionError(f"{path}: no anyOf option matched: {errors}")
+
+    expected_type = schema.get("type")
+    if expected_type == "object":
+        assert isinstance(value, dict), f"{path}: expected object"
+        properties = schema.get("properties", {})
+        assert set(value) == set(properties), f"{path}: keys {sorted(value)} != {sorted(properties)}"
+        assert list(value) == list(properties), f"{path}: key order differs from the schema"
+        for name, child in properties.items():
+            _assert_matches_schema(value[name], child, defs, f"{path}.{name}")
+    elif expected_type == "integer":
+        assert isinstance(value, int) and not isinstance(value, bool), f"{path}: expected integer"
+    elif expected_type == "number":
+        assert isinstance(value, (int, float)) and not isinstance(value, bool), f"{path}: expected number"
+    elif expected_type == "boolean":
+        assert isinstance(value, bool), f"{path}: expected boolean"
+    elif expected_type == "string":
+        assert isinstance(value, str), f"{path}: expected string"
+    elif expected_type == "null":
+        assert value is None, f"{path}: expected null"
+
+
+class TestPredictionSerialization:
+    """Contract tests for the direct response serialization path."""
+
+    REQUESTS = [(1, 10397), (7, 12892), (3, 11298), (5, 13930)]
+
+    def test_fast_body_matches_response_schema(self, client: TestClient):
+        """Test that fast-path bodies match the PredictionResponse JSON schema exactly."""
+        from models.schemas import PredictionResponse
+
+        schema = PredictionResponse.model_json_schema()
+        for day, airport_id in self.REQUESTS:
+            response = client.post("/predict", json={"dayOfWeek": day, "airportId": airport_id})
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            _assert_matches_schema(response.json(), schema, schema.get("$defs", {}))
+            PredictionResponse.model_validate_json(response.content)
+
+    def test_fast_body_identical_to_pydantic_path(self, client: TestClient, monkeypatch):
+        """Test that fast and pydantic serialization produce the same body."""
+        import json
+
+        import routers.predictions as predictions_router
+
+        for day, airport_id in self.REQUESTS:
+            body = {"dayOfWeek": day, "airportId": airport_id}
+            monkeypatch.setattr(predictions_router, "FAST_SERIALIZATION", True)
+            fast = client.post("/predict", json=body)
+            monkeypatch.setattr(predictions_router, "FAST_SERIALIZATION", False)
+            slow = client.post("/predict", json=body)
+
+            assert fast.status_code == slow.status_code == 200
+            assert json.dumps(fast.json()) == json.dumps(slow.json())
+
+    def test_json_fallback_matches_fast_encoder(self, client: TestClient, monkeypatch):
+        """Test that the standard library fallback encodes identically."""
+        from models.prediction import prediction_service
+        import utils.json_encoding as json_encoding
+
+        result = prediction_service.predict_flight_delay(2, 10397)
+        encoded = json_encoding.dumps(result)
+        monkeypatch.setattr(json_encoding, "orjson", None)
+        assert json_encoding.dumps(result) == encoded
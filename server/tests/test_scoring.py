@@ -0,0 +1,152 @@
+"""
+Tests for offline scoring: bulk schedule scoring and backtests.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.prediction import prediction_service
+from scoring.bulk import DELAYED_COLUMN, PROBABILITY_COLUMN, STATUS_COLUMN, score_file
+
+
+def _write_schedule(path):
+    """Write a small schedule with valid, unknown-airport and bad-date rows."""
+    schedule = pd.DataFrame({
+        "FlightDate": ["2026-03-02", "2026-03-08", "2026-03-04", "not a date", "2026-03-05"] * 40,
+        "Carrier": ["DL", "AA", "UA", "DL", "WN"] * 40,
+        "OriginAirportID": [10397, 12892, 99999, 10397, 13930] * 40,
+    })
+    schedule.to_csv(path, index=False)
+    return schedule
+
+
+class TestBulkScoring:
+    """Test the schedule scoring CLI."""
+
+    def test_rows_match_single_predictions(self, tmp_path):
+        """Test that scored rows keep their input and match /predict results."""
+        schedule = _write_schedule(tmp_path / "schedule.csv")
+        report = score_file(tmp_path / "schedule.csv", tmp_path / "scored.csv", date_format="%Y-%m-%d",
+                            chunk_bytes=512)
+
+        assert report["rows"] == len(schedule)
+        assert report["chunks"] > 1
+        assert report["status"] == {"ok": 120, "invalid_day": 40, "unknown_airport": 40}
+
+        scored = pd.read_csv(tmp_path / "scored.csv", float_precision="round_trip")
+        pd.testing.assert_frame_equal(scored[schedule.columns], schedule)
+        assert scored[STATUS_COLUMN].tolist()[:5] == ["ok", "ok", "unknown_airport", "invalid_day", "ok"]
+        assert scored.loc[[2, 3], PROBABILITY_COLUMN].isna().all()
+
+        # 2026-03-02 is a Monday and 2026-03-08 a Sunday
+        for row, day in ((0, 1), (1, 7), (4, 4)):
+            expected = prediction_service.predict_flight_delay(day, int(schedule["OriginAirportID"][row]))
+            assert scored[PROBABILITY_COLUMN][row] == expected["prediction"]["delayProbability"]
+            assert scored[DELAYED_COLUMN][row] == expected["prediction"]["isDelayed"]
+
+    def test_sharded_output_matches_single_process(self, tmp_path):
+        """Test that scoring across worker processes writes the same file in input order."""
+        _write_schedule(tmp_path / "schedule.csv")
+        score_file(tmp_path / "schedule.csv", tmp_path / "single.csv", chunk_bytes=300)
+        report = score_file(tmp_path / "schedule.csv", tmp_path / "sharded.csv", n_jobs=2, chunk_bytes=300)
+
+        assert report["rows"] == 200
+        assert (tmp_path / "sharded.csv").read_bytes() == (tmp_path / "single.csv").read_bytes()
+
+    def test_day_of_week_column(self, tmp_path):
+        """Test scoring a schedule that already has a day of week column."""
+        pd.DataFrame({"DayOfWeek": [1, 7, 9], "OriginAirportID": [10397, 10397, 10397]}).to_csv(
+            tmp_path / "schedule.csv", index=False
+        )
+        report = score_file(tmp_path / "schedule.csv", tmp_path / "scored.csv", day_column="DayOfWeek")
+
+        assert report["status"] == {"ok": 2, "invalid_day": 1}
+        scored = pd.read_csv(tmp_path / "scored.csv")
+        assert scored[PROBABILITY_COLUMN][0] == pytest.approx(
+            prediction_service.predict_flight_delay(1, 10397)["prediction"]["delayProbability"]
+        )
+
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_header_only_schedule(self, tmp_path, n_jobs):
+        """Test that a schedule without data rows still writes the output header."""
+        (tmp_path / "schedule.csv").write_text("DayOfWeek,OriginAirportID\n")
+        report = score_file(tmp_path / "schedule.csv", tmp_path / "scored.csv", day_column="DayOfWeek",
+                            n_jobs=n_jobs)
+
+        assert report["rows"] == 0
+        assert (tmp_path / "scored.csv").read_text() == (
+            f"DayOfWeek,OriginAirportID,{PROBABILITY_COLUMN},{DELAYED_COLUMN},{STATUS_COLUMN}\n"
+        )
+
+
+def _write_history(path, n_rows: int = 3000, seed: int = 0):
+    """Write historical flights with outcomes, including unknown airports and cancellations."""
+    rng = np.random.default_rng(seed)
+    flights = pd.DataFrame({
+        "Year": 2013,
+        "Month": rng.integers(4, 6, n_rows),
+        "DayofMonth": rng.integers(1, 29, n_rows),
+        "DayOfWeek": rng.integers(1, 8, n_rows),
+        "OriginAirportID": rng.choice([10397, 12892, 13930, 11298, 99999], n_rows),
+        "DepDel15": (rng.random(n_rows) < 0.25).astype(float),
+        "Cancelled": (rng.random(n_rows) < 0.02).astype(int),
+    })
+    flights.loc[flights["Cancelled"] == 1, "DepDel15"] = np.nan
+    flights.to_csv(path, index=False)
+    return flights
+
+
+class TestBacktest:
+    """Test the streaming backtest against historical outcomes."""
+
+    def test_report_matches_direct_computation(self, tmp_path):
+        """Test that streamed metrics equal metrics computed on materialized predictions."""
+        from scoring.backtest import run_backtest
+
+        flights = _write_history(tmp_path / "flights.csv")
+        report = run_backtest([tmp_path / "flights.csv"], chunk_bytes=4096)
+
+        scored = flights[(flights["Cancelled"] == 0) & (flights["OriginAirportID"] != 99999)]
+        probabilities, is_delayed, _ = prediction_service.score_rows(
+            scored["DayOfWeek"].to_numpy(), scored["OriginAirportID"].to_numpy()
+        )
+        probability = probabilities[:, 1]
+        outcome = scored["DepDel15"].to_numpy()
+
+        overall = report["overall"]
+        assert report["run"]["chunks"] > 1
+        assert overall["flights"] == len(scored)
+        assert report["unscored"] == {"unknown_airport": int(((flights["Cancelled"] == 0)
+                                                               & (flights["OriginAirportID"] == 99999)).sum())}
+        assert overall["brierScore"] == pytest.approx(np.mean((probability - outcome) ** 2), abs=1e-6)
+        assert overall["logLoss"] == pytest.approx(
+            -np.mean(outcome * np.log(probability) + (1 - outcome) * np.log(1 - probability)), abs=1e-6
+        )
+        assert overall["accuracy"] == pytest.approx(np.mean(is_delayed == (outcome == 1)), abs=1e-6)
+        assert sum(bin_["flights"] for bin_ in report["calibration"]) == len(scored)
+        assert report["byAirport"]["10397"]["flights"] == int((scored["OriginAirportID"] == 10397).sum())
+        assert sum(day["flights"] for day in report["byDayOfWeek"].values()) == len(scored)
+
+    def test_parallel_report_matches_serial(self, tmp_path):
+        """Test that merging worker accumulators gives the same report as one process."""
+        from scoring.backtest import run_backtest
+
+        _write_history(tmp_path / "flights.csv")
+        serial = run_backtest([tmp_path / "flights.csv"], chunk_bytes=100_000)
+        parallel = run_backtest([tmp_path / "flights.csv"], n_jobs=2, chunk_bytes=2048)
+
+        serial.pop("run"), parallel.pop("run")
+        assert parallel == serial
+
+    def test_period_filter(self, tmp_path):
+        """Test that only flights of the requested month are evaluated."""
+        from scoring.backtest import run_backtest
+
+        flights = _write_history(tmp_path / "flights.csv")
+        report = run_backtest([tmp_path / "flights.csv"], period=(2013, 5))
+
+        expected = flights[(flights["Month"] == 5) & (flights["Cancelled"] == 0)
+                           & (flights["OriginAirportID"] != 99999)]
+        assert report["data"]["period"] == "2013-05"
+        assert report["overall"]["flights"] == len(expected)
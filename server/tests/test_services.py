@@ -0,0 +1,719 @@
+"""
+Tests for the service layer behind the API endpoints.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from models.prediction import prediction_service
+
+
+class TestProbabilityTable:
+    """Test the precomputed day x airport probability table."""
+
+    def test_table_built_on_startup(self, client: TestClient):
+        """Test that initialization builds a table covering all days and airports."""
+        table = prediction_service.probability_table
+        assert table is not None
+
+        days, airports = table.shape
+        assert days == 7
+        assert airports == len(prediction_service.airport_service.get_model_airport_ids())
+
+    def test_table_matches_live_model(self, client: TestClient):
+        """Test that every table cell matches the live model prediction."""
+        table = prediction_service.probability_table
+        model_service = prediction_service.model_service
+
+        for model_airport_id in table.airport_ids.tolist():
+            for day in range(1, 8):
+                live = model_service.predict_delay(day, model_airport_id)
+                no_delay_prob, delay_prob, is_delayed = table.lookup(day, model_airport_id)
+
+                assert delay_prob == pytest.approx(live["prediction"]["delayProbability"], abs=1e-12)
+                assert no_delay_prob == pytest.approx(live["prediction"]["noDelayProbability"], abs=1e-12)
+                assert is_delayed == live["prediction"]["isDelayed"]
+
+    def test_lookup_outside_table(self, client: TestClient):
+        """Test that cells outside the table return None."""
+        table = prediction_service.probability_table
+        airport_id = int(table.airport_ids[0])
+
+        assert table.lookup(0, airport_id) is None
+        assert table.lookup(8, airport_id) is None
+        assert table.lookup(1, -1) is None
+
+    def test_fallback_to_live_model(self, client: TestClient):
+        """Test that predictions fall back to the live model without a table."""
+        table = prediction_service.probability_table
+        expected = prediction_service.predict_flight_delay(1, 10397)
+
+        prediction_service.probability_table = None
+        try:
+            result = prediction_service.predict_flight_delay(1, 10397)
+        finally:
+            prediction_service.probability_table = table
+
+        assert result["status"] == "success"
+        assert result["prediction"]["delayProbability"] == pytest.approx(
+            expected["prediction"]["delayProbability"], abs=1e-12
+        )
+
+
+class TestMicroBatching:
+    """Test coalescing of concurrent live model calls."""
+
+    def test_concurrent_predictions_share_batches(self, client: TestClient):
+        """Test that concurrent table misses are scored together and match the live model."""
+        import asyncio
+
+        from services.micro_batcher import BATCH_SIZE, MicroBatcher
+
+        table = prediction_service.probability_table
+        batcher = prediction_service.micro_batcher
+        requests = [((i % 7) + 1, airport_id) for i, airport_id in enumerate([10397, 12892, 11298, 13930] * 10)]
+        expected = [prediction_service.predict_flight_delay(day, airport_id) for day, airport_id in requests]
+
+        async def predict_all():
+            return await asyncio.gather(*(prediction_service.predict_flight_delay_async(day, airport_id)
+                                          for day, airport_id in requests))
+
+        _, rows_before, batches_before = BATCH_SIZE.snapshot()
+        prediction_service.probability_table = None
+        prediction_service.micro_batcher = MicroBatcher(prediction_service.model_service, max_rows=16, max_wait_us=50000)
+        try:
+            results = asyncio.run(predict_all())
+        finally:
+            prediction_service.micro_batcher = batcher
+            prediction_service.probability_table = table
+
+        for result, reference in zip(results, expected):
+            assert result["status"] == "success"
+            assert result["input"] == reference["input"]
+            assert result["prediction"]["delayProbability"] == pytest.approx(
+                reference["prediction"]["delayProbability"], abs=1e-12
+            )
+            assert result["prediction"]["isDelayed"] == reference["prediction"]["isDelayed"]
+
+        _, rows_after, batches_after = BATCH_SIZE.snapshot()
+        # 40 rows flushed as 16 rows, 16 rows and the 8 left over after the wait
+        assert rows_after - rows_before == 40
+        assert batches_after - batches_before == 3
+
+    def test_rows_for_different_snapshots_are_not_mixed(self, client: TestClient):
+        """Test that a batch is only scored with the snapshot its rows were queued for."""
+        import asyncio
+
+        import numpy as np
+
+        from services.micro_batcher import MicroBatcher
+
+        class RecordingModelService:
+            """Model service stand-in that records each batch."""
+
+            def __init__(self):
+                self.calls = []
+
+            def predict_proba_batch(self, days, model_ids, snapshot=None):
+                self.calls.append((snapshot, len(days)))
+                delay = np.full(len(days), 0.75 if snapshot == "new" else 0.25)
+                return np.column_stack([1 - delay, delay]), (delay > 0.5).astype(np.int64)
+
+        model_service = RecordingModelService()
+        batcher = MicroBatcher(model_service, max_rows=64, max_wait_us=1000)
+
+        async def predict_all():
+            return await asyncio.gather(*(batcher.predict(1, 7, "old" if i % 2 else "new") for i in range(10)))
+
+        results = asyncio.run(predict_all())
+
+        assert sorted(model_service.calls) == [("new", 5), ("old", 5)]
+        assert results[0] == (0.25, 0.75, True)
+        assert results[1] == (0.75, 0.25, False)
+
+
+class TestResultCache:
+    """Test the bounded LRU/TTL prediction result cache."""
+
+    def test_lru_eviction_and_counters(self):
+        """Test that the least recently used entry is evicted and counted."""
+        from utils.metrics import CACHE_EVICTIONS, CACHE_REQUESTS
+        from utils.result_cache import ResultCache
+
+        cache = ResultCache("test_lru", max_entries=2)
+        version = (object(),)
+        cache.put("a", 1, version)
+        cache.put("b", 2, version)
+        assert cache.get("a", version) == 1
+        cache.put("c", 3, version)
+
+        assert cache.get("b", version) is None
+        assert (cache.get("a", version), cache.get("c", version)) == (1, 3)
+        assert len(cache) == 2
+        assert CACHE_REQUESTS.labels("test_lru", "hit").value() == 3
+        assert CACHE_REQUESTS.labels("test_lru", "miss").value() == 1
+        assert CACHE_EVICTIONS.labels("test_lru", "size").value() == 1
+
+    def test_ttl_and_version_invalidation(self):
+        """Test that entries expire after the TTL and are dropped when a version changes."""
+        import time
+
+        from utils.metrics import CACHE_EVICTIONS
+        from utils.result_cache import ResultCache
+
+        model, airports = object(), object()
+        cache = ResultCache("test_ttl", max_entries=8, ttl_seconds=0.05)
+        cache.put("a", 1, (model, airports))
+        assert cache.get("a", (model, airports)) == 1
+        time.sleep(0.06)
+        assert cache.get("a", (model, airports)) is None
+        assert CACHE_EVICTIONS.labels("test_ttl", "expired").value() == 1
+
+        cache.put("a", 1, (model, airports))
+        cache.put("b", 2, (model, airports))
+        assert cache.get("a", (model, object())) is None
+        cache.put("a", 10, (model, object()))
+        assert len(cache) == 1
+        assert CACHE_EVICTIONS.labels("test_ttl", "invalidated").value() == 2
+
+    def test_predictions_cached_per_model_snapshot(self, client: TestClient):
+        """Test that repeated predictions hit the cache until the model is swapped."""
+        prediction_service.result_cache.clear()
+        first = prediction_service.predict_flight_delay(3, 10397)
+        assert prediction_service.predict_flight_delay(3, 10397) is first
+        assert prediction_service.predict_flight_delay(3, 12345678)["status"] == "error"
+        assert len(prediction_service.result_cache) == 1
+
+        # Swapping in a new snapshot invalidates results of the previous one
+        prediction_service.probability_table = prediction_service.probability_table
+        second = prediction_service.predict_flight_delay(3, 10397)
+        assert second is not first
+        assert second == first
+
+
+class TestSharedState:
+    """Test the memory-mapped state shared between workers."""
+
+    @staticmethod
+    def _service(airports_path):
+        """A prediction service with its own model and airport services."""
+        from models.prediction import PredictionService
+        from services.airport_service import AirportService
+        from services.model_service import ModelService
+
+        service = PredictionService()
+        service.model_service = ModelService()
+        service.airport_service = AirportService(str(airports_path))
+        return service
+
+    def test_arrays_are_mapped_read_only(self, tmp_path):
+        """Test that attached arrays are zero-copy, read-only views with a content ID."""
+        import numpy as np
+
+        from services.shared_state import SharedState, read_state_id, write_shared_state
+
+        arrays = {"ids": np.arange(5, dtype=np.int64), "names": np.array(["ATL", "", "ORD"]),
+                  "grid": np.ones((7, 3, 2))}
+        state_id = write_shared_state(tmp_path / "state", arrays, {"version": "1.0"})
+        assert write_shared_state(tmp_path / "state", arrays, {"version": "1.0"}) == state_id
+        assert read_state_id(tmp_path / "state") == state_id
+
+        state = SharedState.attach(tmp_path / "state")
+        assert state.metadata == {"version": "1.0"}
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(state.arrays[name], array)
+            assert not state.arrays[name].flags.owndata
+            assert not state.arrays[name].flags.writeable
+
+    def test_workers_publish_once_and_attach(self, client: TestClient, tmp_path, monkeypatch):
+        """Test that the first worker publishes, later workers attach, and stale states are rebuilt."""
+        import shutil
+
+        airports_path = tmp_path / "airports.csv"
+        shutil.copy(prediction_service.airport_service.airports_path, airports_path)
+        monkeypatch.setenv("SHARED_STATE_PATH", str(tmp_path / "state"))
+
+        first, second = self._service(airports_path), self._service(airports_path)
+        assert first.initialize() and second.initialize()
+        state_id = first.get_service_status()["sharedState"]["stateId"]
+        assert second.get_service_status()["sharedState"]["stateId"] == state_id
+        assert second.probability_table.probabilities.base is not None
+        assert not second.probability_table.probabilities.flags.owndata
+
+        expected = prediction_service.predict_flight_delay(4, 10397)
+        result = second.predict_flight_delay(4, 10397)
+        assert result["input"] == expected["input"]
+        assert result["prediction"] == expected["prediction"]
+        assert result["modelInfo"] == expected["modelInfo"]
+
+        # A worker started after the airports file changed rebuilds the state
+        airports_path.write_text(airports_path.read_text().replace("Hartsfield", "Hartsfield-Jackson"))
+        third = self._service(airports_path)
+        assert third.initialize()
+        assert third.get_service_status()["sharedState"]["stateId"] != state_id
+
+        # Running workers switch to the newly published state
+        assert first.refresh_shared_state() is True
+        assert first.get_service_status()["sharedState"]["stateId"] == \
+            third.get_service_status()["sharedState"]["stateId"]
+        assert first.refresh_shared_state() is False
+
+
+class TestAirportIndex:
+    """Test the in-memory airport index."""
+
+    def test_index_covers_all_airports(self, client: TestClient):
+        """Test that every airport in the dataset is reachable through the index."""
+        import csv
+
+        airport_service = prediction_service.airport_service
+        with open(airport_service.airports_path, newline="") as f:
+            airport_ids = [int(row["AirportID"]) for row in csv.DictReader(f) if row["AirportID"]]
+
+        assert len(set(airport_ids)) == len(airport_service.get_all_airports())
+        for airport_id in airport_ids:
+            record = airport_service.get_airport_record(airport_id)
+            assert record is not None
+            assert record.id == airport_id
+            assert airport_service.validate_airport_id(airport_id)
+            assert airport_service.get_model_airport_id(airport_id) == record.model_id
+
+    def test_summary_reports_loaded_column_types(self, client: TestClient):
+        """Test that the summary describes the types the loader produced for each column."""
+        summary = prediction_service.airport_service.get_airports_summary()
+
+        assert summary["dataTypes"]["AirportID"] == "int"
+        assert summary["dataTypes"]["AirportName"] == "str"
+        assert summary["dataTypes"]["ModelAirportID"] in ("int", "int | None")
+        assert summary["dataTypes"]["Source"] == "str"
+        assert list(summary["dataTypes"]) == summary["columns"]
+
+    def test_record_lookup(self, client: TestClient):
+        """Test that records carry the airport details and model ID."""
+        record = prediction_service.airport_service.get_airport_record(10397)
+
+        assert record.code == "HAR"
+        assert record.city == "Atlanta"
+        assert record.state == "GA"
+        assert record.model_id == 10397
+        assert prediction_service.airport_service.get_airport_record(99999) is None
+
+    def test_record_is_immutable(self, client: TestClient):
+        """Test that indexed records and the index itself cannot be modified."""
+        airport_service = prediction_service.airport_service
+        record = airport_service.get_airport_record(10397)
+
+        with pytest.raises(AttributeError):
+            record.name = "Changed"
+        with pytest.raises(TypeError):
+            airport_service._airport_index[1] = record
+
+
+class TestBatchScoring:
+    """Test vectorized batch scoring in the prediction service."""
+
+    def test_lookup_airports(self, client: TestClient):
+        """Test vectorized airport resolution."""
+        records, model_ids = prediction_service.airport_service.lookup_airports([10397, 99999, 1])
+
+        assert records[0].id == 10397
+        assert records[1] is None and records[2] is None
+        assert model_ids.tolist() == [10397, -1, -1]
+
+    def test_batch_without_table_matches_table(self, client: TestClient):
+        """Test that live batch scoring matches the table gather."""
+        airport_ids = prediction_service.airport_service.get_model_airport_ids()
+        days = [(i % 7) + 1 for i in range(len(airport_ids))]
+        expected = prediction_service.predict_batch(days, airport_ids)
+
+        table = prediction_service.probability_table
+        prediction_service.probability_table = None
+        try:
+            result = prediction_service.predict_batch(days, airport_ids)
+        finally:
+            prediction_service.probability_table = table
+
+        for live, cached in zip(result["results"], expected["results"]):
+            assert live["prediction"]["delayProbability"] == pytest.approx(
+                cached["prediction"]["delayProbability"], abs=1e-12
+            )
+            assert live["prediction"]["isDelayed"] == cached["prediction"]["isDelayed"]
+
+
+class TestCompiledModel:
+    """Test the NumPy-only compiled model artifact."""
+
+    def test_compiled_model_parity(self, tmp_path):
+        """Test that the compiled scorer matches the pickled scikit-learn model."""
+        import pickle
+
+        import numpy as np
+
+        from services.model_service import export_compiled_model, load_compiled_model
+
+        artifact = export_compiled_model("../models/model.pkl", tmp_path / "model.npz")
+        compiled, metadata = load_compiled_model(artifact)
+
+        with open("../models/model.pkl", "rb") as f:
+            model_data = pickle.load(f)
+        sklearn_model = model_data["model_object"]
+
+        airport_ids = prediction_service.airport_service.get_model_airport_ids()
+        grid = np.array([[day, airport_id] for day in range(1, 8) for airport_id in airport_ids])
+
+        np.testing.assert_allclose(compiled.predict_proba(grid), sklearn_model.predict_proba(grid), rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(compiled.predict(grid), sklearn_model.predict(grid))
+        np.testing.assert_array_equal(compiled.classes_, sklearn_model.classes_)
+
+        assert metadata["model_type"] == model_data["model_type"]
+        assert metadata["accuracy"] == pytest.approx(model_data["accuracy"])
+        assert metadata["model_version"] == model_data["model_version"]
+        assert metadata["training_samples"] == model_data["training_samples"]
+
+    def test_compiled_model_skips_sklearn(self):
+        """Test that loading the compiled artifact does not import scikit-learn."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys\n"
+            "from services.model_service import ModelService\n"
+            "service = ModelService()\n"
+            "assert service.load_model()\n"
+            "assert type(service.model_object).__name__ == 'CompiledLogisticModel'\n"
+            "assert 'sklearn' not in sys.modules and 'scipy' not in sys.modules\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    def test_pickled_model_reports_sklearn_import(self):
+        """Test that the startup timings separate the scikit-learn import from unpickling."""
+        import subprocess
+        import sys
+
+        code = (
+            "from services.model_service import ModelService\n"
+            "from utils.startup import get_startup_timings\n"
+            "service = ModelService(compiled_path=None)\n"
+            "assert service.load_model()\n"
+            "timings = get_startup_timings()\n"
+            "assert 'import sklearn' in timings and 'unpickle model' in timings, timings\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    def test_stale_compiled_model_falls_back_to_pickle(self, tmp_path):
+        """Test that an artifact exported from a different pickle is ignored."""
+        import shutil
+
+        from services.model_service import ModelService, export_compiled_model
+
+        export_compiled_model("../models/model.pkl", tmp_path / "model.npz")
+        stale_pickle = tmp_path / "model.pkl"
+        shutil.copy("../models/model.pkl", stale_pickle)
+        with open(stale_pickle, "ab") as f:
+            f.write(b"\n")
+
+        service = ModelService(model_path=str(stale_pickle), compiled_path=str(tmp_path / "model.npz"))
+        assert service.load_model()
+        assert type(service.model_object).__name__ != "CompiledLogisticModel"
+
+
+class TestInitialization:
+    """Test single-flight initialization of the prediction service."""
+
+    @staticmethod
+    def _counting_service(model_path: str = "../models/model.pkl"):
+        """Create a fresh PredictionService whose model loads are counted and slowed down."""
+        import time
+
+        from models.prediction import PredictionService
+        from services.airport_service import AirportService
+        from services.model_service import ModelService
+
+        class CountingModelService(ModelService):
+            loads = 0
+
+            def load_model(self):
+                CountingModelService.loads += 1
+                time.sleep(0.05)
+                return super().load_model()
+
+        service = PredictionService()
+        service.model_service = CountingModelService(model_path=model_path)
+        service.airport_service = AirportService()
+        return service, CountingModelService
+
+    def test_concurrent_initialize_runs_once(self):
+        """Test that concurrent callers share a single initialization."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        service, counter = self._counting_service()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: service.initialize(), range(16)))
+
+        assert all(results)
+        assert counter.loads == 1
+        assert service.get_readiness()["state"] == "ready"
+
+    def test_concurrent_ensure_initialized_runs_once(self):
+        """Test that concurrent async callers await the same initialization."""
+        import asyncio
+
+        service, counter = self._counting_service()
+
+        async def burst():
+            return await asyncio.gather(*(service.ensure_initialized() for _ in range(16)))
+
+        assert all(asyncio.run(burst()))
+        assert counter.loads == 1
+
+    def test_failure_is_cached_with_backoff(self):
+        """Test that a failed initialization is not retried until the backoff expires."""
+        service, counter = self._counting_service(model_path="missing-model.pkl")
+        service.model_service.compiled_path = None
+
+        assert service.initialize() is False
+        assert service.initialize() is False
+        assert counter.loads == 1
+
+        readiness = service.get_readiness()
+        assert readiness["state"] == "failed"
+        assert readiness["failures"] == 1
+        assert readiness["lastError"] == "Failed to load model"
+        assert readiness["retryInSeconds"] > 0
+
+        # Forcing bypasses the backoff
+        assert service.initialize(force=True) is False
+        assert counter.loads == 2
+        assert service.get_readiness()["failures"] == 2
+
+
+class TestModelReload:
+    """Test hot model reload with an atomic snapshot swap."""
+
+    @staticmethod
+    def _initialized_service():
+        """Create a fresh, initialized PredictionService."""
+        from models.prediction import PredictionService
+        from services.airport_service import AirportService
+        from services.model_service import ModelService
+
+        service = PredictionService()
+        service.model_service = ModelService()
+        service.airport_service = AirportService()
+        assert service.initialize()
+        return service
+
+    @staticmethod
+    def _shifted_model(tmp_path, shift: float):
+        """Write a compiled model whose intercept is shifted by the given amount."""
+        import json
+
+        import numpy as np
+
+        with np.load("../models/model.npz") as artifact:
+            arrays = {name: artifact[name] for name in artifact.files}
+        metadata = json.loads(str(arrays["metadata"]))
+        metadata["model_version"] = "2.0"
+        arrays["metadata"] = np.array(json.dumps(metadata))
+        arrays["intercept"] = arrays["intercept"] + shift
+
+        path = tmp_path / "model.npz"
+        np.savez(path, **arrays)
+        return path
+
+    def test_reload_same_model_reports_parity(self):
+        """Test that reloading an unchanged model swaps snapshots with zero drift."""
+        service = self._initialized_service()
+        previous = service.model_service.snapshot
+
+        report = service.reload_model()
+
+        assert report["status"] == "success"
+        assert service.model_service.snapshot is not previous
+        assert service.probability_table is not None
+        assert report["loadTimeMs"] >= 0
+        assert report["parity"]["cellsCompared"] == 7 * len(set(service.airport_service.get_model_airport_ids()))
+        assert report["parity"]["maxAbsDiff"] == 0.0
+        assert report["parity"]["decisionChanges"] == 0
+
+    def test_in_flight_snapshot_keeps_old_model(self, tmp_path):
+        """Test that a snapshot taken before a reload keeps predicting with the old model."""
+        service = self._initialized_service()
+        old_snapshot = service.model_service.snapshot
+        before = service.model_service.predict_delay(1, 10, snapshot=old_snapshot)
+
+        report = service.reload_model(str(self._shifted_model(tmp_path, 1.0)))
+        assert report["status"] == "success"
+        assert report["newVersion"]["version"] == "2.0"
+        assert report["parity"]["maxAbsDiff"] > 0
+
+        # The old snapshot is untouched; new predictions use the new model
+        assert service.model_service.predict_delay(1, 10, snapshot=old_snapshot) == before
+        after = service.predict_flight_delay(1, 10397)
+        assert after["modelInfo"]["version"] == "2.0"
+        assert after["prediction"]["delayProbability"] != before["prediction"]["delayProbability"]
+
+    def test_rejected_model_keeps_serving(self, tmp_path):
+        """Test that a model that fails to load leaves the current model in place."""
+        service = self._initialized_service()
+        previous = service.model_service.snapshot
+        broken = tmp_path / "model.pkl"
+        broken.write_bytes(b"not a pickle")
+
+        report = service.reload_model(str(broken))
+
+        assert report["status"] == "error"
+        assert service.model_service.snapshot is previous
+        assert service.predict_flight_delay(1, 10397)["status"] == "success"
+
+    def test_concurrent_reload_is_rejected(self):
+        """Test that a second reload while one is running reports in_progress."""
+        service = self._initialized_service()
+        with service._reload_lock:
+            assert service.reload_model()["status"] == "in_progress"
+
+    def test_reload_endpoint(self, client: TestClient):
+        """Test the admin reload endpoint."""
+        response = client.post("/admin/model/reload")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["status"] == "success"
+        assert data["parity"]["maxAbsDiff"] == 0.0
+        assert data["previousVersion"] == data["newVersion"]
+
+    def test_file_watcher_triggers_on_settled_change(self, tmp_path):
+        """Test that the file watcher reports a change once the file stops changing."""
+        from utils.file_watcher import FileWatcher
+
+        watched = tmp_path / "model.pkl"
+        watched.write_bytes(b"v1")
+        calls = []
+        watcher = FileWatcher([watched], on_change=lambda: calls.append(1), interval=0.01)
+        watcher._signatures = {watched: (0, 0)}
+
+        assert watcher.check() is True
+        assert calls == [1]
+        assert watcher.check() is False
+
+
+class TestAsyncLogging:
+    """Test the queue-based background log writer."""
+
+    @pytest.fixture(autouse=True)
+    def restore_logging(self):
+        """Put the application's logging configuration back after each test."""
+        yield
+        from utils.logging_config import configure_logging
+        configure_logging()
+
+    def test_json_lines_with_route_sampling(self):
+        """Test JSON output with extra fields and per-route sampling."""
+        import io
+        import json
+        import logging
+
+        from utils.logging_config import configure_logging, flush_logging, log_sampled
+
+        stream = io.StringIO()
+        configure_logging(stream=stream, log_format="json", sample_rates={"/predict": 0.0, "/predict/batch": 0.5})
+        logger = logging.getLogger("test.logging")
+        logger.info("kept %s", "batch", extra={"route": "/predict/batch", "items": 3})
+        logger.error("failed for %d", 10397, extra={"route": "/predict"})
+        assert flush_logging()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [entry["message"] for entry in entries] == ["kept batch", "failed for 10397"]
+        assert entries[0]["items"] == 3 and entries[0]["route"] == "/predict/batch"
+        assert entries[1]["level"] == "ERROR" and entries[1]["logger"] == "test.logging"
+
+        assert not any(log_sampled("/predict") for _ in range(100))
+        assert all(log_sampled("/airports") for _ in range(100))
+        assert 300 < sum(log_sampled("/predict/batch") for _ in range(1000)) < 700
+
+    def test_full_queue_drops_info_but_not_errors(self):
+        """Test that a full queue drops and counts INFO records while errors wait for space."""
+        import logging
+        import threading
+
+        from utils.logging_config import LOG_RECORDS_DROPPED, configure_logging, flush_logging
+
+        class BlockingStream:
+            """Stream whose writes wait until released."""
+
+            def __init__(self):
+                self.released = threading.Event()
+                self.text = ""
+
+            def write(self, text):
+                self.released.wait(5)
+                self.text += text
+
+            def flush(self):
+                pass
+
+        stream = BlockingStream()
+        configure_logging(stream=stream, queue_size=4)
+        logger = logging.getLogger("test.logging")
+        dropped_before = LOG_RECORDS_DROPPED.value()
+
+        def log_burst():
+            for i in range(50):
+                logger.info("info %d", i)
+            for i in range(10):
+                logger.error("error %d", i)
+
+        thread = threading.Thread(target=log_burst)
+        thread.start()
+        thread.join(0.5)
+        stream.released.set()
+        thread.join(5)
+        assert flush_logging()
+
+        assert LOG_RECORDS_DROPPED.value() > dropped_before
+        assert all(f"error {i}\n" in stream.text for i in range(10))
+        assert "Dropped" in stream.text
+
+
+class TestLauncher:
+    """Test the pre-fork launcher helpers."""
+
+    def test_default_worker_count(self, monkeypatch):
+        """Test that WEB_CONCURRENCY sets the worker count and invalid values fall back to the CPUs."""
+        import os
+
+        from launcher import default_worker_count
+
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        assert default_worker_count() == 3
+        for value in ("0", "many"):
+            monkeypatch.setenv("WEB_CONCURRENCY", value)
+            assert default_worker_count() == len(os.sched_getaffinity(0))
+
+    def test_forked_child_logs_and_runs_cpu_work(self):
+        """Test that a forked worker gets its own log writer and CPU pool."""
+        import logging
+        import os
+
+        from utils.executor import get_executor
+        from utils.logging_config import flush_logging
+
+        get_executor().submit(int).result()
+        flush_logging()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            ok = False
+            try:
+                logging.getLogger("test.fork").info("logged from the child")
+                ok = get_executor().submit(sum, [1, 2]).result(timeout=5) == 3 and flush_logging()
+            finally:
+                os.write(write_fd, b"1" if ok else b"0")
+                os._exit(0)
+        os.close(write_fd)
+        _, status = os.waitpid(pid, 0)
+        assert os.read(read_fd, 1) == b"1"
+        os.close(read_fd)
+        assert os.WEXITSTATUS(status) == 0
@@ -0,0 +1,377 @@
+"""
+Tests for offline model training.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from training.aggregated import CountCube, count_flights, fit_cube, train
+
+AIRPORTS = [10140, 10397, 11298, 12892, 13930]
+
+
+def _write_flights(path, n_rows: int = 5000, seed: int = 0):
+    """Write a synthetic flights.csv with the columns used by the notebook."""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(1, 8, n_rows)
+    airports = rng.choice(AIRPORTS, n_rows)
+    # Delay rate depends on day and airport so the model has signal
+    rate = 0.1 + 0.03 * days + 0.05 * (airports == 10397)
+    delayed = (rng.random(n_rows) < rate).astype(float)
+    cancelled = rng.random(n_rows) < 0.02
+    delayed[cancelled] = np.nan
+    flights = pd.DataFrame({
+        "Year": 2013,
+        "Month": rng.integers(1, 13, n_rows),
+        "DayofMonth": rng.integers(1, 29, n_rows),
+        "DayOfWeek": days,
+        "Carrier": "DL",
+        "OriginAirportID": airports,
+        "DestAirportID": rng.choice(AIRPORTS, n_rows),
+        "DepDelay": rng.integers(-10, 60, n_rows),
+        "DepDel15": delayed,
+        "Cancelled": cancelled.astype(int),
+    })
+    flights.to_csv(path, index=False)
+    return flights
+
+
+class TestAggregatedTraining:
+    """Test training on per (day, airport) sufficient statistics."""
+
+    def test_count_cube_matches_groupby(self, tmp_path):
+        """Test that streaming counts match a pandas groupby of the raw rows."""
+        flights = _write_flights(tmp_path / "flights.csv")
+        cube = count_flights(tmp_path / "flights.csv", chunk_rows=700)
+
+        expected = flights.fillna({"DepDel15": 0}).groupby(["DayOfWeek", "OriginAirportID"])["DepDel15"]
+        assert cube.n_flights == len(flights)
+        assert list(cube.airport_ids) == AIRPORTS
+        for (day, airport), count in expected.count().items():
+            column = AIRPORTS.index(airport)
+            assert cube.total[day - 1, column] == count
+            assert cube.delayed[day - 1, column] == expected.sum()[(day, airport)]
+
+    @pytest.mark.parametrize("encoding", ["raw", "onehot", "target"])
+    def test_aggregated_fit_matches_row_level_fit(self, tmp_path, encoding):
+        """Test that fitting weighted cells gives the same model as fitting every flight."""
+        from training.features import make_classifier
+
+        flights = _write_flights(tmp_path / "flights.csv")
+        cube = count_flights(tmp_path / "flights.csv")
+
+        aggregated = fit_cube(cube, encoding=encoding)
+        row_level = make_classifier(encoding).fit(
+            flights[["DayOfWeek", "OriginAirportID"]].to_numpy(), flights["DepDel15"].fillna(0).to_numpy()
+        )
+
+        grid = np.array([[day, airport] for day in range(1, 8) for airport in AIRPORTS])
+        np.testing.assert_allclose(
+            aggregated.predict_proba(grid), row_level.predict_proba(grid), atol=1e-3
+        )
+
+    def test_split_preserves_counts(self):
+        """Test that the train/test split partitions every cell."""
+        cube = CountCube(np.array(AIRPORTS), np.full((7, 5), 30.0), np.full((7, 5), 100.0))
+        train_cube, test_cube = cube.split(test_size=0.2, random_state=1)
+
+        np.testing.assert_array_equal(train_cube.total + test_cube.total, cube.total)
+        np.testing.assert_array_equal(train_cube.delayed + test_cube.delayed, cube.delayed)
+        assert test_cube.n_flights == pytest.approx(0.2 * cube.n_flights, rel=0.1)
+
+    def test_trained_model_loads_in_model_service(self, tmp_path):
+        """Test that the written model.pkl has the metadata ModelService expects."""
+        from services.model_service import ModelService
+
+        _write_flights(tmp_path / "flights.csv")
+        model_data = train([tmp_path / "flights.csv"], tmp_path / "model.pkl", tmp_path / "model.npz")
+        assert model_data["training_samples"] + model_data["test_samples"] == 5000
+
+        service = ModelService(model_path=str(tmp_path / "model.pkl"), compiled_path=str(tmp_path / "model.npz"))
+        assert service.load_model()
+        assert service.metadata["model_type"] == "Logistic_Regression"
+        assert service.metadata["features"] == ["DayOfWeek_Model", "OriginAirport_Model"]
+        assert 0 <= service.metadata["accuracy"] <= 1
+
+        result = service.predict_delay(3, 10397)
+        assert 0 <= result["prediction"]["delayProbability"] <= 1
+
+
+class TestFeatureEncoding:
+    """Test categorical airport encodings and their lookup table export."""
+
+    def test_onehot_learns_per_airport_rates(self, tmp_path):
+        """Test that one-hot airports rank the high-delay airport first, unlike the raw ID slope."""
+        _write_flights(tmp_path / "flights.csv", n_rows=20000)
+        cube = count_flights(tmp_path / "flights.csv")
+        grid = np.array([[4, airport] for airport in AIRPORTS])
+
+        onehot = fit_cube(cube, encoding="onehot").predict_proba(grid)[:, 1]
+        raw = fit_cube(cube, encoding="raw").predict_proba(grid)[:, 1]
+
+        assert AIRPORTS[int(np.argmax(onehot))] == 10397
+        assert AIRPORTS[int(np.argmax(raw))] != 10397
+
+    @pytest.mark.parametrize("encoding", ["onehot", "target"])
+    def test_encoded_model_compiles_to_lookup_table(self, tmp_path, encoding):
+        """Test that encoded models export to a day x airport table matching the pipeline."""
+        from services.model_service import COMPILED_KIND_TABLE, ModelService, load_compiled_model
+
+        _write_flights(tmp_path / "flights.csv")
+        model_data = train([tmp_path / "flights.csv"], tmp_path / "model.pkl", tmp_path / "model.npz",
+                           encoding=encoding)
+        assert model_data["feature_encoding"] == encoding
+
+        compiled, metadata = load_compiled_model(tmp_path / "model.npz")
+        assert metadata["kind"] == COMPILED_KIND_TABLE
+        # Includes an airport that was not in the training data
+        rows = np.array([[day, airport] for day in range(1, 8) for airport in AIRPORTS + [99999]])
+        np.testing.assert_allclose(compiled.predict_proba(rows), model_data["model_object"].predict_proba(rows),
+                                   atol=1e-12)
+        np.testing.assert_array_equal(compiled.predict(rows), model_data["model_object"].predict(rows))
+
+        service = ModelService(model_path=str(tmp_path / "model.pkl"), compiled_path=str(tmp_path / "model.npz"))
+        assert service.load_model()
+        assert service.model_object.n_features_in_ == 2
+        with pytest.raises(RuntimeError):
+            service.predict_delay(8, 10397)
+
+
+class TestModelSelection:
+    """Test the parallel cross-validation harness."""
+
+    def test_folds_partition_counts(self):
+        """Test that fold tensors add up to the cube."""
+        cube = CountCube(np.array(AIRPORTS), np.full((7, 5), 30.0), np.full((7, 5), 100.0))
+        delayed, total = cube.fold_counts(4, random_state=3)
+
+        assert delayed.shape == total.shape == (4, 7, 5)
+        np.testing.assert_array_equal(delayed.sum(axis=0), cube.delayed)
+        np.testing.assert_array_equal(total.sum(axis=0), cube.total)
+        assert np.all(delayed <= total)
+
+    def test_parallel_selection_writes_leaderboard_and_exports_winner(self, tmp_path):
+        """Test that a process pool ranks candidates and the winner loads in ModelService."""
+        import csv
+
+        from services.model_service import ModelService
+        from training.selection import LEADERBOARD_COLUMNS, build_grid, select_model
+
+        _write_flights(tmp_path / "flights.csv")
+        candidates = build_grid(
+            families=["logistic_regression", "random_forest"], encodings=["raw", "onehot"],
+            class_weights=[None, "balanced"],
+            param_grid={"logistic_regression": {"C": [1.0]}, "random_forest": {"n_estimators": [10]}}
+        )
+        leaderboard = select_model([tmp_path / "flights.csv"], tmp_path / "leaderboard.csv",
+                                   tmp_path / "model.pkl", tmp_path / "model.npz",
+                                   candidates=candidates, n_folds=3, n_jobs=2)
+
+        assert len(leaderboard) == 8
+        assert [row["rank"] for row in leaderboard] == list(range(1, 9))
+        log_losses = [row["log_loss"] for row in leaderboard]
+        assert log_losses == sorted(log_losses)
+        with open(tmp_path / "leaderboard.csv") as f:
+            rows = list(csv.DictReader(f))
+        assert tuple(rows[0]) == LEADERBOARD_COLUMNS
+        assert rows[0]["name"] == leaderboard[0]["name"]
+
+        service = ModelService(model_path=str(tmp_path / "model.pkl"), compiled_path=str(tmp_path / "model.npz"))
+        assert service.load_model()
+        assert str(service.snapshot.source).endswith("model.npz")
+        assert 0 <= service.predict_delay(3, 10397)["prediction"]["delayProbability"] <= 1
+
+    def test_balanced_class_weight_counts_flights(self, tmp_path):
+        """Test that balancing reweights by flights, raising predicted delay rates."""
+        from training.selection import build_grid, fit_candidate
+
+        _write_flights(tmp_path / "flights.csv")
+        cube = count_flights(tmp_path / "flights.csv")
+        unweighted, balanced = build_grid(["logistic_regression"], ["onehot"], [None, "balanced"],
+                                          {"logistic_regression": {"C": [1.0]}})
+        grid = np.array([[day, airport] for day in range(1, 8) for airport in AIRPORTS])
+
+        plain = fit_candidate(unweighted, cube).predict_proba(grid)[:, 1]
+        reweighted = fit_candidate(balanced, cube).predict_proba(grid)[:, 1]
+        assert np.all(reweighted > plain)
+        assert fit_candidate(balanced, cube).predict(grid).any()
+
+    def test_random_forest_weights_cells_by_flights(self, tmp_path):
+        """Test that a fully grown forest reproduces each cell's flight-level delay rate."""
+        from training.selection import build_grid, fit_candidate
+
+        _write_flights(tmp_path / "flights.csv")
+        cube = count_flights(tmp_path / "flights.csv")
+        (candidate,) = build_grid(["random_forest"], ["raw"], [None], {"random_forest": {"n_estimators": [10]}})
+        grid = np.array([[day, airport] for day in range(1, 8) for airport in cube.airport_ids])
+
+        model = fit_candidate(candidate, cube)
+        forest = model[-1] if hasattr(model, "steps") else model
+        assert forest.bootstrap is False
+        observed = cube.total.ravel() > 0
+        expected = (cube.delayed.ravel() / np.maximum(cube.total.ravel(), 1))[observed]
+        np.testing.assert_allclose(model.predict_proba(grid)[observed, 1], expected)
+
+
+class TestIngestion:
+    """Test chunked flights.csv ingestion and the columnar cache."""
+
+    def test_chunks_use_compact_dtypes_and_clean(self, tmp_path):
+        """Test that chunks have compact dtypes and missing DepDel15 becomes 0."""
+        from training.ingest import iter_csv_chunks
+
+        flights = _write_flights(tmp_path / "flights.csv")
+        chunks = list(iter_csv_chunks(tmp_path / "flights.csv", chunk_rows=1000))
+
+        assert len(chunks) == 5
+        first = chunks[0]
+        assert first["DayOfWeek"].dtype == np.int8
+        assert first["OriginAirportID"].dtype == np.int16
+        assert first["DepDel15"].dtype == np.uint8
+        assert first["Cancelled"].dtype == np.uint8
+        delayed = np.concatenate([chunk["DepDel15"] for chunk in chunks])
+        np.testing.assert_array_equal(delayed, flights["DepDel15"].fillna(0).to_numpy())
+
+    def test_drop_cancelled(self, tmp_path):
+        """Test that cancelled flights can be removed in the same pass."""
+        from training.ingest import CANCELLED_DROP, iter_csv_chunks
+
+        flights = _write_flights(tmp_path / "flights.csv")
+        chunks = list(iter_csv_chunks(tmp_path / "flights.csv", ("DayOfWeek", "OriginAirportID", "DepDel15"),
+                                      cancelled=CANCELLED_DROP))
+
+        assert sum(len(chunk["DayOfWeek"]) for chunk in chunks) == int((flights["Cancelled"] == 0).sum())
+        assert set(chunks[0]) == {"DayOfWeek", "OriginAirportID", "DepDel15"}
+
+    def test_cache_is_built_once_and_memory_mapped(self, tmp_path, monkeypatch):
+        """Test that a current cache is read with memory mapping instead of parsing the CSV."""
+        import training.ingest as ingest
+
+        _write_flights(tmp_path / "flights.csv")
+        cache_dir = tmp_path / "cache"
+        from_csv = count_flights(tmp_path / "flights.csv")
+        from_new_cache = count_flights(tmp_path / "flights.csv", cache_dir=cache_dir)
+        assert ingest.cache_is_current(tmp_path / "flights.csv", cache_dir)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("CSV parsed although the cache is current")
+
+        monkeypatch.setattr(ingest, "iter_csv_chunks", fail)
+        from_cache = count_flights(tmp_path / "flights.csv", chunk_rows=999, cache_dir=cache_dir)
+
+        for cube in (from_new_cache, from_cache):
+            np.testing.assert_array_equal(cube.total, from_csv.total)
+            np.testing.assert_array_equal(cube.delayed, from_csv.delayed)
+        cached = ingest.load_flight_cache(cache_dir)
+        assert isinstance(cached["DayOfWeek"], np.memmap)
+        assert cached["Year"].dtype == np.int16
+
+    def test_stale_cache_is_rebuilt(self, tmp_path):
+        """Test that rewriting the CSV invalidates the cache."""
+        import os
+
+        from training.ingest import cache_is_current
+
+        _write_flights(tmp_path / "flights.csv", n_rows=1000)
+        cache_dir = tmp_path / "cache"
+        assert count_flights(tmp_path / "flights.csv", cache_dir=cache_dir).n_flights == 1000
+
+        _write_flights(tmp_path / "flights.csv", n_rows=1500, seed=1)
+        stat = os.stat(tmp_path / "flights.csv")
+        os.utime(tmp_path / "flights.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert not cache_is_current(tmp_path / "flights.csv", cache_dir)
+        assert count_flights(tmp_path / "flights.csv", cache_dir=cache_dir).n_flights == 1500
+
+
+def _write_drop(path, day: str, n_rows: int = 400, seed: int = 0):
+    """Write one daily drop file whose flights all departed on the given date."""
+    flights_date = pd.Timestamp(day)
+    rng = np.random.default_rng(seed)
+    flights = pd.DataFrame({
+        "Year": flights_date.year,
+        "Month": flights_date.month,
+        "DayofMonth": flights_date.day,
+        "DayOfWeek": flights_date.dayofweek + 1,
+        "OriginAirportID": rng.choice(AIRPORTS, n_rows),
+        "DepDel15": (rng.random(n_rows) < 0.3).astype(int),
+        "Cancelled": 0,
+    })
+    flights.to_csv(path, index=False)
+    return flights
+
+
+class TestIncrementalTraining:
+    """Test incremental updates from daily drop files."""
+
+    def test_only_new_files_are_read(self, tmp_path, monkeypatch):
+        """Test that a second run counts the new drop without re-reading the first."""
+        import training.incremental as incremental
+
+        drops = tmp_path / "drops"
+        drops.mkdir()
+        _write_drop(drops / "2013-04-01.csv", "2013-04-01")
+        first_path, first = incremental.update(drops, tmp_path / "state", tmp_path / "versions")
+        assert first["source_files"] == ["2013-04-01.csv"]
+        assert incremental.update(drops, tmp_path / "state", tmp_path / "versions") is None
+
+        parsed = []
+        original = incremental.iter_csv_chunks
+        monkeypatch.setattr(incremental, "iter_csv_chunks",
+                            lambda path, *args: parsed.append(path.name) or original(path, *args))
+        _write_drop(drops / "2013-04-02.csv", "2013-04-02", seed=1)
+        second_path, second = incremental.update(drops, tmp_path / "state", tmp_path / "versions")
+
+        assert parsed == ["2013-04-02.csv"]
+        assert first["forward_test"] is None and first["metrics_scope"] == "in_sample"
+        assert second["forward_test"]["model_version"] == first["model_version"]
+        assert second["forward_test"]["flights"] == second["test_samples"]
+        assert 0 <= second["forward_test"]["accuracy"] <= 1
+        assert second["model_version"] == "2013-04-02.2"
+        assert second["data_through"] == "2013-04-02"
+        assert first_path.exists() and second_path.exists() and first_path != second_path
+
+    def test_counts_decay_with_age(self, tmp_path):
+        """Test that older flights are down-weighted by the half-life."""
+        from training.incremental import IncrementalState
+
+        _write_drop(tmp_path / "old.csv", "2013-04-01", n_rows=100)
+        _write_drop(tmp_path / "new.csv", "2013-04-08", n_rows=100, seed=1)
+
+        state = IncrementalState(half_life_days=7)
+        state.add_file(tmp_path / "old.csv")
+        assert state.cube.n_flights == pytest.approx(100)
+        state.add_file(tmp_path / "new.csv")
+
+        # One half-life later the first week counts half
+        assert state.reference_date.isoformat() == "2013-04-08"
+        assert state.cube.total[0].sum() == pytest.approx(50 + 100)
+
+        # Chunks are folded in as they are read; the chunk size does not change the counts
+        chunked = IncrementalState(half_life_days=7)
+        chunked.add_file(tmp_path / "old.csv", chunk_rows=7)
+        chunked.add_file(tmp_path / "new.csv", chunk_rows=7)
+        np.testing.assert_allclose(chunked.cube.total, state.cube.total)
+        np.testing.assert_allclose(chunked.cube.delayed, state.cube.delayed)
+
+        state.save(tmp_path / "state")
+        restored = IncrementalState.load(tmp_path / "state")
+        np.testing.assert_array_equal(restored.cube.total, state.cube.total)
+        assert restored.half_life_days == 7
+        assert restored.processed == state.processed
+
+    def test_published_model_loads_in_model_service(self, tmp_path):
+        """Test that publishing refreshes the served model.pkl and compiled artifact."""
+        from services.model_service import ModelService
+        from training.incremental import update
+
+        drops = tmp_path / "drops"
+        drops.mkdir()
+        _write_drop(drops / "2013-04-01.csv", "2013-04-01")
+        update(drops, tmp_path / "state", tmp_path / "versions",
+               publish_path=tmp_path / "model.pkl", compiled_path=tmp_path / "model.npz")
+
+        service = ModelService(model_path=str(tmp_path / "model.pkl"), compiled_path=str(tmp_path / "model.npz"))
+        assert service.load_model()
+        assert str(service.snapshot.source).endswith("model.npz")
+        assert service.snapshot.model_info["version"] == "2013-04-01.1"
@@ -0,0 +1,5 @@
+"""
+Offline training for the flight delay model.
+
+Run from the /server directory, e.g. ``python -m training.aggregated``.
+"""
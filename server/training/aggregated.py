@@ -0,0 +1,448 @@
+"""
+Aggregated Training for the Flight Delay Model
+
+The model's only features are day of week and origin airport, so every
+flight falls into one of at most 7 x n_airports cells and the per-cell
+delayed/total counts are sufficient statistics for the logistic regression
+likelihood. This module streams data/flights.csv once into a count cube and
+fits the classifier on two weighted rows per cell (delayed and not delayed),
+which gives the same model as fitting the individual flight rows while
+training time and memory depend only on the number of cells.
+"""
+
+import logging
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from training.features import (
+    DEFAULT_ENCODING,
+    ENCODINGS,
+    feature_importance,
+    fit_params,
+    make_classifier,
+    model_encoding,
+)
+from training.ingest import DEFAULT_CHUNK_ROWS, iter_flights
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ['DayOfWeek_Model', 'OriginAirport_Model']
+TARGET_CLASSES = ['Not Delayed', 'Delayed (>15min)']
+
+# flights.csv columns needed for training
+DAY_COLUMN = 'DayOfWeek'
+AIRPORT_COLUMN = 'OriginAirportID'
+TARGET_COLUMN = 'DepDel15'
+
+DAYS_PER_WEEK = 7
+
+# Hyperparameters used by the notebook
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+
+
+class CountCube:
+    """Per (day of week, origin airport) flight and delay counts."""
+
+    def __init__(self, airport_ids: Optional[np.ndarray] = None,
+                 delayed: Optional[np.ndarray] = None, total: Optional[np.ndarray] = None):
+        """
+        Initialize the cube.
+
+        Args:
+            airport_ids: Sorted airport IDs, one per column
+            delayed: Array of shape (7, n_airports) with delayed flight counts
+            total: Array of shape (7, n_airports) with total flight counts
+
+        Counts are float64 so they can also hold weighted (decayed) counts.
+        """
+        self.airport_ids = np.asarray(airport_ids if airport_ids is not None else [], dtype=np.int64)
+        shape = (DAYS_PER_WEEK, len(self.airport_ids))
+        self.delayed = np.asarray(delayed, dtype=np.float64) if delayed is not None else np.zeros(shape)
+        self.total = np.asarray(total, dtype=np.float64) if total is not None else np.zeros(shape)
+        if self.delayed.shape != shape or self.total.shape != shape:
+            raise ValueError(f"Count arrays must have shape {shape}")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Cube shape as (days, airports)."""
+        return self.total.shape
+
+    @property
+    def n_flights(self) -> float:
+        """Total number of flights counted."""
+        return float(self.total.sum())
+
+    def _ensure_airports(self, airport_ids: np.ndarray) -> None:
+        """Add columns for airport IDs not yet in the cube."""
+        new_ids = np.setdiff1d(airport_ids, self.airport_ids)
+        if len(new_ids) == 0:
+            return
+
+        merged = np.union1d(self.airport_ids, new_ids)
+        columns = np.searchsorted(merged, self.airport_ids)
+        delayed = np.zeros((DAYS_PER_WEEK, len(merged)))
+        total = np.zeros((DAYS_PER_WEEK, len(merged)))
+        delayed[:, columns] = self.delayed
+        total[:, columns] = self.total
+        self.airport_ids, self.delayed, self.total = merged, delayed, total
+
+    def add(self, days_of_week: np.ndarray, airport_ids: np.ndarray, is_delayed: np.ndarray,
+            weights: Optional[np.ndarray] = None) -> int:
+        """
+        Count a batch of flights.
+
+        Args:
+            days_of_week: Day of week per flight (1=Monday, 7=Sunday)
+            airport_ids: Origin airport ID per flight
+            is_delayed: 1 if the flight departed more than 15 minutes late, else 0
+            weights: Optional weight per flight (defaults to 1)
+
+        Returns:
+            Number of flights counted (rows with an invalid day are skipped)
+        """
+        days = np.asarray(days_of_week, dtype=np.int64)
+        airports = np.asarray(airport_ids, dtype=np.int64)
+        delayed = np.asarray(is_delayed, dtype=np.float64)
+        weights = np.ones(len(days)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+        valid = (days >= 1) & (days <= DAYS_PER_WEEK)
+        if not valid.all():
+            days, airports, delayed, weights = days[valid], airports[valid], delayed[valid], weights[valid]
+        if len(days) == 0:
+            return 0
+
+        self._ensure_airports(np.unique(airports))
+        n_cells = DAYS_PER_WEEK * len(self.airport_ids)
+        cells = (days - 1) * len(self.airport_ids) + np.searchsorted(self.airport_ids, airports)
+        self.total += np.bincount(cells, weights=weights, minlength=n_cells).reshape(self.shape)
+        self.delayed += np.bincount(cells, weights=weights * delayed, minlength=n_cells).reshape(self.shape)
+        return len(days)
+
+    def training_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Expand the cube into weighted training rows.
+
+        Each non-empty cell becomes one delayed row weighted by its delayed
+        count and one on-time row weighted by the remaining flights.
+
+        Returns:
+            Tuple of (X with columns FEATURES, y, sample_weight), zero-weight rows dropped
+        """
+        day_grid, airport_grid = np.meshgrid(
+            np.arange(1, DAYS_PER_WEEK + 1), self.airport_ids, indexing='ij'
+        )
+        cells = np.column_stack((day_grid.ravel(), airport_grid.ravel()))
+        delayed = self.delayed.ravel()
+        on_time = self.total.ravel() - delayed
+
+        X = np.vstack((cells, cells))
+        y = np.concatenate((np.ones(len(cells), dtype=np.int64), np.zeros(len(cells), dtype=np.int64)))
+        weights = np.concatenate((delayed, on_time))
+        keep = weights > 0
+        return X[keep], y[keep], weights[keep]
+
+    def split(self, test_size: float = TEST_SIZE, random_state: int = RANDOM_STATE) -> Tuple["CountCube", "CountCube"]:
+        """
+        Randomly split the counted flights into train and test cubes.
+
+        Equivalent to a stratified row-level split: each cell's delayed and
+        on-time counts are split with the same test fraction.
+
+        Args:
+            test_size: Fraction of flights in the test cube
+            random_state: Seed for the split
+
+        Returns:
+            Tuple of (train cube, test cube)
+        """
+        rng = np.random.default_rng(random_state)
+        delayed = np.rint(self.delayed).astype(np.int64)
+        on_time = np.rint(self.total).astype(np.int64) - delayed
+        test_delayed = rng.binomial(delayed, test_size)
+        test_on_time = rng.binomial(on_time, test_size)
+
+        test = CountCube(self.airport_ids.copy(), test_delayed, test_delayed + test_on_time)
+        train = CountCube(self.airport_ids.copy(), delayed - test_delayed,
+                          (delayed - test_delayed) + (on_time - test_on_time))
+        return train, test
+
+    def fold_counts(self, n_folds: int, random_state: int = RANDOM_STATE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Randomly assign the counted flights to cross-validation folds.
+
+        Each cell's delayed and on-time counts are split multinomially with
+        equal probabilities, like a stratified row-level KFold.
+
+        Args:
+            n_folds: Number of folds
+            random_state: Seed for the assignment
+
+        Returns:
+            Tuple of (delayed, total) arrays with shape (n_folds, 7, n_airports)
+        """
+        if n_folds < 2:
+            raise ValueError("n_folds must be at least 2")
+        rng = np.random.default_rng(random_state)
+        delayed = np.rint(self.delayed).astype(np.int64)
+        on_time = np.rint(self.total).astype(np.int64) - delayed
+        probabilities = np.full(n_folds, 1.0 / n_folds)
+        fold_delayed = np.moveaxis(rng.multinomial(delayed, probabilities), -1, 0)
+        fold_on_time = np.moveaxis(rng.multinomial(on_time, probabilities), -1, 0)
+        return fold_delayed, fold_delayed + fold_on_time
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Save the cube as an .npz file.
+
+        Args:
+            path: Output path
+
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        np.savez(path, airport_ids=self.airport_ids, delayed=self.delayed, total=self.total)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CountCube":
+        """
+        Load a cube saved with save().
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            CountCube
+        """
+        with np.load(path) as data:
+            return cls(data['airport_ids'], data['delayed'], data['total'])
+
+
+def count_flights(csv_path: Union[str, Path], chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  cube: Optional[CountCube] = None, cache_dir: Optional[Union[str, Path]] = None) -> CountCube:
+    """
+    Stream a flights CSV once into a count cube.
+
+    Only the day, origin airport and DepDel15 columns are read. Missing
+    DepDel15 values (cancelled flights) count as not delayed, as in the
+    notebook.
+
+    Args:
+        csv_path: Path to flights.csv
+        chunk_rows: Rows read per chunk
+        cube: Existing cube to add to (a new one is created by default)
+        cache_dir: Columnar cache directory used instead of parsing the CSV
+            when it is current (see training.ingest)
+
+    Returns:
+        CountCube with the flights counted
+    """
+    cube = cube if cube is not None else CountCube()
+    rows = 0
+    for chunk in iter_flights(csv_path, (DAY_COLUMN, AIRPORT_COLUMN, TARGET_COLUMN), chunk_rows, cache_dir):
+        rows += cube.add(chunk[DAY_COLUMN], chunk[AIRPORT_COLUMN], chunk[TARGET_COLUMN])
+    logger.info(f"Counted {rows:,} flights into {cube.shape[0]} days x {cube.shape[1]} airports")
+    return cube
+
+
+def fit_cube(cube: CountCube, random_state: int = RANDOM_STATE, encoding: str = DEFAULT_ENCODING):
+    """
+    Fit the delay classifier on a count cube.
+
+    Args:
+        cube: Flight counts to train on
+        random_state: Seed passed to the classifier
+        encoding: Feature encoding, one of training.features.ENCODINGS
+
+    Returns:
+        Fitted scikit-learn LogisticRegression, or Pipeline for encoded features
+    """
+    X, y, weights = cube.training_rows()
+    if len(np.unique(y)) < 2:
+        raise ValueError("Training data must contain both delayed and on-time flights")
+
+    model = make_classifier(encoding, random_state)
+    model.fit(X, y, **fit_params(model, weights))
+    return model
+
+
+def evaluate_cube(model, cube: CountCube) -> Dict[str, float]:
+    """
+    Compute classification metrics of a model over a count cube.
+
+    Args:
+        model: Fitted classifier
+        cube: Flight counts to evaluate on
+
+    Returns:
+        Dictionary with accuracy, precision, recall and f1_score
+    """
+    day_grid, airport_grid = np.meshgrid(
+        np.arange(1, DAYS_PER_WEEK + 1), cube.airport_ids, indexing='ij'
+    )
+    predicted = model.predict(np.column_stack((day_grid.ravel(), airport_grid.ravel()))) == 1
+    delayed = cube.delayed.ravel()
+    on_time = cube.total.ravel() - delayed
+
+    true_positive = float(delayed[predicted].sum())
+    false_positive = float(on_time[predicted].sum())
+    false_negative = float(delayed[~predicted].sum())
+    true_negative = float(on_time[~predicted].sum())
+    total = true_positive + false_positive + false_negative + true_negative
+
+    precision = true_positive / (true_positive + false_positive) if true_positive + false_positive else 0.0
+    recall = true_positive / (true_positive + false_negative) if true_positive + false_negative else 0.0
+    return {
+        'accuracy': (true_positive + true_negative) / total if total else 0.0,
+        'precision': precision,
+        'recall': recall,
+        'f1_score': 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    }
+
+
+def build_model_data(model, train: CountCube, test: CountCube, model_version: str = '1.0',
+                     extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build the model.pkl dictionary in the format written by the notebook.
+
+    Args:
+        model: Fitted classifier
+        train: Flights the model was trained on
+        test: Held-out flights used for the reported metrics
+        model_version: Version string stored with the model
+        extra: Additional metadata fields
+
+    Returns:
+        Dictionary with the fields read by ModelService.load_model
+    """
+    metrics = evaluate_cube(model, test)
+    delayed = int(round(train.delayed.sum() + test.delayed.sum()))
+    total = int(round(train.n_flights + test.n_flights))
+
+    model_data = {
+        'model_type': 'Logistic_Regression',
+        'model_object': model,
+        'features': list(FEATURES),
+        'target_classes': list(TARGET_CLASSES),
+        'training_samples': int(round(train.n_flights)),
+        'test_samples': int(round(test.n_flights)),
+        **metrics,
+        'feature_importance': feature_importance(model, FEATURES),
+        'feature_encoding': model_encoding(model),
+        'airport_ids': train.airport_ids.tolist(),
+        'class_distribution': {
+            'not_delayed': total - delayed,
+            'delayed': delayed
+        },
+        'training_method': 'aggregated',
+        'export_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'model_version': model_version
+    }
+    model_data.update(extra or {})
+    return model_data
+
+
+def train_from_cube(cube: CountCube, test_size: float = TEST_SIZE, random_state: int = RANDOM_STATE,
+                    model_version: str = '1.0', encoding: str = DEFAULT_ENCODING) -> Dict[str, Any]:
+    """
+    Split a cube, fit on the train part and report metrics on the test part.
+
+    Args:
+        cube: All counted flights
+        test_size: Fraction of flights held out for evaluation
+        random_state: Seed for the split and the classifier
+        model_version: Version string stored with the model
+        encoding: Feature encoding, one of training.features.ENCODINGS
+
+    Returns:
+        model.pkl dictionary
+    """
+    train, test = cube.split(test_size, random_state) if test_size > 0 else (cube, cube)
+    model = fit_cube(train, random_state, encoding)
+    model_data = build_model_data(model, train, test, model_version)
+    logger.info(
+        f"Trained on {model_data['training_samples']:,} flights in {train.shape[1]} airports, "
+        f"test accuracy {model_data['accuracy']:.4f}"
+    )
+    return model_data
+
+
+def save_model(model_data: Dict[str, Any], output_path: Union[str, Path],
+               compiled_path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Write model.pkl and optionally re-export the compiled serving artifact.
+
+    Args:
+        model_data: Dictionary from train_from_cube()
+        output_path: Path of the pickle to write
+        compiled_path: Path of the compiled .npz artifact to refresh
+
+    Returns:
+        Path of the written pickle
+    """
+    output_path = Path(output_path)
+    with open(output_path, 'wb') as f:
+        pickle.dump(model_data, f)
+    logger.info(f"Saved model to {output_path}")
+
+    if compiled_path is not None:
+        from services.model_service import export_compiled_model
+        export_compiled_model(output_path, compiled_path)
+    return output_path
+
+
+def train(csv_paths: Iterable[Union[str, Path]], output_path: Union[str, Path],
+          compiled_path: Optional[Union[str, Path]] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+          model_version: str = '1.0', cache_root: Optional[Union[str, Path]] = None,
+          encoding: str = DEFAULT_ENCODING) -> Dict[str, Any]:
+    """
+    Train the delay model from one or more flights CSV files.
+
+    Args:
+        csv_paths: Flights CSV files (e.g. one per year)
+        output_path: Path of the model.pkl to write
+        compiled_path: Path of the compiled .npz artifact to refresh
+        chunk_rows: Rows parsed per chunk
+        model_version: Version string stored with the model
+        cache_root: Directory holding one columnar cache per CSV file
+        encoding: Feature encoding, one of training.features.ENCODINGS
+
+    Returns:
+        The saved model.pkl dictionary
+    """
+    cube = CountCube()
+    for csv_path in csv_paths:
+        cache_dir = Path(cache_root) / Path(csv_path).stem if cache_root is not None else None
+        count_flights(csv_path, chunk_rows, cube, cache_dir)
+    model_data = train_from_cube(cube, model_version=model_version, encoding=encoding)
+    save_model(model_data, output_path, compiled_path)
+    return model_data
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Train the delay model on aggregated flight counts")
+    parser.add_argument("data", nargs="*", default=["../data/flights.csv"], help="Flights CSV files")
+    parser.add_argument("--output", default="../models/model.pkl", help="Path of the model.pkl to write")
+    parser.add_argument("--compiled", default="../models/model.npz",
+                        help="Path of the compiled artifact to refresh ('' to skip)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows parsed per chunk")
+    parser.add_argument("--model-version", default="1.0", help="Version stored with the model")
+    parser.add_argument("--cache-dir", help="Directory for columnar caches of the CSV files")
+    parser.add_argument("--encoding", choices=ENCODINGS, default=DEFAULT_ENCODING,
+                        help="Feature encoding of day and airport")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    start = time.perf_counter()
+    train(args.data, args.output, args.compiled or None, args.chunk_rows, args.model_version, args.cache_dir,
+          args.encoding)
+    logger.info(f"Training finished in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,209 @@
+"""
+Feature Encoding for the Flight Delay Model
+
+The notebook passes the raw origin AirportID to the logistic regression as a
+number, so the model can only learn a slope over ID magnitude. The encoders
+here turn day of week and airport into categorical features instead:
+
+- ``onehot``: sparse one-hot columns for the 7 days and every airport
+- ``target``: one-hot days plus the airport's smoothed delay log-odds
+- ``raw``: the notebook's numeric features, kept for comparison
+
+Whatever the encoding, the model is still a function of (day, airport) only,
+so it is exported to the same day x airport lookup table for serving (see
+services.model_service.export_compiled_model).
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+ENCODING_RAW = 'raw'
+ENCODING_ONEHOT = 'onehot'
+ENCODING_TARGET = 'target'
+ENCODINGS = (ENCODING_RAW, ENCODING_ONEHOT, ENCODING_TARGET)
+DEFAULT_ENCODING = ENCODING_ONEHOT
+
+# Prior weight, in flights, pulling small airports towards the overall delay rate
+DEFAULT_SMOOTHING = 20.0
+
+DAYS_PER_WEEK = 7
+
+
+class DayAirportEncoder(TransformerMixin, BaseEstimator):
+    """Encode [day of week, airport ID] rows as sparse categorical features."""
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING, smoothing: float = DEFAULT_SMOOTHING):
+        """
+        Initialize the encoder.
+
+        Args:
+            encoding: ENCODING_ONEHOT or ENCODING_TARGET
+            smoothing: Prior weight for target encoding
+        """
+        self.encoding = encoding
+        self.smoothing = smoothing
+
+    def fit(self, X, y=None, sample_weight: Optional[np.ndarray] = None) -> "DayAirportEncoder":
+        """
+        Learn the airport vocabulary (and airport delay log-odds for target encoding).
+
+        Args:
+            X: Array of shape (n, 2) with day of week and airport ID
+            y: 1 for delayed rows, 0 otherwise (required for target encoding)
+            sample_weight: Optional weight per row
+
+        Returns:
+            self
+        """
+        if self.encoding not in (ENCODING_ONEHOT, ENCODING_TARGET):
+            raise ValueError(f"encoding must be {ENCODING_ONEHOT!r} or {ENCODING_TARGET!r}")
+        X = np.asarray(X)
+        airports = X[:, 1].astype(np.int64)
+        self.airport_ids_ = np.unique(airports)
+        self.n_features_in_ = X.shape[1]
+
+        if self.encoding == ENCODING_TARGET:
+            if y is None:
+                raise ValueError("Target encoding requires y")
+            weights = np.ones(len(airports)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+            columns = np.searchsorted(self.airport_ids_, airports)
+            total = np.bincount(columns, weights=weights, minlength=len(self.airport_ids_))
+            delayed = np.bincount(columns, weights=weights * np.asarray(y, dtype=np.float64),
+                                  minlength=len(self.airport_ids_))
+            prior = delayed.sum() / total.sum()
+            rates = (delayed + self.smoothing * prior) / (total + self.smoothing)
+            self.prior_log_odds_ = float(np.log(prior / (1 - prior)))
+            self.airport_log_odds_ = np.log(rates / (1 - rates))
+        return self
+
+    def transform(self, X):
+        """
+        Encode rows; airports not seen in fit get no airport indicator
+        (one-hot) or the overall log-odds (target).
+
+        Args:
+            X: Array of shape (n, 2) with day of week and airport ID
+
+        Returns:
+            scipy.sparse CSR matrix
+        """
+        from scipy import sparse
+
+        X = np.asarray(X)
+        days = X[:, 0].astype(np.int64)
+        airports = X[:, 1].astype(np.int64)
+        n_rows = len(X)
+        rows = np.arange(n_rows)
+
+        day_valid = (days >= 1) & (days <= DAYS_PER_WEEK)
+        day_block = sparse.csr_matrix(
+            (np.ones(day_valid.sum()), (rows[day_valid], days[day_valid] - 1)), shape=(n_rows, DAYS_PER_WEEK)
+        )
+
+        columns = np.minimum(np.searchsorted(self.airport_ids_, airports), max(len(self.airport_ids_) - 1, 0))
+        known = self.airport_ids_[columns] == airports
+        if self.encoding == ENCODING_ONEHOT:
+            airport_block = sparse.csr_matrix(
+                (np.ones(known.sum()), (rows[known], columns[known])), shape=(n_rows, len(self.airport_ids_))
+            )
+        else:
+            log_odds = np.where(known, self.airport_log_odds_[columns], self.prior_log_odds_)
+            airport_block = sparse.csr_matrix(log_odds.reshape(-1, 1))
+        return sparse.hstack((day_block, airport_block), format='csr')
+
+
+def make_classifier(encoding: str = DEFAULT_ENCODING, random_state: int = 42,
+                    smoothing: float = DEFAULT_SMOOTHING, classifier=None):
+    """
+    Create the delay classifier for an encoding.
+
+    Args:
+        encoding: One of ENCODINGS
+        random_state: Seed passed to the default classifier
+        smoothing: Prior weight for target encoding
+        classifier: Unfitted estimator to use instead of the notebook's LogisticRegression
+
+    Returns:
+        Unfitted classifier (raw) or Pipeline of DayAirportEncoder and the classifier
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {ENCODINGS}")
+    if classifier is None:
+        classifier = LogisticRegression(random_state=random_state, max_iter=1000)
+    if encoding == ENCODING_RAW:
+        return classifier
+    return Pipeline([
+        ('encode', DayAirportEncoder(encoding, smoothing)),
+        ('classifier', classifier),
+    ])
+
+
+def fit_params(model, sample_weight: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Keyword arguments passing sample weights to every step of a classifier.
+
+    Args:
+        model: Classifier from make_classifier()
+        sample_weight: Weight per training row
+
+    Returns:
+        Keyword arguments for model.fit()
+    """
+    if hasattr(model, 'steps'):
+        return {f"{name}__sample_weight": sample_weight for name, _ in model.steps}
+    return {'sample_weight': sample_weight}
+
+
+def model_encoding(model) -> str:
+    """
+    Feature encoding of a classifier from make_classifier().
+
+    Args:
+        model: Classifier from make_classifier()
+
+    Returns:
+        One of ENCODINGS
+    """
+    return model.named_steps['encode'].encoding if hasattr(model, 'steps') else ENCODING_RAW
+
+
+def feature_importance(model, features) -> Dict[str, float]:
+    """
+    Importance per input feature.
+
+    For the raw model this is the absolute coefficient, as in the notebook.
+    For encoded models it is the range of the feature's contribution to the
+    delay log-odds across its values. Tree models report their impurity
+    based importances, summed over each feature's encoded columns.
+
+    Args:
+        model: Fitted classifier from make_classifier()
+        features: Names of the two input features
+
+    Returns:
+        Dictionary of feature name -> importance
+    """
+    classifier = model.steps[-1][1] if hasattr(model, 'steps') else model
+    if not hasattr(classifier, 'coef_'):
+        importances = classifier.feature_importances_
+        if model_encoding(model) == ENCODING_RAW:
+            return {feature: float(value) for feature, value in zip(features, importances)}
+        return {features[0]: float(importances[:DAYS_PER_WEEK].sum()),
+                features[1]: float(importances[DAYS_PER_WEEK:].sum())}
+
+    if model_encoding(model) == ENCODING_RAW:
+        return {feature: float(value) for feature, value in zip(features, np.abs(model.coef_[0]))}
+
+    encoder = model.named_steps['encode']
+    coef = classifier.coef_[0]
+    day_coef, airport_coef = coef[:DAYS_PER_WEEK], coef[DAYS_PER_WEEK:]
+    if encoder.encoding == ENCODING_TARGET:
+        airport_range = abs(airport_coef[0]) * np.ptp(encoder.airport_log_odds_)
+    else:
+        airport_range = np.ptp(airport_coef)
+    return {features[0]: float(np.ptp(day_coef)), features[1]: float(airport_range)}
@@ -0,0 +1,382 @@
+"""
+Incremental Training for the Flight Delay Model
+
+Keeps the per (day of week, origin airport) delayed/total counts between
+runs and folds in only newly arrived flight files, so a daily update never
+re-reads history. Counts decay exponentially with the age of the flight
+(configurable half-life), which makes recent weeks weigh more. Every update
+fits the classifier on the decayed counts and writes a new versioned
+model.pkl, optionally publishing it to the path the API serves from. Before
+the new flights are counted, the previous model is scored on them as a
+forward test.
+
+Intended to run from cron against a directory of daily CSV drops, e.g.
+    python -m training.incremental --drops ../data/daily --publish
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from training.aggregated import (
+    AIRPORT_COLUMN,
+    DAY_COLUMN,
+    TARGET_COLUMN,
+    CountCube,
+    build_model_data,
+    evaluate_cube,
+    fit_cube,
+    save_model,
+)
+from training.ingest import DEFAULT_CHUNK_ROWS, iter_csv_chunks
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT_VERSION = 1
+COUNTS_NAME = "counts.npz"
+STATE_NAME = "state.json"
+
+DEFAULT_HALF_LIFE_DAYS = 28.0
+
+DATE_COLUMNS = ('Year', 'Month', 'DayofMonth')
+
+
+def flight_dates(chunk: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Build flight dates from the Year, Month and DayofMonth columns.
+
+    Args:
+        chunk: Column arrays from training.ingest
+
+    Returns:
+        datetime64[D] array
+    """
+    years = (chunk['Year'].astype(np.int64) - 1970).astype('datetime64[Y]')
+    months = years.astype('datetime64[M]') + (chunk['Month'].astype(np.int64) - 1)
+    return months.astype('datetime64[D]') + (chunk['DayofMonth'].astype(np.int64) - 1)
+
+
+def decay_factor(age_days: Union[float, np.ndarray], half_life_days: float) -> Union[float, np.ndarray]:
+    """
+    Weight of a flight of the given age.
+
+    Args:
+        age_days: Age in days relative to the reference date
+        half_life_days: Age at which a flight counts half; 0 disables decay
+
+    Returns:
+        Weight between 0 and 1 (1 for flights at the reference date)
+    """
+    if half_life_days <= 0:
+        return np.ones_like(age_days, dtype=np.float64) if isinstance(age_days, np.ndarray) else 1.0
+    return np.power(0.5, np.asarray(age_days, dtype=np.float64) / half_life_days)
+
+
+def _file_key(path: Path) -> Dict[str, int]:
+    """Size and modification time identifying a drop file."""
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class IncrementalState:
+    """Decayed count cube plus bookkeeping persisted between incremental runs."""
+
+    def __init__(self, cube: Optional[CountCube] = None, reference_date: Optional[date] = None,
+                 half_life_days: float = DEFAULT_HALF_LIFE_DAYS, version: int = 0,
+                 processed: Optional[Dict[str, Dict[str, int]]] = None):
+        """
+        Initialize the state.
+
+        Args:
+            cube: Counts weighted relative to reference_date
+            reference_date: Date the weights are relative to (newest flight seen)
+            half_life_days: Decay half-life used for all counts
+            version: Number of models produced so far
+            processed: Drop files already counted, by name, with size and mtime
+        """
+        self.cube = cube if cube is not None else CountCube()
+        self.reference_date = reference_date
+        self.half_life_days = half_life_days
+        self.version = version
+        self.processed = processed if processed is not None else {}
+
+    @classmethod
+    def load(cls, state_dir: Union[str, Path], half_life_days: float = DEFAULT_HALF_LIFE_DAYS) -> "IncrementalState":
+        """
+        Load the state from a directory, or start empty if there is none.
+
+        Args:
+            state_dir: Directory written by save()
+            half_life_days: Half-life for a new state (an existing state keeps its own)
+
+        Returns:
+            IncrementalState
+        """
+        state_dir = Path(state_dir)
+        try:
+            with open(state_dir / STATE_NAME) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return cls(half_life_days=half_life_days)
+
+        if state.get('format_version') != STATE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported incremental state format in {state_dir}")
+        if state['half_life_days'] != half_life_days:
+            logger.warning(
+                f"Keeping the stored half-life of {state['half_life_days']} days; "
+                f"start a new state directory to change it"
+            )
+        reference_date = state.get('reference_date')
+        return cls(
+            cube=CountCube.load(state_dir / COUNTS_NAME),
+            reference_date=date.fromisoformat(reference_date) if reference_date else None,
+            half_life_days=state['half_life_days'],
+            version=state['version'],
+            processed=state['processed']
+        )
+
+    def save(self, state_dir: Union[str, Path]) -> None:
+        """
+        Write the state atomically (counts first, then the state file that references them).
+
+        Args:
+            state_dir: Directory to write
+        """
+        state_dir = Path(state_dir)
+        state_dir.mkdir(parents=True, exist_ok=True)
+
+        fd, counts_tmp = tempfile.mkstemp(suffix='.npz', dir=state_dir)
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, airport_ids=self.cube.airport_ids, delayed=self.cube.delayed, total=self.cube.total)
+        os.replace(counts_tmp, state_dir / COUNTS_NAME)
+
+        state = {
+            'format_version': STATE_FORMAT_VERSION,
+            'reference_date': self.reference_date.isoformat() if self.reference_date else None,
+            'half_life_days': self.half_life_days,
+            'version': self.version,
+            'processed': self.processed,
+        }
+        fd, state_tmp = tempfile.mkstemp(suffix='.json', dir=state_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(state_tmp, state_dir / STATE_NAME)
+
+    def advance_to(self, new_reference: date) -> None:
+        """
+        Move the reference date forward, decaying the existing counts.
+
+        Args:
+            new_reference: New reference date (ignored if not later than the current one)
+        """
+        if self.reference_date is not None and new_reference <= self.reference_date:
+            return
+        if self.reference_date is not None:
+            factor = decay_factor((new_reference - self.reference_date).days, self.half_life_days)
+            self.cube.delayed *= factor
+            self.cube.total *= factor
+        self.reference_date = new_reference
+
+    def pending_files(self, drops_dir: Union[str, Path], pattern: str = "*.csv") -> List[Path]:
+        """
+        List drop files that have not been counted yet, oldest name first.
+
+        Files already processed are skipped; a processed file that changed is
+        reported and skipped, since counting it again would double count.
+
+        Args:
+            drops_dir: Directory of daily CSV drops
+            pattern: Glob pattern for drop files
+
+        Returns:
+            Paths of new files
+        """
+        pending = []
+        for path in sorted(Path(drops_dir).glob(pattern)):
+            seen = self.processed.get(path.name)
+            if seen is None:
+                pending.append(path)
+            elif seen != _file_key(path):
+                logger.warning(f"{path.name} changed after it was counted; skipping it")
+        return pending
+
+    def add_file(self, csv_path: Union[str, Path], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> CountCube:
+        """
+        Count a new drop file into the decayed cube.
+
+        Flights are dated from the Year/Month/DayofMonth columns, or the
+        file's modification date if the file has none.
+
+        Args:
+            csv_path: Drop file
+            chunk_rows: Rows parsed per chunk
+
+        Returns:
+            Undecayed counts of this file alone
+        """
+        csv_path = Path(csv_path)
+        file_date = np.datetime64(datetime.fromtimestamp(csv_path.stat().st_mtime).date(), 'D')
+        batch = CountCube()
+        for chunk in iter_csv_chunks(
+            csv_path, (*DATE_COLUMNS, DAY_COLUMN, AIRPORT_COLUMN, TARGET_COLUMN), chunk_rows
+        ):
+            if all(column in chunk for column in DATE_COLUMNS):
+                dates = flight_dates(chunk)
+            else:
+                dates = np.full(len(chunk[DAY_COLUMN]), file_date)
+            if not len(dates):
+                continue
+
+            # Newer flights move the reference date forward, decaying everything
+            # counted so far (including earlier chunks of this file)
+            self.advance_to(dates.max().astype(date))
+            ages = (np.datetime64(self.reference_date, 'D') - dates).astype(np.int64)
+            self.cube.add(chunk[DAY_COLUMN], chunk[AIRPORT_COLUMN], chunk[TARGET_COLUMN],
+                          weights=decay_factor(ages, self.half_life_days))
+            batch.add(chunk[DAY_COLUMN], chunk[AIRPORT_COLUMN], chunk[TARGET_COLUMN])
+
+        self.processed[csv_path.name] = _file_key(csv_path)
+        logger.info(f"Counted {int(batch.n_flights):,} flights from {csv_path.name}")
+        return batch
+
+
+def _publish(model_path: Path, publish_path: Path, compiled_path: Optional[Path]) -> None:
+    """Copy a versioned model to the served paths, replacing each file atomically."""
+    from services.model_service import export_compiled_model
+
+    publish_path.parent.mkdir(parents=True, exist_ok=True)
+    if compiled_path is not None:
+        fd, compiled_tmp = tempfile.mkstemp(suffix='.npz', dir=compiled_path.parent)
+        os.close(fd)
+        export_compiled_model(model_path, compiled_tmp)
+        os.replace(compiled_tmp, compiled_path)
+
+    fd, model_tmp = tempfile.mkstemp(suffix='.pkl', dir=publish_path.parent)
+    os.close(fd)
+    shutil.copyfile(model_path, model_tmp)
+    os.replace(model_tmp, publish_path)
+    logger.info(f"Published {model_path.name} to {publish_path}")
+
+
+def update(drops_dir: Union[str, Path], state_dir: Union[str, Path], output_dir: Union[str, Path],
+           half_life_days: float = DEFAULT_HALF_LIFE_DAYS, publish_path: Optional[Union[str, Path]] = None,
+           compiled_path: Optional[Union[str, Path]] = None,
+           chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Optional[Tuple[Path, Dict[str, Any]]]:
+    """
+    Fold new drop files into the counts and write a new model version.
+
+    Args:
+        drops_dir: Directory of daily CSV drops
+        state_dir: Directory holding the incremental state
+        output_dir: Directory for versioned model files
+        half_life_days: Decay half-life for a new state
+        publish_path: Also copy the new model here (e.g. ../models/model.pkl)
+        compiled_path: Refresh this compiled artifact when publishing
+        chunk_rows: Rows parsed per chunk
+
+    Returns:
+        Tuple of (versioned model path, model.pkl dictionary), or None if
+        there were no new files
+    """
+    state = IncrementalState.load(state_dir, half_life_days)
+    pending = state.pending_files(drops_dir)
+    if not pending:
+        logger.info(f"No new files in {drops_dir}")
+        return None
+
+    # The previous model, refit from the stored counts, has not seen the new
+    # flights: scoring it on them is a forward test
+    previous_model, previous_version = _previous_model(state)
+
+    latest = CountCube()
+    for path in pending:
+        batch = state.add_file(path, chunk_rows)
+        latest.add(*_cube_rows(batch))
+
+    forward_test = None
+    if previous_model is not None:
+        forward_test = {
+            'model_version': previous_version,
+            'flights': int(round(latest.n_flights)),
+            **evaluate_cube(previous_model, latest)
+        }
+
+    state.version += 1
+    model = fit_cube(state.cube)
+    model_version = f"{state.reference_date.isoformat()}.{state.version}"
+    model_data = build_model_data(model, state.cube, latest, model_version, extra={
+        'training_method': 'incremental',
+        'half_life_days': state.half_life_days,
+        'data_through': state.reference_date.isoformat(),
+        'source_files': [path.name for path in pending],
+        # Decayed weights, not flight counts
+        'class_distribution': {
+            'not_delayed': float(state.cube.n_flights - state.cube.delayed.sum()),
+            'delayed': float(state.cube.delayed.sum())
+        },
+        # The new flights are part of the training counts, so the top-level
+        # metrics are in-sample; forward_test holds the out-of-sample score
+        'metrics_scope': 'in_sample',
+        'forward_test': forward_test,
+    })
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model_path = save_model(model_data, output_dir / f"model-{model_version}.pkl")
+    if publish_path is not None:
+        _publish(model_path, Path(publish_path), Path(compiled_path) if compiled_path else None)
+
+    # Saved last: if anything above fails, the files are counted again next run
+    state.save(state_dir)
+    forward = (f"forward-test accuracy of {previous_version} {forward_test['accuracy']:.4f}"
+               if forward_test is not None else "no previous model to forward-test")
+    logger.info(
+        f"Model {model_version}: {len(pending)} new files, effective training weight "
+        f"{state.cube.n_flights:,.0f}, in-sample accuracy on new flights {model_data['accuracy']:.4f}, {forward}"
+    )
+    return model_path, model_data
+
+
+def _previous_model(state: IncrementalState) -> Tuple[Optional[Any], Optional[str]]:
+    """Refit the model of the last update from the stored counts, or (None, None) if there is none."""
+    if state.version == 0 or state.reference_date is None:
+        return None, None
+    try:
+        model = fit_cube(state.cube)
+    except ValueError:
+        return None, None
+    return model, f"{state.reference_date.isoformat()}.{state.version}"
+
+
+def _cube_rows(cube: CountCube) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Expand a cube into (days, airports, is_delayed, weights) rows for CountCube.add."""
+    X, y, weights = cube.training_rows()
+    return X[:, 0], X[:, 1], y, weights
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Update the delay model with newly arrived flight files")
+    parser.add_argument("--drops", default="../data/daily", help="Directory of daily flights CSV drops")
+    parser.add_argument("--state", default="../models/incremental", help="Directory for the incremental state")
+    parser.add_argument("--output-dir", default="../models/versions", help="Directory for versioned models")
+    parser.add_argument("--half-life-days", type=float, default=DEFAULT_HALF_LIFE_DAYS,
+                        help="Days after which a flight counts half (0 disables decay)")
+    parser.add_argument("--publish", nargs="?", const="../models/model.pkl",
+                        help="Copy the new model to this path (default ../models/model.pkl)")
+    parser.add_argument("--compiled", default="../models/model.npz",
+                        help="Compiled artifact refreshed when publishing ('' to skip)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows parsed per chunk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    update(args.drops, args.state, args.output_dir, args.half_life_days, args.publish,
+           args.compiled or None, args.chunk_rows)
@@ -0,0 +1,351 @@
+"""
+Flight Data Ingestion for Training
+
+Reads flights.csv in chunks, parsing only the needed columns straight into
+compact dtypes and cleaning them in the same pass (missing DepDel15 -> 0,
+optional removal of cancelled flights). The cleaned columns can be written
+once to a columnar cache of one .npy file per column, which later runs
+memory-map instead of parsing the CSV again.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Compact in-memory dtypes for the columns used by training and evaluation.
+# BTS airport IDs are 5-digit numbers below 32768, so int16 holds them.
+COLUMN_DTYPES = {
+    'Year': np.int16,
+    'Month': np.int8,
+    'DayofMonth': np.int8,
+    'DayOfWeek': np.int8,
+    'OriginAirportID': np.int16,
+    'DestAirportID': np.int16,
+    'DepDel15': np.uint8,
+    'Cancelled': np.uint8,
+}
+
+# Columns that may be missing in the CSV and are parsed as floats first
+_NULLABLE_COLUMNS = frozenset({'DepDel15', 'Cancelled'})
+
+REQUIRED_COLUMNS = ('DayOfWeek', 'OriginAirportID', 'DepDel15')
+DEFAULT_COLUMNS = ('Year', 'Month', 'DayofMonth', 'DayOfWeek', 'OriginAirportID', 'DepDel15', 'Cancelled')
+
+# How cancelled flights are handled: kept with DepDel15 as recorded (missing
+# values count as not delayed, as in the notebook), or dropped
+CANCELLED_KEEP = 'keep'
+CANCELLED_DROP = 'drop'
+
+FlightColumns = Dict[str, np.ndarray]
+
+
+def _parse_dtypes(columns: Sequence[str]) -> Dict[str, str]:
+    """Dtypes passed to read_csv; nullable columns are read as float32 and cleaned afterwards."""
+    return {
+        column: 'float32' if column in _NULLABLE_COLUMNS else np.dtype(COLUMN_DTYPES[column]).name
+        for column in columns
+    }
+
+
+def _clean_chunk(chunk, columns: Sequence[str], cancelled: str) -> FlightColumns:
+    """Convert a parsed DataFrame chunk into cleaned, compact column arrays."""
+    arrays = {}
+    for column in columns:
+        values = chunk[column].to_numpy()
+        if column in _NULLABLE_COLUMNS:
+            values = np.nan_to_num(values, nan=0.0)
+        arrays[column] = values.astype(COLUMN_DTYPES[column], copy=False)
+
+    if cancelled == CANCELLED_DROP and 'Cancelled' in arrays:
+        keep = arrays['Cancelled'] == 0
+        arrays = {column: values[keep] for column, values in arrays.items()}
+    return arrays
+
+
+def iter_csv_chunks(csv_path: Union[str, Path], columns: Sequence[str] = DEFAULT_COLUMNS,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS, cancelled: str = CANCELLED_KEEP) -> Iterator[FlightColumns]:
+    """
+    Parse a flights CSV in chunks into cleaned column arrays.
+
+    Columns that are requested but not present in the file are skipped,
+    except the REQUIRED_COLUMNS.
+
+    Args:
+        csv_path: Path to the flights CSV
+        columns: Columns to parse (keys of COLUMN_DTYPES)
+        chunk_rows: Rows parsed per chunk
+        cancelled: CANCELLED_KEEP or CANCELLED_DROP
+
+    Yields:
+        Dictionary of column name -> array for each chunk
+
+    Raises:
+        ValueError: If a required column is missing or a column is unknown
+    """
+    import pandas as pd
+
+    unknown = set(columns) - set(COLUMN_DTYPES)
+    if unknown:
+        raise ValueError(f"Unsupported columns: {sorted(unknown)}")
+    if cancelled not in (CANCELLED_KEEP, CANCELLED_DROP):
+        raise ValueError(f"cancelled must be {CANCELLED_KEEP!r} or {CANCELLED_DROP!r}")
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"{csv_path} is missing required columns: {missing}")
+    present = [column for column in columns if column in header]
+    parse_columns = list(present)
+    if cancelled == CANCELLED_DROP and 'Cancelled' in header and 'Cancelled' not in parse_columns:
+        parse_columns.append('Cancelled')
+
+    reader = pd.read_csv(csv_path, usecols=parse_columns, dtype=_parse_dtypes(parse_columns), chunksize=chunk_rows)
+    for chunk in reader:
+        arrays = _clean_chunk(chunk, parse_columns, cancelled)
+        yield {column: arrays[column] for column in present}
+
+
+def parse_csv_bytes(data: bytes, columns: Sequence[str] = DEFAULT_COLUMNS,
+                    cancelled: str = CANCELLED_KEEP) -> FlightColumns:
+    """
+    Parse an in-memory piece of a flights CSV (header line included) into cleaned column arrays.
+
+    Used by workers that receive newline-aligned blocks of a large file.
+    Columns that are requested but not present are skipped, as in iter_csv_chunks().
+
+    Args:
+        data: Header line followed by complete data lines
+        columns: Columns to parse (keys of COLUMN_DTYPES)
+        cancelled: CANCELLED_KEEP or CANCELLED_DROP
+
+    Returns:
+        Dictionary of column name -> array
+    """
+    import io
+
+    import pandas as pd
+
+    header = [name.strip().strip('"') for name in data[:data.find(b'\n')].decode().split(',')]
+    present = [column for column in columns if column in header]
+    parse_columns = list(present)
+    if cancelled == CANCELLED_DROP and 'Cancelled' in header and 'Cancelled' not in parse_columns:
+        parse_columns.append('Cancelled')
+
+    chunk = pd.read_csv(io.BytesIO(data), usecols=parse_columns, dtype=_parse_dtypes(parse_columns))
+    arrays = _clean_chunk(chunk, parse_columns, cancelled)
+    return {column: arrays[column] for column in present}
+
+
+def _source_signature(csv_path: Path) -> Dict[str, int]:
+    """File size and modification time identifying a version of the CSV."""
+    stat = csv_path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _write_npy(path: Path, raw_path: Path, dtype: np.dtype, rows: int) -> None:
+    """Write a .npy file from a raw column file whose length is only known at the end."""
+    with open(path, 'wb') as out, open(raw_path, 'rb') as raw:
+        np.lib.format.write_array_header_1_0(out, {'descr': dtype.str, 'fortran_order': False, 'shape': (rows,)})
+        shutil.copyfileobj(raw, out)
+
+
+def build_flight_cache(csv_path: Union[str, Path], cache_dir: Union[str, Path],
+                       columns: Sequence[str] = DEFAULT_COLUMNS, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                       cancelled: str = CANCELLED_KEEP) -> Path:
+    """
+    Parse a flights CSV once into a columnar cache directory.
+
+    Chunks are appended to raw per-column files, so memory stays bounded by
+    the chunk size. The cache is written to a temporary directory and moved
+    into place when complete.
+
+    Args:
+        csv_path: Path to the flights CSV
+        cache_dir: Directory to write (replaced if it exists)
+        columns: Columns to cache
+        chunk_rows: Rows parsed per chunk
+        cancelled: CANCELLED_KEEP or CANCELLED_DROP
+
+    Returns:
+        Path of the cache directory
+    """
+    csv_path, cache_dir = Path(csv_path), Path(cache_dir)
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix=f".{cache_dir.name}-", dir=cache_dir.parent))
+    raw_files = {}
+
+    try:
+        rows = 0
+        cached_columns = None
+        for chunk in iter_csv_chunks(csv_path, columns, chunk_rows, cancelled):
+            if cached_columns is None:
+                cached_columns = list(chunk)
+                raw_files = {column: open(work_dir / f"{column}.raw", 'wb') for column in cached_columns}
+            for column, values in chunk.items():
+                raw_files[column].write(np.ascontiguousarray(values).tobytes())
+            rows += len(chunk[cached_columns[0]])
+        for f in raw_files.values():
+            f.close()
+
+        cached_columns = cached_columns or []
+        for column in cached_columns:
+            raw_path = work_dir / f"{column}.raw"
+            _write_npy(work_dir / f"{column}.npy", raw_path, np.dtype(COLUMN_DTYPES[column]), rows)
+            raw_path.unlink()
+
+        manifest = {
+            'format_version': CACHE_FORMAT_VERSION,
+            'source': {'path': str(csv_path.resolve()), **_source_signature(csv_path)},
+            'cancelled': cancelled,
+            'rows': rows,
+            'columns': {column: np.dtype(COLUMN_DTYPES[column]).str for column in cached_columns},
+        }
+        with open(work_dir / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if cache_dir.exists():
+            shutil.rmtree(cache_dir)
+        os.replace(work_dir, cache_dir)
+    except BaseException:
+        for f in raw_files.values():
+            f.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    logger.info(f"Cached {rows:,} flights from {csv_path} in {cache_dir}")
+    return cache_dir
+
+
+def read_cache_manifest(cache_dir: Union[str, Path]) -> Optional[Dict]:
+    """
+    Read a cache manifest.
+
+    Args:
+        cache_dir: Cache directory
+
+    Returns:
+        Manifest dictionary, or None if there is no readable cache
+    """
+    try:
+        with open(Path(cache_dir) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_is_current(csv_path: Union[str, Path], cache_dir: Union[str, Path],
+                     columns: Sequence[str] = REQUIRED_COLUMNS, cancelled: str = CANCELLED_KEEP) -> bool:
+    """
+    Check whether a cache was built from the current CSV with the given options.
+
+    Args:
+        csv_path: Path to the flights CSV
+        cache_dir: Cache directory
+        columns: Columns that must be cached
+        cancelled: Cancelled flight handling the cache must have used
+
+    Returns:
+        True if the cache can be used instead of parsing the CSV
+    """
+    manifest = read_cache_manifest(cache_dir)
+    if manifest is None or manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return False
+    csv_path = Path(csv_path)
+    source = manifest.get('source', {})
+    return (
+        csv_path.exists()
+        and {key: source.get(key) for key in ('size', 'mtime_ns')} == _source_signature(csv_path)
+        and manifest.get('cancelled') == cancelled
+        and set(columns) <= set(manifest.get('columns', {}))
+    )
+
+
+def load_flight_cache(cache_dir: Union[str, Path], columns: Optional[Sequence[str]] = None,
+                      mmap: bool = True) -> FlightColumns:
+    """
+    Load cached columns.
+
+    Args:
+        cache_dir: Cache directory
+        columns: Columns to load (all cached columns by default)
+        mmap: Memory-map the files instead of reading them into memory
+
+    Returns:
+        Dictionary of column name -> array
+
+    Raises:
+        FileNotFoundError: If there is no cache in cache_dir
+    """
+    manifest = read_cache_manifest(cache_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No flight cache in {cache_dir}")
+    columns = list(columns) if columns is not None else list(manifest['columns'])
+    return {
+        column: np.load(Path(cache_dir) / f"{column}.npy", mmap_mode='r' if mmap else None)
+        for column in columns
+    }
+
+
+def iter_flights(csv_path: Union[str, Path], columns: Sequence[str] = REQUIRED_COLUMNS,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, cache_dir: Optional[Union[str, Path]] = None,
+                 cancelled: str = CANCELLED_KEEP) -> Iterator[FlightColumns]:
+    """
+    Iterate over cleaned flight data in chunks, using the columnar cache when possible.
+
+    With a cache directory, a missing or stale cache is rebuilt from the CSV
+    (caching DEFAULT_COLUMNS as well as the requested ones) and the chunks
+    are then read from the memory-mapped columns.
+
+    Args:
+        csv_path: Path to the flights CSV
+        columns: Columns to return
+        chunk_rows: Rows per chunk
+        cache_dir: Columnar cache directory, or None to always parse the CSV
+        cancelled: CANCELLED_KEEP or CANCELLED_DROP
+
+    Yields:
+        Dictionary of column name -> array for each chunk
+    """
+    if cache_dir is None:
+        yield from iter_csv_chunks(csv_path, columns, chunk_rows, cancelled)
+        return
+
+    if not cache_is_current(csv_path, cache_dir, columns, cancelled):
+        cache_columns = list(dict.fromkeys([*DEFAULT_COLUMNS, *columns]))
+        build_flight_cache(csv_path, cache_dir, cache_columns, chunk_rows, cancelled)
+
+    cached = load_flight_cache(cache_dir)
+    missing = [column for column in columns if column not in cached]
+    if missing:
+        raise ValueError(f"{csv_path} has no columns {missing}")
+    rows = len(cached[columns[0]]) if columns else 0
+    for start in range(0, rows, chunk_rows):
+        yield {column: cached[column][start:start + chunk_rows] for column in columns}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the columnar cache for a flights CSV")
+    parser.add_argument("data", nargs="?", default="../data/flights.csv", help="Flights CSV file")
+    parser.add_argument("--cache-dir", default="../data/cache/flights", help="Cache directory to write")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows parsed per chunk")
+    parser.add_argument("--drop-cancelled", action="store_true", help="Remove cancelled flights")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    build_flight_cache(args.data, args.cache_dir, chunk_rows=args.chunk_rows,
+                       cancelled=CANCELLED_DROP if args.drop_cancelled else CANCELLED_KEEP)
@@ -0,0 +1,434 @@
+"""
+Model Selection for the Flight Delay Model
+
+Cross-validates a grid of candidate classifiers (model family, feature
+encoding, class weighting and hyperparameters) in parallel and exports the
+best one in the model.pkl format ModelService loads.
+
+Training runs on per (day, airport) counts (see training.aggregated), so the
+folds are count tensors: flights are assigned to folds once, the tensors are
+written to .npy files and every worker process memory-maps the same copy.
+Only the candidate description and a fold index are sent to a worker.
+
+Usage (from the /server directory):
+    python -m training.selection ../data/flights.csv --folds 5 --n-jobs 4
+"""
+
+import csv
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from training.aggregated import (
+    RANDOM_STATE,
+    TEST_SIZE,
+    CountCube,
+    build_model_data,
+    count_flights,
+    evaluate_cube,
+    save_model,
+)
+from training.features import ENCODINGS, fit_params, make_classifier
+from training.ingest import DEFAULT_CHUNK_ROWS
+
+logger = logging.getLogger(__name__)
+
+FAMILY_LOGISTIC = 'logistic_regression'
+FAMILY_RANDOM_FOREST = 'random_forest'
+FAMILIES = (FAMILY_LOGISTIC, FAMILY_RANDOM_FOREST)
+
+CLASS_WEIGHTS = (None, 'balanced')
+
+# Hyperparameter grids per family
+DEFAULT_PARAM_GRID = {
+    FAMILY_LOGISTIC: {'C': [0.1, 1.0, 10.0]},
+    FAMILY_RANDOM_FOREST: {'n_estimators': [100], 'max_depth': [None, 8]},
+}
+
+# Leaderboard metrics; log loss is ranked ascending, everything else descending
+METRICS = ('accuracy', 'precision', 'recall', 'f1_score', 'log_loss')
+DEFAULT_METRIC = 'log_loss'
+
+LEADERBOARD_COLUMNS = (
+    'rank', 'name', 'family', 'encoding', 'class_weight', 'params', *METRICS,
+    'log_loss_std', 'fit_ms', 'predict_us'
+)
+
+# Single-row predictions timed per fold for the latency column
+LATENCY_CALLS = 50
+
+# Fold count tensors memory-mapped by each worker process
+_fold_delayed: Optional[np.ndarray] = None
+_fold_total: Optional[np.ndarray] = None
+_airport_ids: Optional[np.ndarray] = None
+
+
+def build_grid(families: Sequence[str] = FAMILIES, encodings: Sequence[str] = ENCODINGS,
+               class_weights: Sequence[Optional[str]] = CLASS_WEIGHTS,
+               param_grid: Optional[Dict[str, Dict[str, List[Any]]]] = None) -> List[Dict[str, Any]]:
+    """
+    Build the candidate list as the product of all settings.
+
+    Args:
+        families: Model families (FAMILIES)
+        encodings: Feature encodings (training.features.ENCODINGS)
+        class_weights: None and/or 'balanced'
+        param_grid: Hyperparameter values per family (defaults to DEFAULT_PARAM_GRID)
+
+    Returns:
+        List of candidate dictionaries with name, family, encoding, class_weight and params
+    """
+    param_grid = param_grid or DEFAULT_PARAM_GRID
+    candidates = []
+    for family, encoding, class_weight in itertools.product(families, encodings, class_weights):
+        if family not in FAMILIES:
+            raise ValueError(f"Unknown model family {family!r}, expected one of {FAMILIES}")
+        grid = param_grid.get(family, {})
+        for values in itertools.product(*grid.values()):
+            params = dict(zip(grid.keys(), values))
+            label = ','.join(f"{key}={value}" for key, value in params.items())
+            candidates.append({
+                'name': f"{family}/{encoding}/{class_weight or 'unweighted'}/{label}",
+                'family': family,
+                'encoding': encoding,
+                'class_weight': class_weight,
+                'params': params,
+            })
+    return candidates
+
+
+def make_candidate_model(candidate: Dict[str, Any], random_state: int = RANDOM_STATE):
+    """
+    Create the unfitted classifier for a candidate.
+
+    Args:
+        candidate: Candidate from build_grid()
+        random_state: Seed passed to the classifier
+
+    Returns:
+        Unfitted classifier or Pipeline
+    """
+    if candidate['family'] == FAMILY_LOGISTIC:
+        from sklearn.linear_model import LogisticRegression
+        classifier = LogisticRegression(random_state=random_state, max_iter=1000, **candidate['params'])
+    else:
+        from sklearn.ensemble import RandomForestClassifier
+        # Rows are (day, airport, label) cells weighted by their flight counts;
+        # bootstrapping would resample cells regardless of how many flights
+        # they hold, so every tree sees all flights and randomness comes
+        # from the features considered at each split
+        classifier = RandomForestClassifier(random_state=random_state, n_jobs=1, bootstrap=False,
+                                            **candidate['params'])
+    return make_classifier(candidate['encoding'], random_state, classifier=classifier)
+
+
+def fit_candidate(candidate: Dict[str, Any], cube: CountCube, random_state: int = RANDOM_STATE):
+    """
+    Fit a candidate on a count cube.
+
+    Class weighting is applied to the per-cell sample weights: scikit-learn's
+    'balanced' option would count aggregated rows instead of flights.
+
+    Args:
+        candidate: Candidate from build_grid()
+        cube: Flight counts to train on
+        random_state: Seed passed to the classifier
+
+    Returns:
+        Fitted classifier
+    """
+    X, y, weights = cube.training_rows()
+    if len(np.unique(y)) < 2:
+        raise ValueError("Training data must contain both delayed and on-time flights")
+    if candidate['class_weight'] == 'balanced':
+        class_totals = np.array([weights[y == 0].sum(), weights[y == 1].sum()])
+        weights = weights * (weights.sum() / (2 * class_totals))[y]
+
+    model = make_candidate_model(candidate, random_state)
+    model.fit(X, y, **fit_params(model, weights))
+    return model
+
+
+def log_loss_cube(model, cube: CountCube) -> float:
+    """
+    Mean log loss of a model over the flights in a cube.
+
+    Args:
+        model: Fitted classifier
+        cube: Flights to evaluate on
+
+    Returns:
+        Log loss per flight
+    """
+    X, y, weights = cube.training_rows()
+    delay_probability = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+    losses = -np.where(y == 1, np.log(delay_probability), np.log(1 - delay_probability))
+    return float(np.average(losses, weights=weights))
+
+
+def _init_worker(fold_dir: str) -> None:
+    """Memory-map the shared fold tensors in a worker process."""
+    global _fold_delayed, _fold_total, _airport_ids
+    fold_dir = Path(fold_dir)
+    _fold_delayed = np.load(fold_dir / 'delayed.npy', mmap_mode='r')
+    _fold_total = np.load(fold_dir / 'total.npy', mmap_mode='r')
+    _airport_ids = np.load(fold_dir / 'airport_ids.npy')
+
+
+def _fold_cubes(fold: int) -> Tuple[CountCube, CountCube]:
+    """Train and validation cubes for a fold of the memory-mapped tensors."""
+    others = np.arange(len(_fold_total)) != fold
+    train = CountCube(_airport_ids, _fold_delayed[others].sum(axis=0), _fold_total[others].sum(axis=0))
+    validation = CountCube(_airport_ids, np.array(_fold_delayed[fold]), np.array(_fold_total[fold]))
+    return train, validation
+
+
+def _predict_latency_us(model, airport_ids: np.ndarray) -> float:
+    """Median microseconds for a single-row predict_proba call."""
+    rows = [np.array([[(i % 7) + 1, airport_ids[i % len(airport_ids)]]]) for i in range(LATENCY_CALLS)]
+    samples = []
+    for row in rows:
+        start = time.perf_counter_ns()
+        model.predict_proba(row)
+        samples.append(time.perf_counter_ns() - start)
+    return float(np.median(samples)) / 1000
+
+
+def evaluate_fold(candidate: Dict[str, Any], fold: int, random_state: int = RANDOM_STATE) -> Dict[str, Any]:
+    """
+    Fit a candidate on all folds but one and score it on the held-out fold.
+
+    Runs in a worker process after _init_worker().
+
+    Args:
+        candidate: Candidate from build_grid()
+        fold: Index of the validation fold
+        random_state: Seed passed to the classifier
+
+    Returns:
+        Dictionary with the candidate name, fold, METRICS, fit_ms and predict_us
+    """
+    train, validation = _fold_cubes(fold)
+    start = time.perf_counter()
+    model = fit_candidate(candidate, train, random_state)
+    fit_ms = (time.perf_counter() - start) * 1000
+    return {
+        'name': candidate['name'],
+        'fold': fold,
+        **evaluate_cube(model, validation),
+        'log_loss': log_loss_cube(model, validation),
+        'fit_ms': fit_ms,
+        'predict_us': _predict_latency_us(model, train.airport_ids),
+    }
+
+
+def _rank_key(metric: str):
+    """Sort key putting the best leaderboard row first."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+    sign = 1 if metric == 'log_loss' else -1
+    return lambda row: (sign * row[metric], row['log_loss'], row['fit_ms'])
+
+
+def cross_validate(cube: CountCube, candidates: Iterable[Dict[str, Any]], n_folds: int = 5,
+                   n_jobs: int = 1, metric: str = DEFAULT_METRIC,
+                   random_state: int = RANDOM_STATE) -> List[Dict[str, Any]]:
+    """
+    Cross-validate candidates in parallel and rank them.
+
+    Args:
+        cube: All counted flights
+        candidates: Candidates from build_grid()
+        n_folds: Number of cross-validation folds
+        n_jobs: Worker processes (-1 for one per CPU, 1 to run in this process)
+        metric: Leaderboard ranking metric (METRICS)
+        random_state: Seed for the fold assignment and the classifiers
+
+    Returns:
+        Leaderboard rows (LEADERBOARD_COLUMNS), best first
+    """
+    candidates = list(candidates)
+    rank_key = _rank_key(metric)
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+
+    fold_delayed, fold_total = cube.fold_counts(n_folds, random_state)
+    tasks = [(candidate, fold) for candidate in candidates for fold in range(n_folds)]
+
+    with tempfile.TemporaryDirectory(prefix='model-selection-') as fold_dir:
+        np.save(Path(fold_dir) / 'delayed.npy', fold_delayed)
+        np.save(Path(fold_dir) / 'total.npy', fold_total)
+        np.save(Path(fold_dir) / 'airport_ids.npy', cube.airport_ids)
+        logger.info(f"Cross-validating {len(candidates)} candidates x {n_folds} folds with {n_jobs} workers")
+
+        if n_jobs == 1:
+            _init_worker(fold_dir)
+            results = [evaluate_fold(candidate, fold, random_state) for candidate, fold in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(fold_dir,)) as executor:
+                results = list(executor.map(
+                    evaluate_fold, *zip(*tasks), itertools.repeat(random_state, len(tasks))
+                ))
+
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_name.setdefault(result['name'], []).append(result)
+
+    leaderboard = []
+    for candidate in candidates:
+        folds = by_name[candidate['name']]
+        row = {
+            'name': candidate['name'],
+            'family': candidate['family'],
+            'encoding': candidate['encoding'],
+            'class_weight': candidate['class_weight'] or 'none',
+            'params': json.dumps(candidate['params'], sort_keys=True),
+        }
+        for column in (*METRICS, 'fit_ms', 'predict_us'):
+            row[column] = float(np.mean([fold[column] for fold in folds]))
+        row['log_loss_std'] = float(np.std([fold['log_loss'] for fold in folds]))
+        leaderboard.append(row)
+
+    leaderboard.sort(key=rank_key)
+    for rank, row in enumerate(leaderboard, start=1):
+        row['rank'] = rank
+    return [{column: row[column] for column in LEADERBOARD_COLUMNS} for row in leaderboard]
+
+
+def write_leaderboard(leaderboard: List[Dict[str, Any]], path: Union[str, Path]) -> Path:
+    """
+    Write the leaderboard as CSV.
+
+    Args:
+        leaderboard: Rows from cross_validate()
+        path: Output .csv path
+
+    Returns:
+        Path written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_COLUMNS)
+        writer.writeheader()
+        for row in leaderboard:
+            writer.writerow({
+                column: round(value, 6) if isinstance(value, float) else value for column, value in row.items()
+            })
+    return path
+
+
+def export_winner(cube: CountCube, candidate: Dict[str, Any], leaderboard_row: Dict[str, Any],
+                  output_path: Union[str, Path], compiled_path: Optional[Union[str, Path]] = None,
+                  model_version: str = '1.0', random_state: int = RANDOM_STATE) -> Dict[str, Any]:
+    """
+    Refit the winning candidate with the notebook's train/test split and save it.
+
+    Args:
+        cube: All counted flights
+        candidate: Winning candidate from build_grid()
+        leaderboard_row: The candidate's leaderboard row
+        output_path: Path of the model.pkl to write
+        compiled_path: Path of the compiled .npz artifact to refresh
+        model_version: Version string stored with the model
+        random_state: Seed for the split and the classifier
+
+    Returns:
+        The saved model.pkl dictionary
+    """
+    train, test = cube.split(TEST_SIZE, random_state)
+    model = fit_candidate(candidate, train, random_state)
+    model_data = build_model_data(model, train, test, model_version, extra={
+        'training_method': 'model_selection',
+        'model_type': 'Logistic_Regression' if candidate['family'] == FAMILY_LOGISTIC else 'Random_Forest',
+        'selected_candidate': candidate,
+        'cross_validation': {metric: leaderboard_row[metric] for metric in (*METRICS, 'log_loss_std')},
+    })
+    save_model(model_data, output_path, compiled_path)
+    return model_data
+
+
+def select_model(csv_paths: Iterable[Union[str, Path]], leaderboard_path: Union[str, Path],
+                 output_path: Optional[Union[str, Path]] = None, compiled_path: Optional[Union[str, Path]] = None,
+                 candidates: Optional[List[Dict[str, Any]]] = None, n_folds: int = 5, n_jobs: int = 1,
+                 metric: str = DEFAULT_METRIC, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 cache_root: Optional[Union[str, Path]] = None,
+                 model_version: str = '1.0') -> List[Dict[str, Any]]:
+    """
+    Count flights, cross-validate the candidates, write the leaderboard and export the winner.
+
+    Args:
+        csv_paths: Flights CSV files
+        leaderboard_path: Path of the leaderboard .csv to write
+        output_path: Path of the model.pkl to write for the winner (None to skip)
+        compiled_path: Path of the compiled .npz artifact to refresh
+        candidates: Candidates to compare (defaults to build_grid())
+        n_folds: Number of cross-validation folds
+        n_jobs: Worker processes (-1 for one per CPU)
+        metric: Leaderboard ranking metric
+        chunk_rows: Rows parsed per chunk
+        cache_root: Directory holding one columnar cache per CSV file
+        model_version: Version string stored with the exported model
+
+    Returns:
+        Leaderboard rows, best first
+    """
+    cube = CountCube()
+    for csv_path in csv_paths:
+        cache_dir = Path(cache_root) / Path(csv_path).stem if cache_root is not None else None
+        count_flights(csv_path, chunk_rows, cube, cache_dir)
+
+    candidates = candidates if candidates is not None else build_grid()
+    leaderboard = cross_validate(cube, candidates, n_folds, n_jobs, metric)
+    write_leaderboard(leaderboard, leaderboard_path)
+    logger.info(f"Wrote leaderboard of {len(leaderboard)} candidates to {leaderboard_path}")
+
+    if output_path is not None:
+        winner = leaderboard[0]
+        candidate = next(candidate for candidate in candidates if candidate['name'] == winner['name'])
+        logger.info(f"Exporting {winner['name']} ({metric} {winner[metric]:.5f})")
+        export_winner(cube, candidate, winner, output_path, compiled_path, model_version)
+    return leaderboard
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cross-validate candidate delay models and export the best")
+    parser.add_argument("data", nargs="*", default=["../data/flights.csv"], help="Flights CSV files")
+    parser.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES), help="Model families")
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=list(ENCODINGS),
+                        help="Feature encodings")
+    parser.add_argument("--class-weights", nargs="+", choices=("none", "balanced"), default=["none", "balanced"],
+                        help="Class weighting settings")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 for one per CPU)")
+    parser.add_argument("--metric", choices=METRICS, default=DEFAULT_METRIC, help="Ranking metric")
+    parser.add_argument("--leaderboard", default="../models/leaderboard.csv", help="Leaderboard CSV to write")
+    parser.add_argument("--output", default="../models/model.pkl", help="model.pkl to write for the winner")
+    parser.add_argument("--compiled", default="../models/model.npz",
+                        help="Compiled artifact refreshed for the winner ('' to skip)")
+    parser.add_argument("--no-export", action="store_true", help="Only write the leaderboard")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows parsed per chunk")
+    parser.add_argument("--cache-dir", help="Directory for columnar caches of the CSV files")
+    parser.add_argument("--model-version", default="1.0", help="Version stored with the exported model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    grid = build_grid(args.families, args.encodings,
+                      [None if weight == "none" else weight for weight in args.class_weights])
+    board = select_model(args.data, args.leaderboard, None if args.no_export else args.output,
+                         args.compiled or None, grid, args.folds, args.n_jobs, args.metric, args.chunk_rows,
+                         args.cache_dir, args.model_version)
+    for row in board[:10]:
+        print(f"{row['rank']:>3}  {row['name']:<60} {args.metric}={row[args.metric]:.5f}  "
+              f"fit={row['fit_ms']:.1f}ms  predict={row['predict_us']:.1f}us")
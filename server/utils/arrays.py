@@ -0,0 +1,36 @@
+"""
+Array Conversion Helpers
+
+Request payloads carry arbitrary-precision Python ints, while lookups and
+scoring run on int64 arrays. Converting a value outside the int64 range
+raises OverflowError, so such values are masked out here and can be
+reported as per-item errors instead of failing a whole request.
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+def as_int64_array(values: Sequence[int], fill: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert integers to an int64 array, masking values that do not fit.
+
+    Args:
+        values: Integers to convert
+        fill: Value stored in place of out-of-range integers
+
+    Returns:
+        Tuple of (int64 array, mask of values that fit)
+    """
+    try:
+        return np.asarray(values, dtype=np.int64), np.ones(len(values), dtype=bool)
+    except OverflowError:
+        in_range = np.fromiter((INT64_MIN <= value <= INT64_MAX for value in values), dtype=bool, count=len(values))
+        array = np.fromiter(
+            (value if ok else fill for value, ok in zip(values, in_range.tolist())), dtype=np.int64, count=len(values)
+        )
+        return array, in_range
@@ -0,0 +1,107 @@
+"""
+CPU Work Executor for Flight Delay Prediction API
+
+Execution model for request handlers:
+- Pure lookups (single predictions served from the probability table,
+  airport lookups by ID) run directly on the event loop.
+- Heavier work (batch and streaming scoring, live model inference, data
+  loading and reloads) runs in a bounded thread pool through
+  run_in_executor() so the event loop keeps serving other requests.
+
+The pool size is configured with the CPU_POOL_SIZE environment variable.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _default_pool_size() -> int:
+    """Default number of worker threads (CPU count, capped at 8)."""
+    return min(8, os.cpu_count() or 1)
+
+
+def get_pool_size() -> int:
+    """
+    Get the configured thread pool size.
+
+    Returns:
+        CPU_POOL_SIZE if set to a positive integer, otherwise the default
+    """
+    value = os.environ.get("CPU_POOL_SIZE")
+    if value:
+        try:
+            size = int(value)
+            if size > 0:
+                return size
+        except ValueError:
+            pass
+        logger.warning(f"Ignoring invalid CPU_POOL_SIZE={value!r}")
+    return _default_pool_size()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared CPU work thread pool, creating it on first use.
+
+    Returns:
+        The shared ThreadPoolExecutor
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                size = get_pool_size()
+                _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="cpu-work")
+                logger.info(f"Started CPU work pool with {size} threads")
+    return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """
+    Shut down the shared thread pool; a new one is created on next use.
+
+    Args:
+        wait: Whether to wait for running work to finish
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _reset_after_fork() -> None:
+    """Forget the parent's pool in a forked child; its threads do not exist there."""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def run_in_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function in the shared thread pool and await its result.
+
+    Args:
+        func: Function to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
@@ -0,0 +1,120 @@
+"""
+File Watcher for Flight Delay Prediction API
+
+Polls files for changes and invokes a callback, used to reload the model
+when a new artifact is written to its path. Polling the modification time
+and size avoids a dependency on platform-specific notification APIs.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Default seconds between polls
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Get (mtime_ns, size) for a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """Background thread calling a function when any watched file changes."""
+
+    def __init__(
+        self,
+        paths: Iterable[Union[str, Path]],
+        on_change: Callable[[], object],
+        interval: float = DEFAULT_POLL_INTERVAL
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            paths: Files to watch
+            on_change: Called from the watcher thread after a change settles
+            interval: Seconds between polls
+        """
+        self.paths = [Path(path) for path in paths]
+        self.on_change = on_change
+        self.interval = interval
+        self._signatures: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Record the current file state and start polling."""
+        if self._thread is not None:
+            return
+        self._signatures = {path: _file_signature(path) for path in self.paths}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {', '.join(map(str, self.paths))} every {self.interval:g}s")
+
+    def stop(self) -> None:
+        """Stop polling and wait for the watcher thread to exit."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def check(self) -> bool:
+        """
+        Poll the watched files once.
+
+        A change is only reported once the file is unchanged for a full poll,
+        so a file that is still being written is not picked up half way.
+
+        Returns:
+            True if a settled change was detected and on_change was called
+        """
+        current = {path: _file_signature(path) for path in self.paths}
+        if current == self._signatures:
+            return False
+
+        # Wait one interval for the writer to finish
+        if self._stop.wait(self.interval):
+            return False
+        settled = {path: _file_signature(path) for path in self.paths}
+        if settled != current:
+            return False
+
+        self._signatures = settled
+        logger.info("Watched file changed, reloading")
+        try:
+            self.on_change()
+        except Exception as e:
+            logger.error(f"File change handler failed: {e}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+def get_watch_interval() -> Optional[float]:
+    """
+    Get the model watch interval from the MODEL_WATCH_INTERVAL environment variable.
+
+    Returns:
+        Poll interval in seconds, or None if watching is disabled
+    """
+    value = os.environ.get("MODEL_WATCH_INTERVAL")
+    if not value:
+        return None
+    try:
+        interval = float(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid MODEL_WATCH_INTERVAL={value!r}")
+        return None
+    return interval if interval > 0 else None
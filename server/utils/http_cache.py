@@ -0,0 +1,150 @@
+"""
+HTTP Caching Helpers for Flight Delay Prediction API
+
+Pre-serialized, pre-compressed response bodies with strong ETags and the
+header parsing needed to answer conditional and compressed GET requests.
+"""
+
+import gzip
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; clients then get gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Encodings in server preference order
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+def _parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into {coding: quality}.
+
+    Args:
+        header: Accept-Encoding header value
+
+    Returns:
+        Mapping of lower-case content coding to its q-value
+    """
+    codings: Dict[str, float] = {}
+    if not header:
+        return codings
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def _etag_tokens(header: str) -> Iterable[str]:
+    """Split an If-None-Match header into entity tags without the weak prefix."""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            yield tag
+
+
+class PrecompressedBody:
+    """Immutable response body serialized once, with compressed variants."""
+
+    __slots__ = ("media_type", "variants", "etags", "_digest")
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        """
+        Serialize the variants for a response body.
+
+        Args:
+            body: Uncompressed response body
+            media_type: Content-Type of the body
+        """
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # mtime=0 keeps the gzip output deterministic for a given body
+        variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body)
+
+        object.__setattr__(self, "media_type", media_type)
+        object.__setattr__(self, "variants", variants)
+        # Strong ETags must differ between content codings of the same data
+        object.__setattr__(self, "etags", {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in variants
+        })
+        object.__setattr__(self, "_digest", digest)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def select_encoding(self, accept_encoding: Optional[str]) -> str:
+        """
+        Pick the best available content coding for a request.
+
+        Args:
+            accept_encoding: Accept-Encoding header value
+
+        Returns:
+            "br", "gzip" or "identity"
+        """
+        accepted = _parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for coding in ENCODING_PREFERENCE:
+            if coding in self.variants and accepted.get(coding, wildcard) > 0:
+                return coding
+        return "identity"
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """
+        Check an If-None-Match header against this body.
+
+        Uses the weak comparison required for If-None-Match, so a tag for any
+        content coding of the same data matches.
+
+        Args:
+            if_none_match: If-None-Match header value
+
+        Returns:
+            True if the client's cached copy is current (answer with 304)
+        """
+        if not if_none_match:
+            return False
+        for tag in _etag_tokens(if_none_match):
+            if tag == "*" or tag.strip('"').split("-", 1)[0] == self._digest:
+                return True
+        return False
+
+    def headers(self, encoding: str, cache_control: str) -> Dict[str, str]:
+        """
+        Build the caching headers for a variant.
+
+        Args:
+            encoding: Content coding returned by select_encoding()
+            cache_control: Cache-Control header value
+
+        Returns:
+            Response headers (Content-Encoding is only set for compressed variants)
+        """
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return headers
@@ -0,0 +1,63 @@
+"""
+Fast JSON Encoding for Flight Delay Prediction API
+
+Serializes response payloads straight to bytes, using orjson when it is
+installed and the standard library otherwise. Output matches FastAPI's
+JSONResponse (compact separators, UTF-8, no NaN).
+"""
+
+import json
+import logging
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the json module produces the same output
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(value: Any) -> Any:
+    """Convert NumPy scalars and arrays, which neither encoder handles natively."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serialize a payload to JSON bytes.
+
+    Args:
+        payload: JSON-compatible dicts, lists and scalars
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(
+        payload,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default
+    ).encode("utf-8")
+
+
+def fast_serialization_enabled() -> bool:
+    """
+    Whether handlers may write response bytes directly instead of building
+    pydantic response models.
+
+    Controlled by the FAST_SERIALIZATION environment variable (enabled by
+    default; set to 0 or false to use the pydantic response models).
+
+    Returns:
+        True if fast serialization is enabled
+    """
+    return os.environ.get("FAST_SERIALIZATION", "1").strip().lower() not in ("0", "false", "no", "off")
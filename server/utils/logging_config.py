@@ -0,0 +1,360 @@
+"""
+Asynchronous Logging for Flight Delay Prediction API
+
+Request handlers only put log records on a queue. A background thread
+formats them and writes whole batches to the output stream with one write
+and one flush, so formatting and log I/O stay off the request path.
+
+- Output is plain text or one JSON object per line (LOG_FORMAT).
+- Successful requests can be sampled per route (LOG_SAMPLE_RATES) with
+  log_sampled(), checked before the log call so skipped requests cost
+  nothing.
+- Warnings and errors are never sampled or dropped and never wait: when the
+  queue is full, INFO and DEBUG records are dropped and counted instead.
+"""
+
+import atexit
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, TextIO
+
+from utils.json_encoding import dumps
+from utils.metrics import Counter
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
+
+# Records waiting to be written; INFO records beyond this are dropped
+DEFAULT_QUEUE_SIZE = 10000
+
+# Most records formatted and written per batch
+MAX_BATCH_RECORDS = 512
+
+# Longest an INFO record waits before the writer picks it up
+FLUSH_INTERVAL_SECONDS = 0.1
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# Extra field values written as they are; anything else is written as str(value)
+_JSON_TYPES = (str, int, float, bool, type(None), list, dict)
+
+LOG_RECORDS_DROPPED = Counter(
+    "flight_delay_log_records_dropped_total",
+    "INFO and DEBUG log records dropped because the log queue was full."
+).labels()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record as JSON.
+
+        Args:
+            record: Log record
+
+        Returns:
+            JSON object with timestamp, level, logger, message, any extra
+            fields and the formatted exception, if there is one
+        """
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value if isinstance(value, _JSON_TYPES) else str(value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return dumps(entry).decode("utf-8")
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """
+    Parse per-route sample rates such as "/predict=0.1,/predict/batch=0.5".
+
+    Args:
+        value: LOG_SAMPLE_RATES environment variable value
+
+    Returns:
+        Mapping of route to the fraction of successful requests logged
+    """
+    rates: Dict[str, float] = {}
+    for part in (value or "").split(","):
+        route, _, rate = part.strip().partition("=")
+        if not route:
+            continue
+        try:
+            rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            logging.getLogger(__name__).warning(f"Ignoring invalid log sample rate {part.strip()!r}")
+    return rates
+
+
+class BatchLogWriter(threading.Thread):
+    """
+    Background thread writing queued records in batches.
+
+    Producers append to a deque, which is thread-safe without a lock. The
+    writer drains it every FLUSH_INTERVAL_SECONDS, or as soon as a full batch
+    or a warning is waiting.
+    """
+
+    def __init__(self, formatter: logging.Formatter, stream: TextIO, max_pending: int = DEFAULT_QUEUE_SIZE):
+        """
+        Create the writer.
+
+        Args:
+            formatter: Formatter applied to each record
+            stream: Output stream
+            max_pending: INFO and DEBUG records waiting beyond this are dropped
+        """
+        super().__init__(name="log-writer", daemon=True)
+        self.formatter = formatter
+        self.stream = stream
+        self.max_pending = max_pending
+        self.pending: Deque[logging.LogRecord] = deque()
+        self.wakeup = threading.Event()
+        self.busy = False
+        self.stopping = False
+        self._reported_drops = int(LOG_RECORDS_DROPPED.value())
+
+    def submit(self, record: logging.LogRecord) -> None:
+        """Queue a record; called on the logging thread."""
+        if record.levelno < logging.WARNING and len(self.pending) >= self.max_pending:
+            LOG_RECORDS_DROPPED.inc()
+            return
+        # Warnings and errors are queued even beyond max_pending
+        self.pending.append(record)
+        # Otherwise the writer wakes up on its own every FLUSH_INTERVAL_SECONDS;
+        # waking it per record would cost a thread switch per log call
+        if (record.levelno >= logging.WARNING or len(self.pending) >= MAX_BATCH_RECORDS) \
+                and not self.wakeup.is_set():
+            self.wakeup.set()
+
+    def run(self) -> None:
+        while True:
+            self.wakeup.wait(FLUSH_INTERVAL_SECONDS)
+            self.wakeup.clear()
+            self.busy = True
+            while self.pending:
+                batch = []
+                while self.pending and len(batch) < MAX_BATCH_RECORDS:
+                    batch.append(self.pending.popleft())
+                self._write(batch)
+            self.busy = False
+            if self.stopping and not self.pending:
+                return
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        """Format one batch and write it with a single write and flush."""
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception as e:
+                lines.append(f"Failed to format log record from {record.name}: {e}")
+
+        dropped = int(LOG_RECORDS_DROPPED.value())
+        if dropped > self._reported_drops:
+            lines.append(self.formatter.format(logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "Dropped %d log records because the log queue was full", (dropped - self._reported_drops,), None
+            )))
+            self._reported_drops = dropped
+
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            # Nowhere left to report a broken log stream
+            pass
+
+    def idle(self) -> bool:
+        """Whether every submitted record has been written."""
+        return not self.pending and not self.busy
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write the remaining records and end the thread."""
+        self.stopping = True
+        self.wakeup.set()
+        self.join(timeout)
+
+
+class AsyncQueueHandler(logging.Handler):
+    """
+    Handler that hands records to a BatchLogWriter without formatting them.
+
+    Records stay in the process, so unlike the stdlib QueueHandler the
+    message arguments are not merged on the calling thread, and the handler
+    lock is skipped since submitting is thread-safe on its own.
+    """
+
+    def __init__(self, writer: BatchLogWriter):
+        super().__init__()
+        self.writer = writer
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if not self.filter(record):
+            return False
+        self.writer.submit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.writer.submit(record)
+
+
+_writer: Optional[BatchLogWriter] = None
+_lock = threading.Lock()
+
+# Fraction of successful requests logged per route (see log_sampled)
+_sample_rates: Dict[str, float] = {}
+
+
+def log_sampled(route: str) -> bool:
+    """
+    Decide whether to log a successful request on a route.
+
+    Call this before logging so skipped requests do not even build a log
+    record. Never use it for warnings and errors, which are always logged.
+
+    Args:
+        route: Route template, e.g. "/predict"
+
+    Returns:
+        True if this request should be logged
+    """
+    rate = _sample_rates.get(route, 1.0)
+    return rate >= 1.0 or random.random() < rate
+
+
+def get_log_format() -> str:
+    """
+    Get the configured log output format.
+
+    Returns:
+        LOG_FORMAT ("text" or "json"), defaulting to text
+    """
+    value = os.environ.get("LOG_FORMAT", LOG_FORMAT_TEXT).strip().lower()
+    return LOG_FORMAT_JSON if value == LOG_FORMAT_JSON else LOG_FORMAT_TEXT
+
+
+def configure_logging(level: int = logging.INFO, stream: Optional[TextIO] = None,
+                      log_format: Optional[str] = None, sample_rates: Optional[Dict[str, float]] = None,
+                      queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+    """
+    Route root logger output through the background writer.
+
+    Replaces the root logger's handlers; calling it again reconfigures the
+    output after flushing what was already queued.
+
+    Args:
+        level: Root logger level
+        stream: Output stream (defaults to stderr)
+        log_format: "text" or "json" (defaults to LOG_FORMAT)
+        sample_rates: Per-route sample rates for log_sampled() (defaults to LOG_SAMPLE_RATES)
+        queue_size: INFO and DEBUG records that can wait for the writer
+    """
+    global _writer, _sample_rates
+    log_format = log_format or get_log_format()
+    if sample_rates is None:
+        sample_rates = parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES"))
+    formatter = JsonFormatter() if log_format == LOG_FORMAT_JSON else logging.Formatter(TEXT_FORMAT)
+
+    with _lock:
+        writer = BatchLogWriter(formatter, stream if stream is not None else sys.stderr, queue_size)
+        writer.start()
+        handler = AsyncQueueHandler(writer)
+        _sample_rates = dict(sample_rates)
+
+        # Switch handlers before stopping the previous writer so no record is lost in between
+        _replace_root_handlers(handler, level)
+        previous, _writer = _writer, writer
+        if previous is not None:
+            previous.stop()
+
+
+def _replace_root_handlers(handler: logging.Handler, level: Optional[int] = None) -> None:
+    """Make a handler the only handler of the root logger."""
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    if level is not None:
+        root.setLevel(level)
+
+
+def flush_logging(timeout: float = 5.0) -> bool:
+    """
+    Wait until every queued record has been written.
+
+    Args:
+        timeout: Maximum seconds to wait
+
+    Returns:
+        True if the queue was drained in time
+    """
+    writer = _writer
+    if writer is None:
+        return True
+    deadline = time.monotonic() + timeout
+    writer.wakeup.set()
+    while not writer.idle():
+        if time.monotonic() > deadline or not writer.is_alive():
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def shutdown_logging() -> None:
+    """
+    Write the remaining records and stop the writer (registered with atexit).
+
+    Records logged afterwards are written synchronously to the same stream.
+    """
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+        if writer is None:
+            return
+        fallback = logging.StreamHandler(writer.stream)
+        fallback.setFormatter(writer.formatter)
+        _replace_root_handlers(fallback)
+        writer.stop()
+
+
+def _restart_after_fork() -> None:
+    """
+    Give a forked child its own writer thread.
+
+    Only the forking thread survives fork(), so the child would otherwise
+    queue records that are never written. Records the parent had queued stay
+    with the parent, which writes them.
+    """
+    global _writer, _lock
+    _lock = threading.Lock()
+    previous = _writer
+    if previous is None:
+        return
+    writer = BatchLogWriter(previous.formatter, previous.stream, previous.max_pending)
+    writer.start()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, AsyncQueueHandler) and handler.writer is previous:
+            handler.writer = writer
+    _writer = writer
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,520 @@
+"""
+Prometheus Metrics for Flight Delay Prediction API
+
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus text
+exposition format (version 0.0.4). Updates never take a lock: every thread
+writes to its own shard of a metric and shards are only summed when /metrics
+is scraped. Each server process keeps its own registry, so with several
+worker processes every worker reports its own series.
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXPOSITION_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Whole requests: from sub-millisecond table lookups to slow bulk streams
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Steps inside a single prediction, which mostly take microseconds
+STAGE_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3)
+
+# Route label for requests that matched no route, so 404 scans cannot add series
+UNMATCHED_ROUTE = "unmatched"
+
+
+def metrics_enabled() -> bool:
+    """
+    Whether request and prediction metrics are collected.
+
+    Controlled by the METRICS_ENABLED environment variable (enabled by
+    default; set to 0 or false to skip collection on the request path).
+
+    Returns:
+        True if metrics are collected
+    """
+    return os.environ.get("METRICS_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# Checked on every request so collection can be switched off at runtime
+ENABLED = metrics_enabled()
+
+
+def stage_sample_every() -> int:
+    """
+    How many predictions share one stage timing sample.
+
+    Controlled by the METRICS_STAGE_SAMPLE_EVERY environment variable
+    (default 16; 1 times the stages of every prediction). Request counts and
+    latencies are always recorded for every request.
+
+    Returns:
+        Sampling interval, at least 1
+    """
+    try:
+        return max(1, int(os.environ.get("METRICS_STAGE_SAMPLE_EVERY", "16")))
+    except ValueError:
+        logger.warning("Invalid METRICS_STAGE_SAMPLE_EVERY, timing every 16th prediction")
+        return 16
+
+
+STAGE_SAMPLE_EVERY = stage_sample_every()
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, writing whole numbers without a fraction."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _label_string(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render {name="value",...} for a sample, or nothing without labels."""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Sharded:
+    """
+    Per-thread storage for one labelled series.
+
+    Each thread gets its own list of slots the first time it updates the
+    series; only that thread ever writes to it. Creating a shard takes a
+    lock once per thread, updates and reads never do.
+    """
+
+    __slots__ = ("_size", "_local", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> List[float]:
+        """Create the calling thread's slots on its first update."""
+        shard = [0] * self._size
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def _totals(self) -> List[float]:
+        """Sum the slots of every thread."""
+        totals = [0] * self._size
+        for shard in list(self._shards):
+            for index, value in enumerate(shard):
+                totals[index] += value
+        return totals
+
+
+class CounterChild(_Sharded):
+    """One labelled counter series."""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1) -> None:
+        """Add a non-negative amount to the counter."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[0] += amount
+
+    def value(self) -> float:
+        """Current counter value."""
+        return self._totals()[0]
+
+
+class GaugeChild(CounterChild):
+    """One labelled gauge series that moves up and down."""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        """Subtract an amount from the gauge."""
+        self.inc(-amount)
+
+
+class HistogramChild(_Sharded):
+    """One labelled histogram series with fixed bucket bounds."""
+
+    __slots__ = ("_bounds",)
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        # One slot per bound, one for +Inf and one for the sum
+        super().__init__(len(bounds) + 2)
+        self._bounds = bounds
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """
+        Read the histogram.
+
+        Returns:
+            Tuple of (cumulative counts per bound including +Inf, sum, count)
+        """
+        totals = self._totals()
+        cumulative = []
+        running = 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+
+class _Metric:
+    """A metric family: name, help text and its labelled series."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _Sharded] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self) -> _Sharded:
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """
+        Get the series for a set of label values, creating it on first use.
+
+        Bind frequently used series once and keep the child instead of
+        calling labels() on the hot path.
+
+        Args:
+            *values: One value per label name, in order
+
+        Returns:
+            The child series
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def collect(self) -> Iterable[Tuple[str, Tuple[str, ...], float]]:
+        """Yield (sample name, label values, value) for every series."""
+        for values, child in sorted(self._children.items()):
+            yield self.name, values, child.value()
+
+    def render(self) -> List[str]:
+        """Render the family in the text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for sample, values, value in self.collect():
+            lines.append(f"{sample}{_label_string(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests served."""
+
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increment an unlabelled counter."""
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that moves up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose series are computed by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]],
+                 registry: Optional["Registry"] = None):
+        """
+        Register a gauge read from application state.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names of the series the callback returns
+            callback: Returns (label values, value) pairs when scraped
+            registry: Registry to add the gauge to (defaults to REGISTRY)
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self._callback = callback
+
+    def collect(self) -> Iterable[Tuple[str, Tuple[str, ...], float]]:
+        for values, value in self._callback():
+            yield self.name, tuple(str(value) for value in values), value
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed buckets, e.g. latencies."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS, registry: Optional["Registry"] = None):
+        """
+        Register a histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            buckets: Increasing upper bounds, without +Inf
+            registry: Registry to add the histogram to (defaults to REGISTRY)
+        """
+        self.buckets = tuple(float(bound) for bound in buckets)
+        if list(self.buckets) != sorted(set(self.buckets)):
+            raise ValueError("Histogram buckets must be strictly increasing")
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe a value on an unlabelled histogram."""
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        bucket_names = self.labelnames + ("le",)
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for values, child in sorted(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, running in zip(bounds, cumulative):
+                lines.append(f"{self.name}_bucket{_label_string(bucket_names, values + (bound,))} {running}")
+            labels = _label_string(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        """Add a metric family; names must be unique."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> bytes:
+        """
+        Render every family in the text exposition format.
+
+        Returns:
+            UTF-8 encoded exposition, ending in a newline
+        """
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken callback must not take down the whole scrape
+                logger.error(f"Failed to collect metric {metric.name}: {e}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+# The _count series of this histogram is the request counter
+HTTP_REQUEST_SECONDS = Histogram(
+    "flight_delay_http_request_duration_seconds",
+    "Time from receiving an HTTP request to sending the end of its response.",
+    ("method", "route", "status")
+)
+# Requests that entered the middleware; in flight = started - finished
+HTTP_REQUESTS_STARTED = CounterChild()
+
+
+def _requests_in_flight() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    """Requests started but not yet finished."""
+    finished = sum(child.snapshot()[2] for child in list(HTTP_REQUEST_SECONDS._children.values()))
+    # Requests finishing between the two reads could make this briefly negative
+    yield (), max(0, HTTP_REQUESTS_STARTED.value() - finished)
+
+
+CallbackGauge(
+    "flight_delay_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    (),
+    _requests_in_flight
+)
+PREDICTION_STAGE_SECONDS = Histogram(
+    "flight_delay_prediction_stage_duration_seconds",
+    "Time spent in each stage of a single /predict request.",
+    ("stage",),
+    buckets=STAGE_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "flight_delay_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result")
+)
+CACHE_EVICTIONS = Counter(
+    "flight_delay_cache_evictions_total",
+    "Cache entries removed, by cache and reason (size, expired or invalidated).",
+    ("cache", "reason")
+)
+
+
+def _cache_hit_ratios() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    """Hit ratio per cache since the process started."""
+    totals: Dict[str, List[float]] = {}
+    for _, (cache, result), value in CACHE_REQUESTS.collect():
+        counts = totals.setdefault(cache, [0, 0])
+        counts[result == "hit"] += value
+    for cache, (misses, hits) in sorted(totals.items()):
+        if hits + misses:
+            yield (cache,), hits / (hits + misses)
+
+
+CallbackGauge(
+    "flight_delay_cache_hit_ratio",
+    "Fraction of cache lookups that were hits since the process started.",
+    ("cache",),
+    _cache_hit_ratios
+)
+
+
+class StageTimer:
+    """
+    Records the time between consecutive marks into stage histograms.
+
+    Usage:
+        timer = stage_timer()
+        validate()
+        timer.mark(STAGE_VALIDATION)
+    """
+
+    __slots__ = ("_last",)
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def mark(self, stage: HistogramChild) -> None:
+        """Observe the time since the previous mark in a stage series."""
+        now = time.perf_counter()
+        stage.observe(now - self._last)
+        self._last = now
+
+
+class _NullTimer:
+    """Stage timer used while metrics are disabled."""
+
+    __slots__ = ()
+
+    def mark(self, stage: HistogramChild) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+# Calls left until the next sampled timer; races between threads only shift the sample
+_stage_countdown = 0
+
+
+def stage_timer():
+    """
+    Start timing the stages of one operation.
+
+    Only every STAGE_SAMPLE_EVERY-th call is timed: one timed mark costs
+    about as much as a whole table lookup, so timing every prediction would
+    noticeably slow down the cheapest requests.
+
+    Returns:
+        StageTimer, or a no-op timer for unsampled calls and while metrics
+        are disabled
+    """
+    global _stage_countdown
+    if not ENABLED:
+        return _NULL_TIMER
+    _stage_countdown -= 1
+    if _stage_countdown > 0:
+        return _NULL_TIMER
+    _stage_countdown = STAGE_SAMPLE_EVERY
+    return StageTimer()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency per route and status, and requests in flight.
+
+    Routes are labelled with their path template (/airports/{airport_id})
+    rather than the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._series: Dict[Tuple[str, str, int], HistogramChild] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        # A plain function returning send()'s awaitable saves a coroutine per message
+        def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            return send(message)
+
+        HTTP_REQUESTS_STARTED.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router fills in the matched route on the shared scope
+            path = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            key = (scope["method"], path, status_code)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status_code))
+            series.observe(time.perf_counter() - start)
@@ -0,0 +1,64 @@
+"""
+Liveness and Readiness Probes
+
+Orchestrators probe every worker every few seconds. The probes are answered
+by a plain ASGI middleware in front of the application, with response
+messages built once at import: a probe checks one flag and sends two
+precomputed messages, without routing, the other middleware, request metrics
+or response models.
+
+- GET /livez: 200 while the worker's event loop is answering requests.
+- GET /readyz: 200 once the service can predict, 503 before.
+"""
+
+from typing import Callable, Dict, Tuple
+
+LIVENESS_PATH = "/livez"
+READINESS_PATH = "/readyz"
+
+
+def _response(status: int, body: bytes) -> Tuple[Dict, Dict]:
+    """Build the ASGI start and body messages of a JSON response."""
+    start = {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+ALIVE = _response(200, b'{"status":"alive"}')
+READY = _response(200, b'{"status":"ready"}')
+NOT_READY = _response(503, b'{"status":"not_ready"}')
+
+
+class ProbeMiddleware:
+    """ASGI middleware answering GET/HEAD /livez and /readyz with precomputed responses."""
+
+    def __init__(self, app, is_ready: Callable[[], bool]):
+        """
+        Wrap an application.
+
+        Args:
+            app: ASGI application handling every other request
+            is_ready: Whether the service can serve requests; must be cheap
+        """
+        self.app = app
+        self.is_ready = is_ready
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            path = scope["path"]
+            if path == LIVENESS_PATH:
+                response = ALIVE
+            elif path == READINESS_PATH:
+                response = READY if self.is_ready() else NOT_READY
+            else:
+                response = None
+            if response is not None:
+                start, body = response
+                # Servers may add headers to the start message, so send a copy
+                await send({**start, "headers": list(start["headers"])})
+                await send(body if scope["method"] == "GET" else {**body, "body": b""})
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,169 @@
+"""
+Bounded Result Cache
+
+A thread-safe LRU cache with an optional time-to-live, for results that are
+expensive to build and requested over and over (traffic is heavily skewed
+towards a few hub airports).
+
+Callers choose the key space and pass a version tuple with every lookup,
+e.g. (model snapshot, airport data). Versions are compared by identity: when
+any of them changes, everything cached under the previous versions is
+dropped, so a model reload or new airport data never serves stale results.
+"""
+
+import logging
+import operator
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from utils import metrics
+from utils.metrics import CACHE_EVICTIONS, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 4096
+
+EVICTED_SIZE = "size"
+EVICTED_EXPIRED = "expired"
+EVICTED_INVALIDATED = "invalidated"
+
+
+def get_cache_settings() -> Tuple[int, Optional[float]]:
+    """
+    Get the prediction result cache limits.
+
+    Configured with RESULT_CACHE_SIZE (default 4096 entries; 0 disables the
+    cache) and RESULT_CACHE_TTL_SECONDS (unset or 0 keeps entries until they
+    are evicted or invalidated).
+
+    Returns:
+        Tuple of (maximum entries, time-to-live in seconds or None)
+    """
+    max_entries, ttl = DEFAULT_MAX_ENTRIES, None
+    try:
+        max_entries = max(0, int(os.environ.get("RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)))
+    except ValueError:
+        logger.warning(f"Ignoring invalid RESULT_CACHE_SIZE={os.environ['RESULT_CACHE_SIZE']!r}")
+    try:
+        ttl = float(os.environ.get("RESULT_CACHE_TTL_SECONDS") or 0) or None
+    except ValueError:
+        logger.warning(f"Ignoring invalid RESULT_CACHE_TTL_SECONDS={os.environ['RESULT_CACHE_TTL_SECONDS']!r}")
+    return max_entries, ttl
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache with optional TTL and version-based invalidation.
+
+    Hits and misses are counted in flight_delay_cache_requests_total and
+    removals in flight_delay_cache_evictions_total, labelled with the cache
+    name. Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self, name: str, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: Optional[float] = None):
+        """
+        Create a cache.
+
+        Args:
+            name: Cache label in the cache metrics
+            max_entries: Entries kept before the least recently used is
+                evicted; 0 disables caching
+            ttl_seconds: Seconds an entry stays valid, or None for no expiry
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, expiry deadline), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._version: Tuple = ()
+        self._lock = threading.Lock()
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+        self._evictions = {reason: CACHE_EVICTIONS.labels(name, reason)
+                           for reason in (EVICTED_SIZE, EVICTED_EXPIRED, EVICTED_INVALIDATED)}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_current(self, version: Tuple) -> bool:
+        """Whether a version tuple is the one the cached entries belong to."""
+        current = self._version
+        return len(version) == len(current) and all(map(operator.is_, version, current))
+
+    def get(self, key: Hashable, version: Tuple) -> Optional[Any]:
+        """
+        Look up a value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            version: Versions the value must have been cached under
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key) if self._is_current(version) else None
+            if entry is not None and self.ttl_seconds is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                if metrics.ENABLED:
+                    self._evictions[EVICTED_EXPIRED].inc()
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if metrics.ENABLED:
+            (self._hits if entry is not None else self._misses).inc()
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, version: Tuple) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Storing under new versions first drops every entry cached under the
+        previous ones.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            version: Versions the value was computed with
+        """
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+
+        with self._lock:
+            if not self._is_current(version):
+                self._invalidate()
+                self._version = tuple(version)
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+
+        if evicted and metrics.ENABLED:
+            self._evictions[EVICTED_SIZE].inc(evicted)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._invalidate()
+            self._version = ()
+
+    def _invalidate(self) -> None:
+        """Drop every entry and count it; the lock must be held."""
+        if self._entries and metrics.ENABLED:
+            self._evictions[EVICTED_INVALIDATED].inc(len(self._entries))
+        self._entries.clear()
@@ -0,0 +1,119 @@
+"""
+Startup Timing for Flight Delay Prediction API
+
+Records how long module imports and startup phases take so cold start time
+can be reported when the application starts.
+"""
+
+import importlib
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Monotonic reference captured when this module is first imported
+_MODULE_LOADED_AT = time.perf_counter()
+
+# Recorded durations in seconds, in the order they completed
+_timings: Dict[str, float] = {}
+
+
+def _process_start_time() -> Optional[float]:
+    """
+    Get the wall-clock time the current process started (Linux only).
+
+    Returns:
+        Process start time as a UNIX timestamp, or None if unavailable
+    """
+    try:
+        with open(f"/proc/{os.getpid()}/stat") as f:
+            # Field 22 (starttime) follows the parenthesised command name
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration, AttributeError):
+        return None
+
+
+_PROCESS_STARTED_AT = _process_start_time()
+
+
+def seconds_since_process_start() -> float:
+    """
+    Get the time elapsed since the process started.
+
+    Falls back to the time since this module was imported when the process
+    start time cannot be determined.
+
+    Returns:
+        Elapsed seconds
+    """
+    if _PROCESS_STARTED_AT is not None:
+        return time.time() - _PROCESS_STARTED_AT
+    return time.perf_counter() - _MODULE_LOADED_AT
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Record the duration of a startup step.
+
+    Args:
+        name: Step name used in the startup report
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings[name] = _timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed_import(module_name: str) -> ModuleType:
+    """
+    Import a module, recording the import time if it was not yet loaded.
+
+    Used for heavy dependencies that are imported lazily on the code path
+    that needs them.
+
+    Args:
+        module_name: Fully qualified module name
+
+    Returns:
+        The imported module
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    with timed(f"import {module_name}"):
+        return importlib.import_module(module_name)
+
+
+def get_startup_timings() -> Dict[str, float]:
+    """
+    Get the recorded startup timings.
+
+    Returns:
+        Dictionary mapping step name to duration in milliseconds
+    """
+    return {name: round(seconds * 1000, 1) for name, seconds in _timings.items()}
+
+
+def log_startup_report(log: Optional[logging.Logger] = None) -> None:
+    """
+    Log the startup timing breakdown.
+
+    Args:
+        log: Logger to write to (defaults to this module's logger)
+    """
+    log = log or logger
+    timings = get_startup_timings()
+    breakdown = ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items())
+    log.info(f"Startup timing: {seconds_since_process_start() * 1000:.1f}ms since process start; {breakdown}")